@@ -0,0 +1,376 @@
+"""
+One playback interface over several audio sinks.
+
+Every backend plays whole rendered messages (mono int16 PCM from
+morse_render). Pick one with set_backend(), the MORSE_AUDIO_BACKEND
+environment variable, or main.py's --backend flag:
+
+    pygame       pygame.mixer (default)
+    simpleaudio  simpleaudio.play_buffer
+    live         one long-lived SDL stream fed from a ring buffer (live_output)
+    wav          append everything played to a WAV file (MORSE_WAV_PATH)
+    null         discard audio, only count it
+
+The wav and null sinks never wait for the audio to "finish", so sessions
+run as fast as they can be rendered, without a sound card.
+
+play_pcm/play_morse block until the audio is done. start_pcm and
+play_morse_async return a Playback handle straight away instead, which
+can be polled, waited on (or awaited) and cancelled mid-message.
+
+play_text/play_text_async take plain text and assemble it from the
+per-character glyph atlas (morse_atlas) instead of rendering.
+"""
+import os
+import time
+import wave
+
+from morse_atlas import get_atlas
+from morse_profile import record, span
+from morse_render import SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, render_morse
+
+BACKEND_ENV = "MORSE_AUDIO_BACKEND"
+WAV_PATH_ENV = "MORSE_WAV_PATH"
+DEFAULT_BACKEND = "pygame"
+DEFAULT_WAV_PATH = "morse_out.wav"
+MESSAGE_GAP_S = 1.0
+POLL_S = 0.005
+
+
+def open_wav(path, sample_rate=SAMPLE_RATE):
+    """Open path for writing mono 16-bit PCM."""
+    wf = wave.open(path, "wb")
+    wf.setnchannels(1)
+    wf.setsampwidth(2)
+    wf.setframerate(sample_rate)
+    return wf
+
+
+def write_wav(path, audio, sample_rate=SAMPLE_RATE):
+    """Write one int16 buffer as a mono WAV file."""
+    with open_wav(path, sample_rate) as wf:
+        wf.writeframes(audio.astype("<i2", copy=False).tobytes())
+
+
+class Playback:
+    """
+    Handle to audio started with start_pcm. The base class just tracks the
+    nominal end time, which is all the sinks without a device can offer.
+    """
+
+    def __init__(self, duration_s):
+        self.duration_s = duration_s
+        self._end = time.monotonic() + duration_s
+        self._cancelled = False
+
+    def is_playing(self):
+        return not self._cancelled and time.monotonic() < self._end
+
+    def done(self):
+        return not self.is_playing()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def wait(self, timeout=None):
+        """Block until playback ends (or timeout seconds pass); True if it ended."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Sleep through the known remaining length once, then poll the tail
+        remaining = self._end - time.monotonic()
+        if deadline is not None:
+            remaining = min(remaining, deadline - time.monotonic())
+        if remaining > 0 and self.is_playing():
+            t0 = time.monotonic()
+            time.sleep(remaining)
+            record("sleep_overshoot", time.monotonic() - t0 - remaining)
+        while self.is_playing():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_S)
+        if not self._cancelled:
+            record("wait_overshoot", time.monotonic() - self._end)
+        return True
+
+    async def _wait_async(self):
+        import asyncio  # only needed by callers that await, and slow to import
+        while self.is_playing():
+            await asyncio.sleep(POLL_S)
+
+    def __await__(self):
+        return self._wait_async().__await__()
+
+
+class PygamePlayback(Playback):
+    def __init__(self, sound, channel, duration_s):
+        super().__init__(duration_s)
+        self._sound = sound          # keep the Sound alive while it plays
+        self._channel = channel
+
+    def is_playing(self):
+        ch = self._channel
+        return (not self._cancelled and ch is not None
+                and ch.get_busy() and ch.get_sound() is self._sound)
+
+    def cancel(self):
+        if not self._cancelled and self.is_playing():
+            self._channel.stop()
+        super().cancel()
+
+
+class SimpleaudioPlayback(Playback):
+    def __init__(self, play_obj, duration_s):
+        super().__init__(duration_s)
+        self._play_obj = play_obj
+
+    def is_playing(self):
+        return not self._cancelled and self._play_obj.is_playing()
+
+    def cancel(self):
+        self._play_obj.stop()
+        super().cancel()
+
+
+class NullBackend:
+    """Plays nothing; keeps count of what would have been played."""
+
+    name = "null"
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.samples_played = 0
+        self.messages_played = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def play_pcm(self, audio):
+        self.samples_played += len(audio)
+        self.messages_played += 1
+
+    def start_pcm(self, audio):
+        # Nothing to wait for: account for it now, report it as playing
+        # for its nominal length.
+        self.play_pcm(audio)
+        return Playback(len(audio) / float(self.sample_rate))
+
+    @property
+    def seconds_played(self):
+        return self.samples_played / float(self.sample_rate)
+
+
+class WavBackend(NullBackend):
+    """
+    Appends every played buffer to one mono 16-bit WAV file, with gap_s of
+    silence between messages standing in for the pause while the user types.
+    """
+
+    name = "wav"
+
+    def __init__(self, sample_rate=SAMPLE_RATE, path=None, gap_s=MESSAGE_GAP_S):
+        super().__init__(sample_rate)
+        self.path = path or os.environ.get(WAV_PATH_ENV, DEFAULT_WAV_PATH)
+        self.gap_s = gap_s
+        self._wav = None
+
+    def open(self):
+        if self._wav is None:
+            self._wav = open_wav(self.path, self.sample_rate)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def play_pcm(self, audio):
+        self.open()
+        if self.messages_played and self.gap_s > 0:
+            self._wav.writeframes(bytes(2 * int(self.gap_s * self.sample_rate)))
+        self._wav.writeframes(audio.astype("<i2", copy=False).tobytes())
+        super().play_pcm(audio)
+
+
+class PygameBackend(NullBackend):
+    name = "pygame"
+
+    def open(self):
+        import pygame
+        self._pygame = pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=self.sample_rate, size=-16, channels=1, buffer=512)
+
+    def close(self):
+        try:
+            self._pygame.mixer.quit()
+        except Exception:
+            pass
+
+    def play_pcm(self, audio):
+        self.start_pcm(audio).wait()
+
+    def start_pcm(self, audio):
+        duration_s = len(audio) / float(self.sample_rate)
+        if not len(audio):
+            return Playback(0.0)
+        with span("start"):
+            snd = self._pygame.mixer.Sound(buffer=audio)
+            handle = PygamePlayback(snd, snd.play(), duration_s)
+        super().play_pcm(audio)
+        return handle
+
+
+class SimpleaudioBackend(NullBackend):
+    name = "simpleaudio"
+
+    def open(self):
+        import simpleaudio
+        self._sa = simpleaudio
+
+    def play_pcm(self, audio):
+        self.start_pcm(audio).wait()
+
+    def start_pcm(self, audio):
+        duration_s = len(audio) / float(self.sample_rate)
+        if not len(audio):
+            return Playback(0.0)
+        with span("start"):
+            handle = SimpleaudioPlayback(self._sa.play_buffer(audio, 1, 2, self.sample_rate), duration_s)
+        super().play_pcm(audio)
+        return handle
+
+
+class LiveBackend(NullBackend):
+    """
+    Queues messages onto a live_output.LiveOutput: one device stream for
+    the whole session, so nothing is opened per message. stats() has the
+    stream's underrun/overrun counts.
+    """
+
+    name = "live"
+
+    def __init__(self, sample_rate=SAMPLE_RATE, device=None):
+        super().__init__(sample_rate)
+        self.device = device
+        self._live = None
+
+    def open(self):
+        if self._live is None:
+            from live_output import LiveOutput, SDLDevice
+            self._live = LiveOutput(self.device or SDLDevice(self.sample_rate),
+                                    sample_rate=self.sample_rate).start()
+
+    def close(self):
+        if self._live is not None:
+            self._live.close()
+            self._live = None
+
+    def play_pcm(self, audio):
+        self.start_pcm(audio).wait()
+
+    def start_pcm(self, audio):
+        if not len(audio):
+            return Playback(0.0)
+        with span("start"):
+            handle = self._live.play(audio)
+        super().play_pcm(audio)
+        return handle
+
+    def stats(self):
+        return self._live.stats()
+
+
+BACKENDS = {
+    "pygame": PygameBackend,
+    "simpleaudio": SimpleaudioBackend,
+    "live": LiveBackend,
+    "wav": WavBackend,
+    "null": NullBackend,
+}
+
+_backend = None
+_playback = None
+
+
+def set_backend(name=None, **options):
+    """Close the current backend and open a new one by name; returns it."""
+    global _backend
+    name = (name or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio backend {name!r}; choose from {', '.join(BACKENDS)}")
+    close_backend()
+    backend = BACKENDS[name](**options)
+    backend.open()
+    _backend = backend
+    return backend
+
+
+def get_backend():
+    if _backend is None:
+        return set_backend()
+    return _backend
+
+
+def close_backend():
+    global _backend
+    stop_playback()
+    if _backend is not None:
+        _backend.close()
+        _backend = None
+
+
+def play_pcm(audio):
+    get_backend().play_pcm(audio)
+
+
+def render_morse_pcm(morse_text, unit_s):
+    """Audio of morse_text at unit_s for the current backend."""
+    with span("render"):
+        return render_morse(morse_text, unit_s, TONE_FREQ_HZ, VOLUME, get_backend().sample_rate)
+
+
+def play_morse(morse_text, unit_s):
+    """Render morse_text at unit_s and play it on the current backend."""
+    play_pcm(render_morse_pcm(morse_text, unit_s))
+
+
+def render_text(text, unit_s):
+    """Audio of text at unit_s for the current backend, from the glyph atlas."""
+    with span("render"):
+        return get_atlas(unit_s, TONE_FREQ_HZ, VOLUME, get_backend().sample_rate).render(text)
+
+
+def play_text(text, unit_s):
+    """Play text at unit_s, assembled from the glyph atlas."""
+    play_pcm(render_text(text, unit_s))
+
+
+def start_pcm(audio, interrupt=True):
+    """
+    Start playing audio and return its Playback handle immediately.
+    With interrupt (the default) whatever was started this way before is
+    cut off first, so repeat/next never queue up behind old audio.
+    """
+    global _playback
+    if interrupt:
+        stop_playback()
+    _playback = get_backend().start_pcm(audio)
+    return _playback
+
+
+def play_morse_async(morse_text, unit_s, interrupt=True):
+    """Start playing morse_text; see start_pcm."""
+    return start_pcm(render_morse_pcm(morse_text, unit_s), interrupt)
+
+
+def play_text_async(text, unit_s, interrupt=True):
+    """Start playing text from the glyph atlas; see start_pcm."""
+    return start_pcm(render_text(text, unit_s), interrupt)
+
+
+def stop_playback():
+    global _playback
+    if _playback is not None:
+        _playback.cancel()
+        _playback = None
@@ -1,35 +1,26 @@
-import numpy as np
 import pygame
 import time
+from morse_render import (
+    TONE_FREQ_HZ, VOLUME, SAMPLE_RATE,
+    UNIT_DOT_MULT, UNIT_DASH_MULT, UNIT_GAP_INTRA, UNIT_GAP_INTER, UNIT_GAP_WORD,
+    render_morse,
+)
+from morse_profile import record
+from tone_cache import cached_tone
+from tone_synth import synth_tone
 
-TONE_FREQ_HZ = 350
-VOLUME = 0.5
-SAMPLE_RATE = 44100
-
-UNIT_DOT_MULT = 1.0
-UNIT_DASH_MULT = 3.0
-UNIT_GAP_INTRA = 1.0
-UNIT_GAP_INTER = 3.0
-UNIT_GAP_WORD = 7.0
+def _synth_tone_buffer(freq_hz, duration_sec, volume, sample_rate):
+    # Sound reads the int16 array through the buffer protocol
+    return pygame.mixer.Sound(buffer=synth_tone(freq_hz, duration_sec, volume, sample_rate))
 
 def make_tone_buffer(freq_hz, duration_sec, volume, sample_rate):
-    n_samples = max(1, int(duration_sec * sample_rate))
-    t = np.arange(n_samples) / sample_rate
-    wave = np.sin(2 * np.pi * freq_hz * t)
-
-    # Fade-in/out (5 ms each)
-    fade_len = int(0.005 * sample_rate)
-    envelope = np.ones(n_samples)
-    if fade_len * 2 < n_samples:
-        envelope[:fade_len] = np.linspace(0, 1, fade_len)
-        envelope[-fade_len:] = np.linspace(1, 0, fade_len)
-    wave *= envelope
-
-    audio = (wave * (32767 * max(0.0, min(1.0, volume)))).astype(np.int16)
-    return pygame.mixer.Sound(buffer=audio.tobytes())
+    return cached_tone("pygame", freq_hz, duration_sec, volume, sample_rate, _synth_tone_buffer)
 
 def play_silence(duration_sec):
-    time.sleep(max(0.0, duration_sec))
+    duration_sec = max(0.0, duration_sec)
+    t0 = time.perf_counter()
+    time.sleep(duration_sec)
+    record("gap_sleep", time.perf_counter() - t0 - duration_sec)
 
 def play_tone(duration_sec):
     snd = make_tone_buffer(TONE_FREQ_HZ, duration_sec, VOLUME, SAMPLE_RATE)
@@ -47,10 +38,27 @@ def play_symbol(symbol, unit_s):
     play_silence(unit_s * UNIT_GAP_INTRA)
 
 def play_morse(morse_text, unit_s):
+    """
+    Render the whole message into one buffer and play it with a single
+    Sound, so element timing is sample-accurate instead of depending on
+    sleep/poll jitter between symbols.
+    """
+    audio = render_morse(morse_text, unit_s, TONE_FREQ_HZ, VOLUME, SAMPLE_RATE)
+    if not audio.size:
+        return
+    snd = pygame.mixer.Sound(buffer=audio)
+    ch = snd.play()
+    # Sleep through the known length once, then poll only for the tail
+    pygame.time.wait(int(1000 * audio.size / SAMPLE_RATE))
+    while ch is not None and ch.get_busy():
+        pygame.time.wait(1)
+
+def play_morse_per_symbol(morse_text, unit_s):
+    # Previous symbol-by-symbol player, kept for benchmarking against play_morse
     for ch in morse_text:
         if ch in ('.', '-'):
             play_symbol(ch, unit_s)
         elif ch == ' ':
             play_silence(unit_s * max(0.0, (UNIT_GAP_INTER - UNIT_GAP_INTRA)))
         elif ch == '/':
-            play_silence(unit_s * max(0.0, (UNIT_GAP_WORD - UNIT_GAP_INTRA)))
\ No newline at end of file
+            play_silence(unit_s * max(0.0, (UNIT_GAP_WORD - UNIT_GAP_INTRA)))
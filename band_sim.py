@@ -0,0 +1,337 @@
+"""
+Band-condition simulator: the wanted signal in noise, fading and QRM.
+
+A Station keys its own oscillator from a text at its own speed and pitch,
+with optional QSB (slow fading), drift (a steady pitch slide that stops
+drift_limit_hz away from where it started) and chirp
+(a pitch offset at every key-down that dies away). BandSim mixes one
+wanted station with any number of interfering ones and band-limited
+noise at a set SNR, and produces int16 audio one block at a time:
+
+    sim = BandSim(Station("CQ TEST DE W1AW", 25, 600, qsb_depth=0.6),
+                  qrm=[Station("TEST K1ABC", 32, 750, level_db=-6, repeat=True)],
+                  snr_db=3)
+    for block in sim.blocks():      # real time: one block per device period
+        ...
+    audio = BandSim(...).render()   # offline: the whole signal at once
+
+Every stage is vectorized over a block and keeps its state (oscillator
+phase, noise overlap) between blocks, so blocks join up seamlessly and
+block-by-block output equals render(). The noise is white Gaussian noise
+band-limited to bandwidth_hz around the wanted pitch, made a frame at a
+time in the frequency domain and overlap-added with a power-complementary
+window. SNR is the wanted signal's unfaded carrier power against the
+noise power in that bandwidth.
+
+    python band_sim.py "CQ TEST DE W1AW" -o cq.wav --snr 3 --qsb 0.6 --qrm 2
+"""
+import argparse
+import math
+import sys
+
+import numpy as np
+
+from morse_render import (
+    SAMPLE_RATE, TONE_FREQ_HZ, UNIT_DASH_MULT, UNIT_DOT_MULT, VOLUME, morse_timing, seconds_per_unit,
+)
+from morse_utils import encode_to_morse
+from tone_synth import raised_cosine, rise_seconds
+
+BLOCK_SAMPLES = 4096
+DEFAULT_BANDWIDTH_HZ = 500.0
+QSB_SECOND_RATIO = 1.618      # second, slower fading component (irrational so it never repeats)
+DEFAULT_DRIFT_LIMIT_HZ = 100.0  # drift stops this far off pitch, well inside the noise bandwidth
+REPEAT_GAP_UNITS = 14.0       # silence between repeats of a looping station (two word gaps)
+QRM_TEXTS = ("CQ TEST", "TEST DE K1ABC K1ABC", "5NN 14", "QRZ?", "TU 73", "CQ CQ DE DL2XYZ")
+
+
+class Station:
+    """One keyed transmitter, heard at level_db relative to the wanted signal."""
+
+    def __init__(self, text, wpm, freq_hz=TONE_FREQ_HZ, level_db=0.0, qsb_depth=0.0,
+                 qsb_period_s=8.0, drift_hz_per_s=0.0, drift_limit_hz=DEFAULT_DRIFT_LIMIT_HZ,
+                 chirp_hz=0.0, chirp_s=0.02, repeat=False, start_s=0.0, sample_rate=SAMPLE_RATE, rng=None):
+        rng = rng or np.random.default_rng()
+        self.text = text
+        self.freq_hz = float(freq_hz)
+        self.amplitude = 10.0 ** (level_db / 20.0)
+        self.qsb_depth = max(0.0, min(1.0, qsb_depth))
+        self.qsb_period_s = qsb_period_s
+        self.drift_hz_per_s = drift_hz_per_s
+        self.drift_limit_hz = abs(drift_limit_hz)
+        self.chirp_hz = chirp_hz
+        self.chirp_s = chirp_s
+        self.repeat = repeat
+        self.sample_rate = sample_rate
+        self.phase = rng.uniform(0, 2 * math.pi)
+        self._qsb_phase = rng.uniform(0, 2 * math.pi, 2)
+
+        unit_samples = seconds_per_unit(wpm) * sample_rate
+        starts, is_dash, total_units = morse_timing(encode_to_morse(text))
+        lengths = np.where(is_dash, UNIT_DASH_MULT, UNIT_DOT_MULT)
+        offset = int(round(start_s * sample_rate))
+        self.key_on = np.rint(starts * unit_samples).astype(np.int64) + offset
+        self.key_off = np.rint((starts + lengths) * unit_samples).astype(np.int64) + offset
+        self.period = int(np.rint((total_units + REPEAT_GAP_UNITS) * unit_samples))
+        self.end = int(self.key_off[-1]) if self.key_off.size else offset
+        self.rise = raised_cosine(max(1, int(rise_seconds() * sample_rate)))
+        self.pos = 0
+
+    @property
+    def done(self):
+        return not self.repeat and self.pos >= self.end
+
+    def _intervals(self, pos, n):
+        """(on, off) sample pairs of the key-downs overlapping [pos, pos + n)."""
+        if not self.key_on.size:
+            return []
+        if not self.repeat:
+            cycles = [0]
+        else:
+            offset = int(self.key_on[0])
+            first = max(0, (pos - self.end) // self.period)
+            cycles = range(first, max(first, (pos + n - offset) // self.period) + 1)
+        out = []
+        for c in cycles:
+            shift = c * self.period
+            lo = np.searchsorted(self.key_off, pos - shift, side="right")
+            hi = np.searchsorted(self.key_on, pos + n - shift, side="left")
+            out.extend(zip((self.key_on[lo:hi] + shift).tolist(), (self.key_off[lo:hi] + shift).tolist()))
+        return out
+
+    def block(self, n):
+        """The next n samples of this station (float64, peak amplitude at most self.amplitude)."""
+        pos = self.pos
+        self.pos += n
+        sr = self.sample_rate
+        t = (pos + np.arange(n)) / sr
+        freq = np.full(n, self.freq_hz)
+        if self.drift_hz_per_s:
+            freq += np.clip(self.drift_hz_per_s * t, -self.drift_limit_hz, self.drift_limit_hz)
+
+        env = np.zeros(n)
+        r = self.rise.size
+        for on, off in self._intervals(pos, n):
+            a, b = max(on, pos), min(off, pos + n)
+            env[a - pos:b - pos] = 1.0
+            ramp = min(r, (off - on) // 2)
+            if ramp:
+                table = self.rise if ramp == r else raised_cosine(ramp)
+                # Rising edge [on, on + ramp) and falling edge [off - ramp, off), clipped to the block
+                for edge, values in ((on, table), (off - ramp, table[::-1])):
+                    lo, hi = max(edge, pos), min(edge + ramp, pos + n)
+                    if lo < hi:
+                        env[lo - pos:hi - pos] = values[lo - edge:hi - edge]
+            if self.chirp_hz:
+                freq[a - pos:b - pos] += self.chirp_hz * np.exp(-(np.arange(a, b) - on) / (self.chirp_s * sr))
+
+        # Phase-continuous oscillator: integrate the instantaneous frequency
+        phase = np.cumsum(freq)
+        phase *= 2 * math.pi / sr
+        phase += self.phase
+        self.phase = float(phase[-1] % (2 * math.pi))
+        if not env.any():
+            return env
+        out = np.sin(phase)
+        out *= env
+        if self.qsb_depth:
+            w = 2 * math.pi / self.qsb_period_s
+            fade = 0.6 * np.cos(w * t + self._qsb_phase[0])
+            fade += 0.4 * np.cos(w / QSB_SECOND_RATIO * t + self._qsb_phase[1])
+            # fade is in [-1, 1]; map it to a gain in [1 - depth, 1]
+            out *= 1.0 - self.qsb_depth * 0.5 * (1.0 - fade)
+        out *= self.amplitude
+        return out
+
+
+class BandNoise:
+    """White Gaussian noise band-limited to [low_hz, high_hz], block by block."""
+
+    def __init__(self, low_hz, high_hz, sigma, sample_rate=SAMPLE_RATE, frame=BLOCK_SAMPLES, rng=None):
+        self.rng = rng or np.random.default_rng()
+        self.sigma = sigma
+        self.hop = frame
+        size = 2 * frame
+        freqs = np.fft.rfftfreq(size, 1.0 / sample_rate)
+        self._bins = np.flatnonzero((freqs >= low_hz) & (freqs <= high_hz))
+        self._size = size
+        # Unit-variance output from unit-variance complex bins (see block())
+        self._scale = size / math.sqrt(2.0 * max(1, self._bins.size))
+        # sin window: the squares of overlapping halves sum to 1, so the
+        # overlap-added (uncorrelated) frames keep a constant noise power
+        self._window = np.sin(np.pi * (np.arange(size) + 0.5) / size)
+        self._spectrum = np.zeros(size // 2 + 1, dtype=np.complex128)
+        self._tail = np.zeros(frame)
+        self._out = np.zeros(0)
+
+    def _frame(self):
+        k = self._bins.size
+        spectrum = self._spectrum
+        spectrum[self._bins] = (self.rng.standard_normal(k) + 1j * self.rng.standard_normal(k)) / math.sqrt(2.0)
+        frame = np.fft.irfft(spectrum, self._size)
+        frame *= self._window * (self._scale * self.sigma)
+        hop = self.hop
+        out = self._tail + frame[:hop]
+        self._tail = frame[hop:]
+        return out
+
+    def block(self, n):
+        while self._out.size < n:
+            self._out = np.concatenate([self._out, self._frame()])
+        out, self._out = self._out[:n], self._out[n:]
+        return out
+
+
+class BandSim:
+    def __init__(self, signal, qrm=(), snr_db=None, bandwidth_hz=DEFAULT_BANDWIDTH_HZ,
+                 volume=VOLUME, sample_rate=SAMPLE_RATE, block_samples=BLOCK_SAMPLES, rng=None):
+        self.signal = signal
+        self.qrm = list(qrm)
+        self.sample_rate = sample_rate
+        self.block_samples = block_samples
+        self.noise = None
+        sigma = 0.0
+        if snr_db is not None:
+            # A unit sine carries 1/2 of power
+            sigma = math.sqrt(0.5 / 10.0 ** (snr_db / 10.0))
+            half = bandwidth_hz / 2.0
+            self.noise = BandNoise(max(0.0, signal.freq_hz - half), signal.freq_hz + half, sigma,
+                                   sample_rate, block_samples, rng)
+        # Headroom for everything peaking at once (noise to ~3 sigma), then clip
+        headroom = signal.amplitude + sum(s.amplitude for s in self.qrm) + 3.0 * sigma
+        self.gain = 32767.0 * max(0.0, min(1.0, volume)) / headroom
+
+    @property
+    def done(self):
+        return self.signal.done
+
+    def mix(self, n):
+        """The next n samples as float64, before gain and int16 conversion."""
+        out = self.signal.block(n)
+        for station in self.qrm:
+            out = out + station.block(n)
+        if self.noise is not None:
+            out = out + self.noise.block(n)
+        return out
+
+    def block(self, n=None):
+        """The next int16 block of n samples (default block_samples)."""
+        out = self.mix(n or self.block_samples)
+        out *= self.gain
+        np.clip(out, -32768, 32767, out=out)
+        return out.astype(np.int16)
+
+    def blocks(self, tail_s=0.5):
+        """Blocks until the wanted signal has finished, plus tail_s of band noise."""
+        tail = int(tail_s * self.sample_rate)
+        while not self.done:
+            yield self.block()
+        while tail > 0:
+            n = min(tail, self.block_samples)
+            yield self.block(n)
+            tail -= n
+
+    def render(self, tail_s=0.5):
+        """The whole simulation as one int16 array (for export and batch use)."""
+        blocks = list(self.blocks(tail_s))
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+
+def make_sim(text, wpm, freq_hz=TONE_FREQ_HZ, snr_db=None, bandwidth_hz=DEFAULT_BANDWIDTH_HZ,
+             qsb_depth=0.0, qsb_period_s=8.0, drift_hz_per_s=0.0, drift_limit_hz=DEFAULT_DRIFT_LIMIT_HZ,
+             chirp_hz=0.0, qrm=0, volume=VOLUME, sample_rate=SAMPLE_RATE, seed=None):
+    """
+    BandSim for text with qrm random interfering stations: each sends a
+    contest-style text over and over at its own speed (wpm +-40%), pitch
+    (within +-400 Hz) and level (-12 to 0 dB), with its own fading.
+    """
+    rng = np.random.default_rng(seed)
+    signal = Station(text, wpm, freq_hz, qsb_depth=qsb_depth, qsb_period_s=qsb_period_s,
+                     drift_hz_per_s=drift_hz_per_s, drift_limit_hz=drift_limit_hz, chirp_hz=chirp_hz, sample_rate=sample_rate, rng=rng)
+    stations = []
+    for _ in range(qrm):
+        stations.append(Station(
+            QRM_TEXTS[rng.integers(len(QRM_TEXTS))], wpm * rng.uniform(0.6, 1.4),
+            max(100.0, freq_hz + rng.uniform(-400, 400)), level_db=rng.uniform(-12, 0),
+            qsb_depth=qsb_depth, qsb_period_s=qsb_period_s * rng.uniform(0.5, 2.0),
+            repeat=True, start_s=rng.uniform(0, 2), sample_rate=sample_rate, rng=rng))
+    return BandSim(signal, stations, snr_db, bandwidth_hz, volume, sample_rate, rng=rng)
+
+
+def add_arguments(parser):
+    """Band-condition options, shared with practice_words.export."""
+    group = parser.add_argument_group("band conditions")
+    group.add_argument("--snr", type=float, default=None, metavar="DB",
+                       help="add band noise at this SNR (dB in --bandwidth)")
+    group.add_argument("--bandwidth", type=float, default=DEFAULT_BANDWIDTH_HZ, metavar="HZ")
+    group.add_argument("--qsb", type=float, default=0.0, metavar="DEPTH", help="fading depth, 0-1")
+    group.add_argument("--qsb-period", type=float, default=8.0, metavar="S")
+    group.add_argument("--drift", type=float, default=0.0, metavar="HZ/S")
+    group.add_argument("--drift-limit", type=float, default=DEFAULT_DRIFT_LIMIT_HZ, metavar="HZ",
+                       help="stop drifting this far off pitch")
+    group.add_argument("--chirp", type=float, default=0.0, metavar="HZ")
+    group.add_argument("--qrm", type=int, default=0, metavar="N", help="interfering stations")
+
+
+def conditions_from_args(args):
+    """make_sim keyword arguments from add_arguments' options; None if all are off."""
+    conditions = {"snr_db": args.snr, "bandwidth_hz": args.bandwidth, "qsb_depth": args.qsb,
+                  "qsb_period_s": args.qsb_period, "drift_hz_per_s": args.drift,
+                  "drift_limit_hz": args.drift_limit, "chirp_hz": args.chirp, "qrm": args.qrm}
+    if args.snr is None and not (args.qsb or args.drift or args.chirp or args.qrm):
+        return None
+    return conditions
+
+
+def conditions_tag(conditions):
+    """
+    Short name for conditions_from_args' result, e.g. "snr3_qsb0.6_qrm2",
+    listing only what is switched on; "" for clean audio.
+    """
+    if not conditions:
+        return ""
+    c = dict(snr_db=None, bandwidth_hz=DEFAULT_BANDWIDTH_HZ, qsb_depth=0.0, qsb_period_s=8.0,
+             drift_hz_per_s=0.0, drift_limit_hz=DEFAULT_DRIFT_LIMIT_HZ, chirp_hz=0.0, qrm=0)
+    c.update(conditions)
+    parts = []
+    if c["snr_db"] is not None:
+        parts.append(f"snr{c['snr_db']:g}")
+        if c["bandwidth_hz"] != DEFAULT_BANDWIDTH_HZ:
+            parts.append(f"bw{c['bandwidth_hz']:g}")
+    if c["qsb_depth"]:
+        parts.append(f"qsb{c['qsb_depth']:g}p{c['qsb_period_s']:g}")
+    if c["drift_hz_per_s"]:
+        parts.append(f"drift{c['drift_hz_per_s']:g}l{c['drift_limit_hz']:g}")
+    if c["chirp_hz"]:
+        parts.append(f"chirp{c['chirp_hz']:g}")
+    if c["qrm"]:
+        parts.append(f"qrm{c['qrm']}")
+    return "_".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Morse under simulated band conditions.")
+    parser.add_argument("text")
+    parser.add_argument("-o", "--output", help="WAV file to write (default: play it)")
+    parser.add_argument("--wpm", type=float, default=20)
+    parser.add_argument("--freq", type=float, default=TONE_FREQ_HZ)
+    parser.add_argument("--seed", type=int, default=None)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    sim = make_sim(args.text, args.wpm, args.freq, seed=args.seed, **(conditions_from_args(args) or {}))
+    audio = sim.render()
+    if args.output:
+        from audio_backend import write_wav
+        write_wav(args.output, audio, sim.sample_rate)
+        print(f"Wrote {audio.size / sim.sample_rate:.1f} s to {args.output}", file=sys.stderr)
+    else:
+        from audio_backend import close_backend, play_pcm
+        try:
+            play_pcm(audio)
+        finally:
+            close_backend()
+
+
+if __name__ == "__main__":
+    main()
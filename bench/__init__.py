@@ -0,0 +1,25 @@
+"""
+Benchmarks, each run as python -m bench.<name> (see its docstring).
+python -m bench runs the JSON suite in bench/suite.py, which also calls
+the suite(repeat) of the benchmark modules registered there.
+"""
+import argparse
+import time
+
+
+def bench_parser(doc):
+    """ArgumentParser for a bench module: its docstring's first line as the description, the rest as epilog."""
+    summary, _, rest = doc.strip().partition("\n")
+    return argparse.ArgumentParser(description=summary, epilog=rest.strip() or None,
+                                   formatter_class=argparse.RawDescriptionHelpFormatter)
+
+
+def best_of(fn, repeat, number=1):
+    """Fastest of `repeat` runs of `number` calls, in seconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
@@ -0,0 +1,57 @@
+"""
+Glyph atlas build cost and drill assembly speed against render_morse.
+
+    python -m bench.atlas [--wpm 15 20 25 30] [--repeat 2000]
+
+"build" is the one-off cost paid on first use and after every /s speed
+change; "drift" is how far (in samples) the assembled drill's length
+ends up from render_morse's for the same text.
+"""
+import random
+import string
+import time
+
+from bench import bench_parser
+from morse_atlas import GlyphAtlas
+from morse_render import SAMPLE_RATE, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+from tone_cache import TONE_CACHE
+
+CHARS = string.ascii_uppercase + string.digits
+WORDS = ["PARIS", "MORSE", "PRACTICE", "ANTENNA", "PROPAGATION", "QRZ", "73"]
+
+
+def per_call_us(fn, texts):
+    t0 = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - t0) / len(texts) * 1e6
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=float, nargs="+", default=[15, 20, 25, 30])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    groups = ["".join(rng.choice(CHARS) for _ in range(5)) for _ in range(args.repeat)]
+    words = [rng.choice(WORDS) for _ in range(args.repeat)]
+
+    print(f"{'wpm':>5} {'build ms':>9} {'atlas KB':>9}  {'drill':<8} {'atlas us':>9} {'render us':>10} {'drift':>6}")
+    for wpm in args.wpm:
+        unit_s = seconds_per_unit(wpm)
+        TONE_CACHE.clear()          # build from cold, as after a speed change
+        atlas = GlyphAtlas(unit_s)
+        for name, texts in (("groups", groups), ("words", words)):
+            atlas_us = per_call_us(atlas.render, texts)
+            render_us = per_call_us(lambda t: render_morse(encode_to_morse(t), unit_s), texts)
+            drift = max(abs(atlas.render(t).size - render_morse(encode_to_morse(t), unit_s).size)
+                        for t in texts[:200])
+            print(f"{wpm:>5g} {atlas.build_seconds * 1e3:>9.2f} {atlas.pcm.nbytes / 1e3:>9.0f}  "
+                  f"{name:<8} {atlas_us:>9.1f} {render_us:>10.1f} {drift:>6d}")
+    print(f"(drift is in samples at {SAMPLE_RATE} Hz)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+band_sim cost per block, as a share of one core in real time.
+
+    python -m bench.band [--blocks 300] [--block 4096]
+
+"core %" is generation time over the audio's duration: under 100% keeps
+up with playback, and the target for live use is under 10%.
+"""
+import time
+
+from band_sim import BLOCK_SAMPLES, make_sim
+from bench import bench_parser
+from morse_render import SAMPLE_RATE
+
+TEXT = "CQ TEST DE W1AW "
+CASES = (
+    ("clean", {}),
+    ("noise", {"snr_db": 3}),
+    ("noise+qsb", {"snr_db": 3, "qsb_depth": 0.6}),
+    ("chirp+drift", {"snr_db": 3, "chirp_hz": 40, "drift_hz_per_s": 0.5}),
+    ("qrm x2", {"snr_db": 3, "qsb_depth": 0.6, "qrm": 2}),
+    ("qrm x6", {"snr_db": 3, "qsb_depth": 0.6, "chirp_hz": 40, "qrm": 6}),
+)
+
+
+def measure(conditions, wpm, blocks, block):
+    """Seconds per block generated live, and how many times real time a short drill renders offline."""
+    sim = make_sim(TEXT * 200, wpm, seed=1, **conditions)
+    sim.block(block)
+    t0 = time.perf_counter()
+    for _ in range(blocks):
+        sim.block(block)
+    per_block = (time.perf_counter() - t0) / blocks
+
+    # Offline: a short drill rendered in one go
+    offline = make_sim(TEXT * 4, wpm, seed=1, **conditions)
+    t0 = time.perf_counter()
+    audio = offline.render()
+    return per_block, audio.size / float(SAMPLE_RATE) / (time.perf_counter() - t0)
+
+
+def suite(repeat):
+    """For bench.suite: every case at 30 WPM, 50 * repeat blocks each."""
+    block_s = BLOCK_SAMPLES / float(SAMPLE_RATE)
+    results = {}
+    for name, conditions in CASES:
+        per_block, realtime = measure(conditions, 30, 50 * repeat, BLOCK_SAMPLES)
+        results[name] = {"ms_per_block": per_block * 1e3, "core_pct": per_block / block_s * 100,
+                         "render_x_rt": realtime}
+    return results
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--blocks", type=int, default=300)
+    parser.add_argument("--block", type=int, default=BLOCK_SAMPLES, help="samples per block")
+    parser.add_argument("--wpm", type=float, default=30)
+    args = parser.parse_args(argv)
+
+    block_s = args.block / float(SAMPLE_RATE)
+    print(f"{'case':<12} {'ms/block':>9} {'core %':>7} {'render x rt':>12}")
+    for name, conditions in CASES:
+        per_block, realtime = measure(conditions, args.wpm, args.blocks, args.block)
+        print(f"{name:<12} {per_block * 1e3:>9.3f} {per_block / block_s * 100:>7.2f} {realtime:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
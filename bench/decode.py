@@ -0,0 +1,95 @@
+"""
+Round-trip check and speed of morse_decode: text is rendered with
+morse_render (the backends' make_tone_buffer synthesis), decoded again
+and compared.
+
+    python -m bench.decode [--wpm 10 20 30 40 60] [--minutes 60]
+
+--minutes streams that much audio through one decoder to show speed and
+peak memory on long input without holding it all in memory.
+"""
+import difflib
+import time
+import tracemalloc
+
+from bench import bench_parser
+from morse_decode import MorseDecoder, decode_stream
+from morse_render import SAMPLE_RATE, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+SUITE_WPMS = (10, 20, 40)
+TEXT = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789 PARIS CQ DE W1AW"
+CHUNK = 4096
+
+
+def chunks_of(audio, size=CHUNK):
+    for i in range(0, audio.size, size):
+        yield audio[i:i + size]
+
+
+def round_trip(text, wpm, hint_wpm):
+    audio = render_morse(encode_to_morse(text), seconds_per_unit(wpm))
+    decoder = MorseDecoder(SAMPLE_RATE, wpm=hint_wpm)
+    t0 = time.perf_counter()
+    out = "".join(decode_stream(chunks_of(audio), decoder=decoder)).strip()
+    elapsed = time.perf_counter() - t0
+    accuracy = difflib.SequenceMatcher(None, text, out).ratio()
+    return out, accuracy, (audio.size / SAMPLE_RATE) / elapsed, decoder.wpm
+
+
+def long_stream(minutes, wpm):
+    # Repeat one rendered message until `minutes` of audio have been fed
+    audio = render_morse(encode_to_morse(TEXT) + " / ", seconds_per_unit(wpm))
+    total = int(minutes * 60 * SAMPLE_RATE)
+    fed = 0
+    while fed < total:
+        for chunk in chunks_of(audio):
+            yield chunk
+            fed += chunk.size
+            if fed >= total:
+                return
+
+
+def suite(repeat):
+    """For bench.suite: each SUITE_WPMS round trip hinted at 20 WPM, fastest of repeat runs."""
+    results = {}
+    for wpm in SUITE_WPMS:
+        runs = [round_trip(TEXT, wpm, 20) for _ in range(repeat)]
+        _, accuracy, _, est = runs[0]
+        results[f"{wpm}wpm"] = {"accuracy": accuracy, "x_realtime": max(r[2] for r in runs), "est_wpm": est}
+    return results
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=int, nargs="+", default=[5, 10, 20, 30, 40, 60])
+    parser.add_argument("--minutes", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'wpm':>4} {'hint':>5} {'accuracy':>9} {'x realtime':>11} {'est wpm':>8}  decoded")
+    failures = 0
+    for wpm in args.wpm:
+        for hint in (wpm, 20):
+            out, accuracy, speed, est = round_trip(TEXT, wpm, hint)
+            print(f"{wpm:>4} {hint:>5} {accuracy:>9.3f} {speed:>11.0f} {est:>8.1f}  {out}")
+            if hint == wpm and out != TEXT:
+                failures += 1
+
+    if args.minutes:
+        tracemalloc.start()
+        decoder = MorseDecoder(SAMPLE_RATE, wpm=20)
+        t0 = time.perf_counter()
+        n_chars = sum(len(t) for t in decode_stream(long_stream(args.minutes, 20), decoder=decoder))
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\n{args.minutes:g} min of audio: {elapsed:.1f} s "
+              f"({args.minutes * 60 / elapsed:.0f}x realtime), {n_chars} chars, "
+              f"peak traced memory {peak / 1e6:.1f} MB")
+
+    if failures:
+        raise SystemExit(f"{failures} round trip(s) with a matching speed hint did not decode exactly")
+
+
+if __name__ == "__main__":
+    main()
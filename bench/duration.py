@@ -0,0 +1,93 @@
+"""
+DurationIndex on a large word list: build, range queries and fills.
+
+    python -m bench.duration [--words 1000000] [--minutes 3] [--wpm 18]
+
+Compiles a synthetic list, then times building the index, one range
+query by units and by characters, and filling --minutes of 5-letter
+words. For comparison, the same fill done by scanning the units array
+for words that still fit on every draw.
+"""
+import random
+import string
+import time
+
+import numpy as np
+
+from bench import bench_parser
+from morse_render import seconds_per_unit
+from practice_words.compiled import CompiledWords, compile_rows
+from practice_words.duration import WORD_GAP_UNITS, DurationIndex
+
+
+def scan_fill(units, chars, budget_units, rng):
+    """The obvious fill: filter the whole list for words that still fit, every draw."""
+    remaining = budget_units + WORD_GAP_UNITS
+    picks = []
+    while True:
+        fits = np.flatnonzero((chars == 5) & (units > 0) & (units + WORD_GAP_UNITS <= remaining))
+        if not fits.size:
+            return picks
+        pick = int(fits[rng.randrange(fits.size)])
+        picks.append(pick)
+        remaining -= int(units[pick]) + WORD_GAP_UNITS
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def measure(n_words, minutes, wpm):
+    """Sizes and timings of the index on n_words random words, filling `minutes` at wpm."""
+    rng = random.Random(1)
+    rows = [("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 12))), "")
+            for _ in range(n_words)]
+    words = CompiledWords(compile_rows(rows))
+    unit_s = seconds_per_unit(wpm)
+    budget_s = 60 * minutes
+
+    build_s, index = best_of(lambda: DurationIndex.from_compiled(words), 3)
+    subset_s, five = best_of(lambda: index.subset(chars=5), 3)
+    units_q, hits = best_of(lambda: index.by_seconds(1.0, 1.5, unit_s), 50)
+    chars_q, _ = best_of(lambda: index.by_chars(5), 50)
+    fill_s, plan = best_of(lambda: five.fill(budget_s, unit_s, random.Random(2)))
+    units, chars = words.units.astype(np.int64), words.char_counts()
+    scan_s, scan_plan = best_of(lambda: scan_fill(units, chars, int(budget_s / unit_s), random.Random(2)), 1)
+    return {
+        "words": len(index), "build_ms": build_s * 1e3, "subset_words": len(five), "subset_ms": subset_s * 1e3,
+        "by_seconds_hits": len(hits), "by_seconds_us": units_q * 1e6, "by_chars_us": chars_q * 1e6,
+        "fill_words": len(plan), "fill_s": five.seconds(plan, unit_s), "fill_ms": fill_s * 1e3,
+        "scan_words": len(scan_plan), "scan_s": index.seconds(scan_plan, unit_s), "scan_ms": scan_s * 1e3,
+    }
+
+
+def suite(repeat):
+    """For bench.suite: 200,000 words, filling 3 minutes at 18 WPM."""
+    return measure(200_000, 3.0, 18)
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--minutes", type=float, default=3.0)
+    parser.add_argument("--wpm", type=float, default=18)
+    args = parser.parse_args(argv)
+
+    r = measure(args.words, args.minutes, args.wpm)
+    print(f"{r['words']} words indexed in {r['build_ms']:.0f} ms (5-letter subset: {r['subset_words']} in "
+          f"{r['subset_ms']:.0f} ms)")
+    print(f"by_seconds(1.0-1.5 s): {r['by_seconds_hits']} words in {r['by_seconds_us']:.1f} us; "
+          f"by_chars(5): {r['by_chars_us']:.1f} us")
+    print(f"fill {60 * args.minutes:g} s @ {args.wpm:g} WPM: {r['fill_words']} words, "
+          f"{r['fill_s']:.2f} s of Morse, {r['fill_ms']:.2f} ms")
+    print(f"scan fill:                  {r['scan_words']} words, "
+          f"{r['scan_s']:.2f} s of Morse, {r['scan_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput of morse_utils.encode_to_morse / encode_many / encode_cached
+against the old per-word morse3 path, in characters per second. morse3
+is only needed for that baseline (pip install morse3); without it the
+baseline is skipped.
+
+    python -m bench.encode [--words 5000] [--repeat 5]
+"""
+import random
+import string
+import time
+
+from bench import bench_parser
+from morse_utils import ENCODE_CACHE, encode_cached, encode_many, encode_to_morse
+
+try:
+    import morse3
+except ImportError:  # the comparison is optional
+    morse3 = None
+
+
+def encode_with_morse3(s):
+    # The original morse_utils.encode_to_morse
+    words = [w for w in s.split() if w]
+    encoded_words = []
+    for w in words:
+        code = morse3.Morse(w).stringToMorse()
+        code = " ".join(code.split())
+        encoded_words.append(code)
+    return " / ".join(encoded_words)
+
+
+def make_words(n, seed=1234):
+    rng = random.Random(seed)
+    chars = string.ascii_letters + string.digits
+    return ["".join(rng.choice(chars) for _ in range(rng.randint(2, 10))) for _ in range(n)]
+
+
+def chars_per_sec(fn, items, repeat):
+    n_chars = sum(len(s) for s in items)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - t0)
+    return n_chars / best
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    words = make_words(args.words)
+    long_text = [" ".join(words)]
+    # Drill-like traffic: sentences drawn from a small vocabulary
+    rng = random.Random(1)
+    vocab = words[:200]
+    sentences = [" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 8))) for _ in range(args.words)]
+    cases = (
+        ("short (one word per call)", words),
+        ("long (one text)", long_text),
+        ("drill sentences (200-word vocabulary)", sentences),
+    )
+    paths = [
+        ("encode_to_morse", lambda items: [encode_to_morse(s) for s in items]),
+        ("encode_many", encode_many),
+        ("encode_cached", lambda items: [encode_cached(s) for s in items]),
+    ]
+    if morse3 is not None:
+        paths.insert(0, ("morse3", lambda items: [encode_with_morse3(s) for s in items]))
+        assert encode_many(words[:200]) == [encode_with_morse3(s) for s in words[:200]]
+    else:
+        print("morse3 not installed; skipping the baseline.")
+
+    for case_name, items in cases:
+        print(f"{case_name}: {sum(len(s) for s in items)} chars")
+        ENCODE_CACHE.clear()
+        for name, fn in paths:
+            print(f"  {name:<16} {chars_per_sec(fn, items, args.repeat):>14,.0f} chars/s")
+        print("  encode_cached: {hits} hits, {misses} misses, {evictions} evictions".format(**ENCODE_CACHE.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+live_output under a device clock: exactness and underruns.
+
+    python -m bench.live [--wpm 20 60 100] [--seconds 5] [--ring-ms 250] [--sdl]
+
+First checks on a manually ticked FakeDevice that a burst of messages
+comes out sample-identical to render_morse with nothing dropped. Then
+plays --seconds of groups per WPM against a real-time FakeDevice (or
+the SDL device with --sdl; use SDL_AUDIODRIVER=dummy headless), with
+--load threads burning CPU alongside, and reports the stream's stats.
+"""
+import random
+import threading
+import time
+
+import numpy as np
+
+from bench import bench_parser
+from live_output import DEVICE_PERIOD, FakeDevice, LiveOutput, SDLDevice
+from morse_render import SAMPLE_RATE, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def groups(rng, n):
+    return [" ".join("".join(rng.choice(CHARS) for _ in range(5)) for _ in range(3)) for _ in range(n)]
+
+
+def check_exact(wpm, messages):
+    unit_s = seconds_per_unit(wpm)
+    device = FakeDevice(record=True, realtime=False)
+    out = LiveOutput(device, ring_seconds=0.05).start()
+    morse = [encode_to_morse(m) for m in messages]
+    handles = [out.play_morse(m, unit_s) for m in morse]
+    while not handles[-1].done():
+        # A device that never outruns the producer: any difference from
+        # render_morse below is then the stream's fault, not scheduling
+        if out.ring.fill() >= device.period or handles[-1].end is not None:
+            device.tick()
+        else:
+            time.sleep(0.0005)
+    underruns = out.underruns
+    out.close()
+    expected = np.concatenate([render_morse(m, unit_s) for m in morse])
+    got = device.output()
+    # Idle periods (before the producer's first write) only add leading/trailing silence
+    first = int(np.flatnonzero(got)[0]) - int(np.flatnonzero(expected)[0])
+    return (underruns == 0 and np.array_equal(got[first:first + expected.size], expected)
+            and not got[first + expected.size:].any())
+
+
+def burn(stop):
+    x = 0
+    while not stop.is_set():
+        x += sum(range(1000))
+
+
+def stream(wpm, seconds, ring_s, period, rng, sdl=False):
+    """Two-letter messages back to back for `seconds`: (messages sent, the stream's stats)."""
+    unit_s = seconds_per_unit(wpm)
+    device = SDLDevice(SAMPLE_RATE, period) if sdl else FakeDevice(period=period)
+    out = LiveOutput(device, ring_seconds=ring_s).start()
+    t0 = time.monotonic()
+    sent = 0
+    while time.monotonic() - t0 < seconds:
+        handle = out.play_morse(encode_to_morse(rng.choice(CHARS) * 2), unit_s)
+        sent += 1
+        handle.wait()
+    stats = out.stats()
+    out.close()
+    return sent, stats
+
+
+def suite(repeat):
+    """For bench.suite: exactness at 20 and 60 WPM, then one second of 60 WPM on a real-time FakeDevice."""
+    rng = random.Random(1)
+    exact = {f"{wpm}wpm": check_exact(wpm, groups(rng, 3)) for wpm in (20, 60)}
+    _, stats = stream(60, 1.0, 0.25, DEVICE_PERIOD, rng)
+    return {"sample_exact": exact,
+            "60wpm_stream": {k: stats[k] for k in ("callbacks", "underruns", "overruns", "fill_min", "fill_p5")}}
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=float, nargs="+", default=[20, 60, 100])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--ring-ms", type=float, default=250)
+    parser.add_argument("--period", type=int, default=DEVICE_PERIOD)
+    parser.add_argument("--load", type=int, default=2, help="CPU-burning threads alongside")
+    parser.add_argument("--sdl", action="store_true", help="use the SDL device instead of FakeDevice")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(1)
+    for wpm in args.wpm:
+        print(f"{wpm:g} WPM sample-exact: {check_exact(wpm, groups(rng, 6))}")
+
+    if args.sdl:
+        import pygame._sdl2.audio  # noqa: F401  (importing under --load takes ages)
+    stop = threading.Event()
+    burners = [threading.Thread(target=burn, args=(stop,), daemon=True) for _ in range(args.load)]
+    for t in burners:
+        t.start()
+    print(f"\n{'wpm':>5} {'msgs':>5} {'callbacks':>9} {'underruns':>9} {'overruns':>8} "
+          f"{'fill min':>8} {'fill p5':>8} {'fill mean':>9}")
+    try:
+        for wpm in args.wpm:
+            sent, stats = stream(wpm, args.seconds, args.ring_ms / 1000.0, args.period, rng, args.sdl)
+            print(f"{wpm:>5g} {sent:>5d} {stats['callbacks']:>9d} {stats['underruns']:>9d} "
+                  f"{stats['overruns']:>8d} {stats['fill_min']:>8.2f} {stats['fill_p5']:>8.2f} "
+                  f"{stats['fill_mean']:>9.2f}")
+    finally:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
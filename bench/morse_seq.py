@@ -0,0 +1,85 @@
+"""
+Memory of an encoded word corpus as str, as MorseSeq and as MorseSeqList.
+
+    python -m bench.morse_seq [--words 1000000]
+
+Sizes are what tracemalloc sees allocated while each form is built (the
+list object included), so they cover the per-object overhead as well as
+the element data; build times are taken on a separate, untraced run.
+list[MorseSeq] is measured on --sample words and scaled up. Also checks
+that every form renders to the same audio.
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench import bench_parser
+from bench.encode import make_words
+from morse_render import morse_units, render_morse
+from morse_seq import MorseSeq, MorseSeqList
+from morse_utils import encode_many
+
+
+def measured(build):
+    gc.collect()
+    t0 = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def build_forms(n_words, n_sample):
+    """
+    The encoded corpus as list[str], list[MorseSeq] (the first n_sample
+    words) and MorseSeqList, and (form, bytes, build s) for each, with
+    list[MorseSeq] scaled up to n_words.
+    """
+    words = make_words(n_words)
+    strings, str_bytes, str_s = measured(lambda: encode_many(words))
+    sample = strings[:n_sample]
+    seqs, seq_bytes, seq_s = measured(lambda: [MorseSeq.from_str(m) for m in sample])
+    scale = n_words / float(len(sample))
+    packed, list_bytes, list_s = measured(lambda: MorseSeqList.from_strings(strings))
+    sizes = [("list[str]", str_bytes, str_s), ("list[MorseSeq]", seq_bytes * scale, seq_s * scale),
+             ("MorseSeqList", list_bytes, list_s)]
+    return strings, seqs, packed, sizes
+
+
+def suite(repeat):
+    """For bench.suite: bytes per word and build time of each form for 100,000 words."""
+    n_words = 100_000
+    _, _, _, sizes = build_forms(n_words, 20_000)
+    return {name: {"bytes_per_word": size / n_words, "build_s": elapsed} for name, size, elapsed in sizes}
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=100_000, help="words built as list[MorseSeq]")
+    args = parser.parse_args(argv)
+
+    strings, seqs, packed, sizes = build_forms(args.words, args.sample)
+    elements = sum(len(m) for m in strings)
+    print(f"{args.words} words, {elements} elements ({elements / args.words:.1f} per word)")
+    print(f"{'form':<14} {'MB':>8} {'bytes/word':>11} {'build s':>8}")
+    for name, size, elapsed in sizes:
+        print(f"{name:<14} {size / 1e6:>8.1f} {size / args.words:>11.1f} {elapsed:>8.2f}")
+
+    rng = random.Random(1)
+    for i in rng.sample(range(len(seqs)), 200):
+        m = strings[i]
+        assert str(packed[i]) == m and packed[i].units == morse_units(m) == seqs[i].units
+        assert np.array_equal(render_morse(packed[i], 0.06), render_morse(m, 0.06))
+    print("200 sampled entries: round trip, units and rendering match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Answer-to-audio gap of the console drills, with and without prefetch.
+
+    python -m bench.prefetch [--wpm 20 40] [--rounds 200] [--words list.csv]
+
+Drives drill_console.run_drill headless (null backend) with a scripted
+user who answers every round correctly after --think seconds, and times
+from the answer being read to the next drill's audio being handed to the
+backend. Groups always run; word drills too when --words is given.
+"""
+import contextlib
+import os
+import statistics
+import time
+
+import audio_backend
+import drill_console
+from bench import bench_parser
+from drill_engine import GroupDrill, WordDrill
+from drill_selector import DrillSelector
+from morse_atlas import get_atlas
+from morse_render import SAMPLE_RATE, seconds_per_unit
+
+
+class ScriptedUser:
+    """read() for run_console: answers right after `think` s, times the next play."""
+
+    def __init__(self, drill, rounds, think):
+        self.drill = drill
+        self.rounds = rounds
+        self.think = think
+        self.answered = None
+        self.gaps = []
+
+    def played(self, audio):
+        if self.answered is not None:
+            self.gaps.append(time.perf_counter() - self.answered)
+            self.answered = None
+
+    def read(self, prompt):
+        if len(self.gaps) >= self.rounds:
+            return "/quit"
+        time.sleep(self.think)
+        self.answered = time.perf_counter()
+        return self.drill.text
+
+
+def run(drill, unit_s, depth, rounds, think):
+    user = ScriptedUser(drill, rounds, think)
+    play_pcm = drill_console.play_pcm
+
+    def timed_play(audio):
+        user.played(audio)
+        play_pcm(audio)
+
+    drill_console.play_pcm = timed_play
+    try:
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+            drill_console.run_drill(drill, unit_s, user.read, prefetch_depth=depth)
+    finally:
+        drill_console.play_pcm = play_pcm
+    return sorted(g * 1e6 for g in user.gaps)
+
+
+def group_drill(chars=5):
+    return GroupDrill(DrillSelector("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"), chars)
+
+
+def percentiles(gaps):
+    return {"p50_us": statistics.median(gaps), "p95_us": gaps[int(0.95 * (len(gaps) - 1))], "max_us": gaps[-1]}
+
+
+def suite(repeat):
+    """For bench.suite: 20 * repeat rounds of groups at 20 WPM, without and with prefetch."""
+    unit_s = seconds_per_unit(20)
+    audio_backend.set_backend("null")
+    try:
+        get_atlas(unit_s, sample_rate=SAMPLE_RATE)
+        return {f"prefetch_{depth}": percentiles(run(group_drill(), unit_s, depth, 20 * repeat, 0.002))
+                for depth in (0, 2)}
+    finally:
+        audio_backend.close_backend()
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=float, nargs="+", default=[20, 40])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--think", type=float, default=0.002, help="seconds before each answer")
+    parser.add_argument("--chars", type=int, default=5)
+    parser.add_argument("--words", help="word list CSV for a word drill as well")
+    args = parser.parse_args(argv)
+
+    audio_backend.set_backend("null")
+    drills = [("groups", lambda: group_drill(args.chars))]
+    if args.words:
+        from practice_words.compiled import load_compiled
+        rows = load_compiled(args.words)
+        name = os.path.basename(args.words)
+        drills.append((name, lambda: WordDrill(DrillSelector(rows), name)))
+
+    print(f"{'drill':<12} {'wpm':>5} {'prefetch':>9} {'p50 us':>8} {'p95 us':>8} {'max us':>8}")
+    for wpm in args.wpm:
+        unit_s = seconds_per_unit(wpm)
+        get_atlas(unit_s, sample_rate=SAMPLE_RATE)        # both runs start with a warm atlas
+        for label, make in drills:
+            for depth in (0, 2):
+                p = percentiles(run(make(), unit_s, depth, args.rounds, args.think))
+                print(f"{label:<12} {wpm:>5g} {depth:>9d} {p['p50_us']:>8.1f} {p['p95_us']:>8.1f} {p['max_us']:>8.1f}")
+    audio_backend.close_backend()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Per-step cost of progressive word practice: re-rendering the whole prefix
+after every correct guess (the old way) against PrefixRender, which only
+renders the new character.
+
+    python -m bench.prefix [--lengths 4 8 16 32 64] [--wpm 20] [--repeat 20]
+
+For each word length the mean cost of the last step is reported; the
+incremental column should stay flat while the full re-render grows with
+the length of the prefix.
+"""
+import random
+import time
+
+import numpy as np
+
+from bench import bench_parser
+from morse_render import PrefixRender, render_morse, seconds_per_unit
+from practice_words.compiled import canonical_codes, prefix_morse
+
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def random_word(length, rng):
+    return "".join(rng.choice(LETTERS) for _ in range(length))
+
+
+def full_steps(word, unit_s):
+    # What mode.py used to do: encode and render the whole prefix each step
+    codes = canonical_codes(word)
+    times = []
+    for k in range(1, len(word) + 1):
+        t0 = time.perf_counter()
+        audio = render_morse(prefix_morse(codes, k), unit_s)
+        times.append(time.perf_counter() - t0)
+    return times, audio
+
+
+def incremental_steps(word, unit_s):
+    codes = canonical_codes(word).split(" ")
+    render = PrefixRender(unit_s)
+    times = []
+    for code in codes:
+        t0 = time.perf_counter()
+        audio = render.append(code)
+        times.append(time.perf_counter() - t0)
+    return times, audio
+
+
+def measure(length, unit_s, words, rng):
+    """Mean seconds of the last step and of the whole round, (full, incremental), over `words` random words."""
+    full_last, incr_last, full_total, incr_total = [], [], [], []
+    for _ in range(words):
+        word = random_word(length, rng)
+        ft, fa = full_steps(word, unit_s)
+        it, ia = incremental_steps(word, unit_s)
+        if not np.array_equal(fa, ia):
+            raise SystemExit(f"incremental render of {word!r} differs from the full render")
+        full_last.append(ft[-1])
+        incr_last.append(it[-1])
+        full_total.append(sum(ft))
+        incr_total.append(sum(it))
+    return np.mean(full_last), np.mean(incr_last), np.mean(full_total), np.mean(incr_total)
+
+
+def suite(repeat):
+    """For bench.suite: 8- and 32-character words at 20 WPM, 4 * repeat words each."""
+    unit_s = seconds_per_unit(20)
+    rng = random.Random(1)
+    render_morse("-", unit_s)
+    results = {}
+    for length in (8, 32):
+        full_last, incr_last, full_total, incr_total = measure(length, unit_s, 4 * repeat, rng)
+        results[f"{length}_chars"] = {"full_last_us": full_last * 1e6, "incr_last_us": incr_last * 1e6,
+                                      "full_round_ms": full_total * 1e3, "incr_round_ms": incr_total * 1e3}
+    return results
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[4, 8, 16, 32, 64, 128])
+    parser.add_argument("--wpm", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=20, help="words per length")
+    args = parser.parse_args(argv)
+
+    unit_s = seconds_per_unit(args.wpm)
+    rng = random.Random(1)
+    render_morse("-", unit_s)   # warm the tone cache for both methods
+
+    print(f"{'length':>6} {'full last step':>15} {'incr last step':>15} {'full round':>11} {'incr round':>11}")
+    for length in args.lengths:
+        full_last, incr_last, full_total, incr_total = measure(length, unit_s, args.repeat, rng)
+        print(f"{length:>6} {full_last * 1e6:>12.0f} us {incr_last * 1e6:>12.0f} us "
+              f"{full_total * 1e3:>8.2f} ms {incr_total * 1e3:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the whole-message renderer (audio_pygame.play_morse) with the old
+per-symbol loop (audio_pygame.play_morse_per_symbol).
+
+Reports wall-clock timing error against each player's ideal duration and
+the CPU time spent while playing. Runs headless with SDL's dummy audio
+driver unless SDL_AUDIODRIVER is already set:
+
+    python -m bench.render [--wpm 20 35 50] [--text "PARIS PARIS"]
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import audio_pygame
+from bench import bench_parser
+from morse_render import SAMPLE_RATE, morse_timing, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+
+def per_symbol_ideal(morse_text, unit_s):
+    # What play_morse_per_symbol would take with perfect sleeps and tones
+    units = 0.0
+    for ch in morse_text:
+        if ch == '.':
+            units += audio_pygame.UNIT_DOT_MULT + audio_pygame.UNIT_GAP_INTRA
+        elif ch == '-':
+            units += audio_pygame.UNIT_DASH_MULT + audio_pygame.UNIT_GAP_INTRA
+        elif ch == ' ':
+            units += max(0.0, audio_pygame.UNIT_GAP_INTER - audio_pygame.UNIT_GAP_INTRA)
+        elif ch == '/':
+            units += max(0.0, audio_pygame.UNIT_GAP_WORD - audio_pygame.UNIT_GAP_INTRA)
+    return units * unit_s
+
+
+def whole_message_ideal(morse_text, unit_s):
+    return morse_timing(morse_text)[2] * unit_s
+
+
+def measure(player, morse_text, unit_s, ideal_s):
+    wall0 = time.perf_counter()
+    cpu0 = time.process_time()
+    player(morse_text, unit_s)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    return {
+        "ideal_s": ideal_s,
+        "wall_s": wall,
+        "error_ms": (wall - ideal_s) * 1000.0,
+        "cpu_s": cpu,
+    }
+
+
+def render_only(morse_text, unit_s, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        render_morse(morse_text, unit_s)
+    return (time.perf_counter() - t0) / repeat
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=int, nargs="+", default=[20, 35, 50])
+    parser.add_argument("--text", default="PARIS PARIS")
+    args = parser.parse_args(argv)
+
+    pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1, buffer=512)
+    try:
+        morse = encode_to_morse(args.text)
+        print(f"Text: {args.text!r}  Morse: {morse}")
+        print(f"{'wpm':>4} {'player':<12} {'ideal s':>8} {'wall s':>8} {'error ms':>9} {'cpu s':>7}")
+        for wpm in args.wpm:
+            unit_s = seconds_per_unit(wpm)
+            rows = (
+                ("per-symbol", audio_pygame.play_morse_per_symbol, per_symbol_ideal(morse, unit_s)),
+                ("whole-msg", audio_pygame.play_morse, whole_message_ideal(morse, unit_s)),
+            )
+            for name, player, ideal in rows:
+                r = measure(player, morse, unit_s, ideal)
+                print(f"{wpm:>4} {name:<12} {r['ideal_s']:>8.3f} {r['wall_s']:>8.3f} "
+                      f"{r['error_ms']:>9.1f} {r['cpu_s']:>7.3f}")
+            print(f"{wpm:>4} {'render only':<12} {render_only(morse, unit_s) * 1000.0:>8.2f} ms per message")
+    finally:
+        pygame.mixer.quit()
+
+
+if __name__ == "__main__":
+    main()
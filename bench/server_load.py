@@ -0,0 +1,185 @@
+"""
+Load test for practice_server: hundreds of simulated students at once.
+
+    python -m bench.server_load [--clients 300] [--rounds 20] [--audio timing pcm]
+                                [--mode groups] [--words list.csv] [--cpu 0]
+
+The server runs in its own process on a temporary Unix socket (pinned to
+one core with --cpu). Every client opens a session and plays through
+--rounds drills: timing clients key the tones back into Morse, decode it
+and answer (with --error-rate of the answers made wrong on purpose); pcm
+clients check the audio's length and reveal with /n. "latency" is from a
+client sending a line to it receiving the next prompt; "server cpu" is
+the server process's user + system time for the whole run. The clients
+all run in this one process, so with many of them (and with pcm, whose
+payloads they base64-decode) latency is mostly client-side queueing;
+cpu/round is the figure for the server itself.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench import bench_parser
+from morse_utils import decode_morse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tones_to_morse(tones, unit_s):
+    """Morse for [[start_s, length_s], ...], splitting on the gaps between tones."""
+    out = []
+    end = None
+    for start, length in tones:
+        if end is not None:
+            gap = (start - end) / unit_s
+            if gap > 5:
+                out.append(" / ")
+            elif gap > 2:
+                out.append(" ")
+        out.append("-" if length / unit_s > 2 else ".")
+        end = start + length
+    return "".join(out)
+
+
+class Client:
+    def __init__(self, path, hello, rounds, error_rate, think_s, rng):
+        self.path = path
+        self.hello = hello
+        self.rounds = rounds
+        self.error_rate = error_rate
+        self.think_s = think_s
+        self.rng = rng
+        self.latencies = []
+        self.correct = 0
+
+    async def run(self):
+        reader, writer = await asyncio.open_unix_connection(self.path, limit=1 << 24)
+        writer.write(json.dumps(self.hello).encode() + b"\n")
+        answer = None
+        sent = None
+        done = 0
+        while True:
+            event = json.loads(await reader.readline())
+            kind = event["event"]
+            if kind == "error":
+                raise RuntimeError(event["text"])
+            if kind == "end":
+                break
+            if kind == "play":
+                if "tones" in event:
+                    answer = decode_morse(tones_to_morse(event["tones"], event["unit_s"]))
+                else:
+                    n = len(base64.b64decode(event["pcm"])) // 2
+                    if abs(n / event["sample_rate"] - event["duration_s"]) > 1.0:
+                        raise RuntimeError("pcm length does not match duration_s")
+                    answer = None
+            elif kind == "say" and event["text"].startswith("Correct!"):
+                self.correct += 1
+            elif kind == "prompt":
+                if sent is not None:
+                    self.latencies.append(time.perf_counter() - sent)
+                if done >= self.rounds:
+                    line = "/quit"
+                elif answer is None:
+                    line = "/n"
+                    done += 1
+                elif self.rng.random() < self.error_rate:
+                    line = "/n"       # a miss: reveal and move on
+                    done += 1
+                else:
+                    line = answer
+                    done += 1
+                answer = None
+                if self.think_s:
+                    await asyncio.sleep(self.rng.uniform(0, 2 * self.think_s))
+                sent = time.perf_counter()
+                writer.write(line.encode() + b"\n")
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_clients(path, args, audio):
+    rng = random.Random(1)
+    hello = {"mode": args.mode, "wpm": args.wpm, "audio": audio, "chars": args.chars}
+    if args.mode == "words":
+        hello["list"] = os.path.splitext(os.path.basename(args.words))[0]
+    clients = [Client(path, hello, args.rounds, args.error_rate, args.think, random.Random(rng.random()))
+               for _ in range(args.clients)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(c.run() for c in clients))
+    return clients, time.perf_counter() - t0
+
+
+def start_server(path, words, cpu):
+    cmd = [sys.executable, os.path.join(ROOT, "practice_server.py"), "--unix", path]
+    if words:
+        cmd += ["--words", words]
+    preexec = None
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        preexec = lambda: os.sched_setaffinity(0, {cpu})
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.Popen(cmd, preexec_fn=preexec, env=env, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError(f"server did not start: {proc.stderr.read().decode()}")
+        time.sleep(0.02)
+    return proc
+
+
+def stop_server(proc):
+    """Stop the server; returns its CPU seconds (user + system)."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    proc.send_signal(signal.SIGINT)
+    proc.wait(timeout=30)
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=20, help="drills per client")
+    parser.add_argument("--audio", nargs="+", default=["timing", "pcm"], choices=["timing", "pcm"])
+    parser.add_argument("--mode", default="groups", choices=["groups", "words"])
+    parser.add_argument("--words", help="word list CSV (for --mode words)")
+    parser.add_argument("--chars", type=int, default=5)
+    parser.add_argument("--wpm", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--think", type=float, default=0.05, help="mean client think time, seconds")
+    parser.add_argument("--cpu", type=int, default=None, help="pin the server to this core")
+    args = parser.parse_args(argv)
+    if args.mode == "words" and not args.words:
+        parser.error("--mode words needs --words")
+
+    print(f"{args.clients} clients x {args.rounds} rounds, mode {args.mode}, {args.wpm} WPM")
+    print(f"{'audio':<7} {'wall s':>7} {'rounds/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} "
+          f"{'cpu s':>6} {'cpu/round us':>13} {'correct':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for audio in args.audio:
+            path = os.path.join(tmp, f"server-{audio}.sock")
+            proc = start_server(path, args.words, args.cpu)
+            try:
+                clients, wall = asyncio.run(run_clients(path, args, audio))
+            finally:
+                cpu = stop_server(proc)
+            lat = np.array([x for c in clients for x in c.latencies]) * 1e3
+            rounds = args.clients * args.rounds
+            correct = sum(c.correct for c in clients)
+            print(f"{audio:<7} {wall:>7.2f} {rounds / wall:>9.0f} {np.percentile(lat, 50):>7.2f} "
+                  f"{np.percentile(lat, 99):>7.2f} {lat.max():>7.2f} {cpu:>6.2f} "
+                  f"{cpu / rounds * 1e6:>13.0f} {correct:>8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Time from launching main.py to its first text prompt.
+
+    python -m bench.startup [--backend null pygame] [--runs 10] [--script main.py]
+
+Each run starts a fresh interpreter, waits for the prompt on stdout and
+then sends /quit. Runs headless with SDL's dummy drivers.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from bench import bench_parser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"Enter text"
+
+
+def time_to_prompt(script, backend, timeout=30.0):
+    env = dict(os.environ, SDL_AUDIODRIVER="dummy", SDL_VIDEODRIVER="dummy",
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, script, "--backend", backend],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            env=env, cwd=ROOT)
+    seen = b""
+    try:
+        while PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"{script} exited before prompting: {seen[-200:]!r}")
+            seen += chunk
+            if time.perf_counter() - t0 > timeout:
+                raise RuntimeError(f"no prompt after {timeout} s")
+        elapsed = time.perf_counter() - t0
+        proc.communicate(b"/quit\n", timeout=timeout)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+    return elapsed
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--backend", nargs="+", default=["null", "pygame"])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--script", default=os.path.join(ROOT, "main.py"))
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<10} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+    for backend in args.backend:
+        times = [time_to_prompt(args.script, backend) * 1e3 for _ in range(args.runs)]
+        print(f"{backend:<10} {min(times):>8.0f} {statistics.median(times):>10.0f} {max(times):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
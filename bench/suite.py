@@ -0,0 +1,297 @@
+"""
+Headless benchmark suite with JSON output, for tracking regressions.
+
+    python -m bench [--out results.json] [--quick] [--only encode render ...]
+
+Benchmarks:
+    encode    encode_to_morse throughput on short (one word) and long inputs
+    tone      make_tone_buffer cost per tone for each backend (uncached synth
+              and cache hit); backends that cannot be imported are skipped
+    render    full-message render time (render_morse and the glyph atlas)
+    timing    play_morse against ideal PARIS timing: audio length through the
+              null sink, the old per-symbol player on a fake clock, and the
+              real-clock overshoot of Playback.wait
+
+and, scaled down to a few seconds each, the suite() of the standalone
+benchmarks (python -m bench.<name> runs the full version):
+    decode    round trips through morse_decode and its speed
+    prefix    progressive-mode prefix renders, full against incremental
+    synth     tone synthesis time and temporary memory per implementation
+    prefetch  answer-to-audio gap of the console drills, with and without prefetch
+    band      band_sim cost per block for each set of conditions
+    live      live_output exactness and a real-time stream's underruns
+    window    CPU of the practice window's event loop (pygame, dummy video)
+    morse_seq memory and build time of the encoded-corpus forms
+    duration  DurationIndex build, queries and fills
+
+bench.startup and bench.server_load are left out: they time fresh
+interpreters and a server process over a socket, so their figures follow
+the machine's process start-up and scheduler more than this code, and
+they take minutes rather than seconds.
+
+Results go to --out as JSON (default: stdout) together with the machine,
+Python and numpy versions and the git commit, and a readable summary is
+printed to stderr.
+"""
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+from bench import best_of, bench_parser
+from bench.encode import make_words
+from morse_render import SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, morse_timing, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+PARIS_UNITS = 50          # "PARIS " including the word gap: the standard word
+WPMS = (15, 20, 30)
+
+
+def machine_info():
+    info = {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+    }
+    try:
+        import pygame
+        info["pygame"] = pygame.version.ver
+    except ImportError:
+        info["pygame"] = None
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["git_commit"] = None
+    return info
+
+
+def bench_encode(repeat):
+    words = make_words(2000)
+    long_text = " ".join(words)
+    short_chars = sum(len(w) for w in words)
+    short_s = best_of(lambda: [encode_to_morse(w) for w in words], repeat)
+    long_s = best_of(lambda: encode_to_morse(long_text), repeat)
+    return {
+        "short": {"calls": len(words), "chars": short_chars,
+                  "us_per_call": short_s / len(words) * 1e6, "chars_per_s": short_chars / short_s},
+        "long": {"chars": len(long_text), "ms_per_call": long_s * 1e3, "chars_per_s": len(long_text) / long_s},
+    }
+
+
+def _tone_backends():
+    """(name, synth, make_tone_buffer) per backend; an import error string if unavailable."""
+    import morse_render
+    backends = {"pcm": (morse_render._synth_tone_samples, morse_render.tone_samples)}
+    try:
+        import pygame
+        pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1, buffer=512)
+        import audio_pygame
+        backends["pygame"] = (audio_pygame._synth_tone_buffer, audio_pygame.make_tone_buffer)
+    except Exception as e:
+        backends["pygame"] = f"{type(e).__name__}: {e}"
+    for module in ("audio_simpleaudio", "simpleaudio2"):
+        try:
+            mod = __import__(module)
+            backends[module] = (mod._synth_tone_buffer, mod.make_tone_buffer)
+        except Exception as e:
+            backends[module] = f"{type(e).__name__}: {e}"
+    return backends
+
+
+def bench_tone(repeat):
+    results = {}
+    for name, fns in _tone_backends().items():
+        if isinstance(fns, str):
+            results[name] = {"skipped": fns}
+            continue
+        synth, make = fns
+        entry = {}
+        for wpm in WPMS:
+            unit_s = seconds_per_unit(wpm)
+            for element, dur in (("dit", unit_s), ("dah", 3 * unit_s)):
+                uncached = best_of(lambda: synth(TONE_FREQ_HZ, dur, VOLUME, SAMPLE_RATE), repeat, 5)
+                make(TONE_FREQ_HZ, dur, VOLUME, SAMPLE_RATE)
+                hit = best_of(lambda: make(TONE_FREQ_HZ, dur, VOLUME, SAMPLE_RATE), repeat, 200)
+                entry[f"{wpm}wpm_{element}"] = {"synth_us": uncached * 1e6, "cached_us": hit * 1e6}
+        results[name] = entry
+    return results
+
+
+def bench_render(repeat):
+    from morse_atlas import GlyphAtlas
+    results = {}
+    for label, text in (("paris", "PARIS"), ("group5", "K7QZM"),
+                        ("sentence", "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789"),
+                        ("paris_x50", " ".join(["PARIS"] * 50))):
+        morse = encode_to_morse(text)
+        entry = {}
+        for wpm in WPMS:
+            unit_s = seconds_per_unit(wpm)
+            render_morse(morse, unit_s)
+            atlas = GlyphAtlas(unit_s)
+            render_s = best_of(lambda: render_morse(morse, unit_s), repeat, 10)
+            atlas_s = best_of(lambda: atlas.render(text), repeat, 10)
+            audio_s = morse_timing(morse)[2] * unit_s
+            entry[f"{wpm}wpm"] = {"render_us": render_s * 1e6, "atlas_us": atlas_s * 1e6,
+                                  "audio_s": audio_s, "x_realtime": audio_s / render_s}
+        results[label] = entry
+    return results
+
+
+class FakeTime:
+    """Stand-in for the time module: sleep() only advances a virtual clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def perf_counter(self):
+        return self.now
+
+    monotonic = perf_counter
+
+
+def per_symbol_fake_clock(morse, unit_s):
+    """Virtual duration of audio_pygame.play_morse_per_symbol: tones and sleeps take exactly as long as asked."""
+    import audio_pygame
+    clock = FakeTime()
+    saved = audio_pygame.time, audio_pygame.play_tone
+    audio_pygame.time = clock
+    audio_pygame.play_tone = clock.sleep
+    try:
+        audio_pygame.play_morse_per_symbol(morse, unit_s)
+    finally:
+        audio_pygame.time, audio_pygame.play_tone = saved
+    return clock.now
+
+
+def bench_timing(repeat):
+    import audio_backend
+    results = {}
+    n_paris = 10
+    morse = encode_to_morse(" ".join(["PARIS"] * n_paris))
+    backend = audio_backend.set_backend("null")
+    try:
+        for wpm in WPMS:
+            unit_s = seconds_per_unit(wpm)
+            # n words back to back: the last word gap is replaced by the
+            # final intra-character gap (7 units -> 1)
+            ideal_s = (n_paris * PARIS_UNITS - 6) * unit_s
+            before = backend.samples_played
+            audio_backend.play_morse(morse, unit_s)
+            sink_s = (backend.samples_played - before) / float(backend.sample_rate)
+            fake_s = per_symbol_fake_clock(morse, unit_s)
+            results[f"{wpm}wpm"] = {
+                "ideal_s": ideal_s,
+                "null_sink_error_ms": (sink_s - ideal_s) * 1e3,
+                "per_symbol_fake_clock_error_ms": (fake_s - ideal_s) * 1e3,
+            }
+    finally:
+        audio_backend.close_backend()
+
+    # Real clock: how late Playback.wait returns after the nominal end
+    overshoot = []
+    for _ in range(max(repeat, 5)):
+        for duration in (0.01, 0.05, 0.1):
+            handle = audio_backend.Playback(duration)
+            handle.wait()
+            overshoot.append(time.monotonic() - handle._end)
+    overshoot = np.array(overshoot) * 1e3
+    results["wait_overshoot_ms"] = {"p50": float(np.percentile(overshoot, 50)),
+                                    "p95": float(np.percentile(overshoot, 95)),
+                                    "max": float(overshoot.max())}
+    return results
+
+
+def module_suite(name):
+    """bench.<name>.suite, imported only when it runs (some pull in pygame)."""
+    def bench(repeat):
+        return importlib.import_module(f"bench.{name}").suite(repeat)
+    return bench
+
+
+BENCHMARKS = {
+    "encode": bench_encode,
+    "tone": bench_tone,
+    "render": bench_render,
+    "timing": bench_timing,
+    "decode": module_suite("decode"),
+    "prefix": module_suite("prefix"),
+    "synth": module_suite("synth"),
+    "prefetch": module_suite("prefetch"),
+    "band": module_suite("band"),
+    "live": module_suite("live"),
+    "window": module_suite("window"),
+    "morse_seq": module_suite("morse_seq"),
+    "duration": module_suite("duration"),
+}
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    else:
+        out.append((prefix, value))
+
+
+def format_summary(results):
+    rows = []
+    _flatten("", results, rows)
+    width = max(len(k) for k, _ in rows)
+    lines = []
+    for key, value in rows:
+        shown = f"{value:,.3f}" if isinstance(value, float) else str(value)
+        lines.append(f"{key:<{width}}  {shown}")
+    return "\n".join(lines)
+
+
+def run(names=None, repeat=5):
+    results = {}
+    for name in names or BENCHMARKS:
+        t0 = time.perf_counter()
+        results[name] = BENCHMARKS[name](repeat)
+        print(f"[bench] {name} done in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--out", default="-", help="JSON output file, or - for stdout (default)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run only these")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is kept)")
+    parser.add_argument("--quick", action="store_true", help="same as --repeat 2")
+    args = parser.parse_args(argv)
+
+    report = run(args.only, 2 if args.quick else args.repeat)
+    print(format_summary(report["results"]), file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"[bench] results written to {args.out}", file=sys.stderr)
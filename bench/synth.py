@@ -0,0 +1,104 @@
+"""
+Tone synthesis: the float32 tone_synth kernel against the old float64 code.
+
+    python -m bench.synth [--wpm 15 20 30] [--repeat 200]
+
+For a dit and a dah at each speed: time per tone, and with tracemalloc
+the temporary memory a tone needs beyond the finished int16 samples (peak
+during the call minus the output's size), in KB and as a multiple of the
+output size; each float64 temporary of the old code is 4x.
+"legacy" is the float64 sine + linear fade that every backend used,
+including the .tobytes() copy made to hand it to pygame/simpleaudio;
+"kernel" is synth_tone() as the backends now call it; "into" writes into
+a caller-owned buffer with a reused ToneSynth.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from bench import bench_parser
+from morse_render import SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, seconds_per_unit
+from tone_synth import ToneSynth, synth_tone
+
+
+def legacy_tone(freq_hz, duration_sec, volume, sample_rate):
+    """The pre-kernel make_tone_buffer body, up to the bytes given to the backend."""
+    n_samples = max(1, int(duration_sec * sample_rate))
+    t = np.arange(n_samples) / sample_rate
+    wave = np.sin(2 * np.pi * freq_hz * t)
+    fade_len = int(0.005 * sample_rate)
+    envelope = np.ones(n_samples)
+    if fade_len * 2 < n_samples:
+        envelope[:fade_len] = np.linspace(0, 1, fade_len)
+        envelope[-fade_len:] = np.linspace(1, 0, fade_len)
+    wave *= envelope
+    audio = (wave * (32767 * max(0.0, min(1.0, volume)))).astype(np.int16)
+    return audio.tobytes()
+
+
+def per_call_us(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def extra_bytes(fn, out_bytes):
+    """Peak bytes traced during one call of fn, beyond out_bytes."""
+    fn()                                  # warm caches and scratch space
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - out_bytes)
+
+
+def measure(dur, synth, repeat):
+    """Samples in a tone of dur seconds, and (impl, us per tone, extra bytes) for each implementation."""
+    n = max(1, int(dur * SAMPLE_RATE))
+    out = np.empty(n, dtype=np.int16)
+    impls = (
+        ("legacy", lambda: legacy_tone(TONE_FREQ_HZ, dur, VOLUME, SAMPLE_RATE)),
+        ("kernel", lambda: synth_tone(TONE_FREQ_HZ, dur, VOLUME, SAMPLE_RATE)),
+        ("into", lambda: synth.tone(n, TONE_FREQ_HZ, VOLUME, out)),
+    )
+    return n, [(name, per_call_us(fn, repeat), extra_bytes(fn, 0 if name == "into" else 2 * n))
+               for name, fn in impls]
+
+
+def suite(repeat):
+    """For bench.suite: a dit and a dah at 20 WPM, 40 * repeat calls each."""
+    synth = ToneSynth(SAMPLE_RATE)
+    unit_s = seconds_per_unit(20)
+    results = {}
+    for element, dur in (("dit", unit_s), ("dah", 3 * unit_s)):
+        _, rows = measure(dur, synth, 40 * repeat)
+        results[f"20wpm_{element}"] = {name: {"us": us, "extra_kb": extra / 1e3} for name, us, extra in rows}
+    return results
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--wpm", type=float, nargs="+", default=[15, 20, 30])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    synth = ToneSynth(SAMPLE_RATE)
+    print(f"{'tone':<12} {'samples':>8}  {'impl':<7} {'us/tone':>8} {'extra KB':>9} {'x out':>6}")
+    for wpm in args.wpm:
+        unit_s = seconds_per_unit(wpm)
+        for element, dur in (("dit", unit_s), ("dah", 3 * unit_s)):
+            n, rows = measure(dur, synth, args.repeat)
+            for name, us, extra in rows:
+                print(f"{f'{wpm:g}wpm {element}':<12} {n:>8}  {name:<7} {us:>8.1f} "
+                      f"{extra / 1e3:>9.1f} {extra / (2 * n):>6.1f}")
+    print(f"(ToneSynth scratch grew {synth.grows} times)")
+
+
+if __name__ == "__main__":
+    main()
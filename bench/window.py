@@ -0,0 +1,119 @@
+"""
+CPU cost of the pygame practice window, idle and while typing.
+
+    SDL_VIDEODRIVER=dummy python -m bench.window [--idle 3] [--rounds 3]
+
+Runs practice._run with the null audio backend while a thread posts
+keystrokes: each round sits idle for --idle seconds, types a wrong answer
+a key at a time, submits it and moves on with F2. For comparison the old
+loop (refill, re-render both lines and flip every frame at 60 FPS) is
+timed over the same idle span, and so is a bare event.wait loop: SDL's
+dummy driver polls inside event.wait, so headless that is the floor.
+"""
+import contextlib
+import os
+import string
+import threading
+import time
+
+import pygame
+
+import audio_backend
+import practice
+from bench import bench_parser
+from drill_selector import DrillSelector
+
+
+def key(k, unicode=""):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=k, unicode=unicode, mod=0, scancode=0))
+
+
+def script(rounds, idle, typing_gap):
+    time.sleep(0.5)            # let the window come up
+    for _ in range(rounds):
+        time.sleep(idle)
+        for char in "QQQQQ":
+            key(ord(char.lower()), char.lower())
+            time.sleep(typing_gap)
+        key(pygame.K_RETURN)
+        time.sleep(typing_gap)
+        key(pygame.K_F2)
+    time.sleep(idle)
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+def legacy_idle(seconds):
+    """The old loop's cost with nothing happening: (frames, CPU seconds)."""
+    screen = pygame.display.set_mode(practice.WINDOW_SIZE)
+    font = pygame.font.Font(None, 36)
+    clock = pygame.time.Clock()
+    frames = 0
+    cpu0 = time.process_time()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        screen.fill(practice.BACKGROUND)
+        screen.blit(font.render("Type answer (5 chars): ", True, practice.PROMPT_COLOR), practice.PROMPT_POS)
+        screen.blit(font.render("Incorrect. The answer was: ABCDE", True, practice.FEEDBACK_COLOR),
+                    practice.FEEDBACK_POS)
+        pygame.display.flip()
+        pygame.event.get()
+        clock.tick(60)
+        frames += 1
+    return frames, time.process_time() - cpu0
+
+
+def wait_floor(seconds):
+    """CPU of an empty event.wait loop: what the video driver itself costs idle."""
+    cpu0 = time.process_time()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pygame.event.wait(practice.WAIT_TIMEOUT_MS)
+    return time.process_time() - cpu0
+
+
+def measure(idle, rounds, typing_gap):
+    """practice._run's stats for the scripted session, and the legacy loop's and event.wait's over its idle time."""
+    audio_backend.set_backend("null")
+    try:
+        selector = DrillSelector(string.ascii_uppercase + string.digits)
+        poster = threading.Thread(target=script, args=(rounds, idle, typing_gap), daemon=True)
+        poster.start()
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+            stats = practice._run(0.06, 5, selector)
+        poster.join()
+
+        idle_s = idle * (rounds + 1)
+        legacy_frames, legacy_cpu = legacy_idle(idle_s)
+        floor_cpu = wait_floor(idle_s)
+    finally:
+        audio_backend.close_backend()
+        pygame.quit()
+    return stats, idle_s, legacy_frames, legacy_cpu, floor_cpu
+
+
+def suite(repeat):
+    """For bench.suite: one round with a second of idle, as CPU % of wall time per loop."""
+    stats, idle_s, _, legacy_cpu, floor_cpu = measure(1.0, 1, 0.05)
+    return {"event_cpu_pct": 100 * stats["cpu_s"] / stats["wall_s"], "event_wakeups": stats["wakeups"],
+            "legacy_idle_cpu_pct": 100 * legacy_cpu / idle_s, "wait_floor_cpu_pct": 100 * floor_cpu / idle_s}
+
+
+def main(argv=None):
+    parser = bench_parser(__doc__)
+    parser.add_argument("--idle", type=float, default=3.0, help="idle seconds per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--typing-gap", type=float, default=0.15, help="seconds between keys")
+    args = parser.parse_args(argv)
+
+    stats, idle_s, legacy_frames, legacy_cpu, floor_cpu = measure(args.idle, args.rounds, args.typing_gap)
+    print(f"{'loop':<8} {'wall s':>7} {'frames':>7} {'wakeups':>8} {'CPU s':>7} {'CPU %':>6}")
+    print(f"{'event':<8} {stats['wall_s']:>7.2f} {stats['frames']:>7d} {stats['wakeups']:>8d} "
+          f"{stats['cpu_s']:>7.3f} {100 * stats['cpu_s'] / stats['wall_s']:>6.2f}")
+    print(f"{'legacy':<8} {idle_s:>7.2f} {legacy_frames:>7d} {legacy_frames:>8d} "
+          f"{legacy_cpu:>7.3f} {100 * legacy_cpu / idle_s:>6.2f}   (idle only)")
+    print(f"{'wait':<8} {idle_s:>7.2f} {0:>7d} {'':>8} {floor_cpu:>7.3f} {100 * floor_cpu / idle_s:>6.2f}"
+          f"   (bare event.wait: the driver's own idle cost)")
+
+
+if __name__ == "__main__":
+    main()
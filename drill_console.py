@@ -0,0 +1,52 @@
+"""
+Console front end for drill_engine sessions: plays "play" events on the
+current audio backend, prints "say" events and reads answers with input().
+"""
+from audio_backend import get_backend, play_pcm, render_text
+from drill_engine import DrillSession
+from drill_prefetch import PREFETCH_DEPTH, Prefetcher
+from morse_render import evict_stale_tones
+
+
+def run_console(session, read=input, prefetch=None):
+    """
+    Run session until it ends (/quit or its round limit). With a
+    Prefetcher the audio it rendered ahead is played instead of
+    rendering it here.
+    """
+    events = session.start()
+    while True:
+        ask = None
+        for event in events:
+            kind = event["event"]
+            if kind == "play":
+                audio = prefetch.audio(event["text"], event["unit_s"]) if prefetch else None
+                if audio is None:
+                    audio = render_text(event["text"], event["unit_s"])
+                play_pcm(audio)
+            elif kind == "say":
+                print(event["text"])
+            elif kind == "prompt":
+                ask = event["text"]
+            elif kind == "speed":
+                evict_stale_tones(event["unit_s"])
+                if prefetch:
+                    prefetch.set_speed(event["unit_s"])
+            elif kind == "end":
+                return
+        events = session.handle(read(ask or ""))
+
+
+def run_drill(drill, unit_s, read=input, prefetch_depth=PREFETCH_DEPTH):
+    """
+    Run drill on the console, drawing and rendering prefetch_depth rounds
+    ahead (0: off; always off for drills that cannot be drawn ahead).
+    """
+    if not prefetch_depth or not drill.can_draw_ahead:
+        return run_console(DrillSession(drill, unit_s), read)
+    get_backend()        # open the backend here, not on the prefetch thread
+    prefetch = Prefetcher(drill.draw, render_text, unit_s, prefetch_depth)
+    try:
+        run_console(DrillSession(drill, unit_s, draw=prefetch), read, prefetch)
+    finally:
+        prefetch.close()
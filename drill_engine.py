@@ -0,0 +1,232 @@
+"""
+Drill logic of the console practice modes, without any I/O.
+
+A DrillSession is fed one line of user input at a time and answers with
+a list of events (plain dicts, so they can be sent as JSON):
+
+    {"event": "play", "text": "K7QZM", "unit_s": 0.06, "duration_s": 3.9}
+    {"event": "say", "text": "Correct!"}
+    {"event": "prompt", "text": "Your answer (5 chars): "}
+    {"event": "speed", "wpm": 25, "unit_s": 0.048}
+    {"event": "end"}
+
+What to drill comes from a GroupDrill (random character groups, as in
+practice1) or a WordDrill (words from a practice_words list, as in
+practice_words.mode1). A drill's draw() returns the next item, a tuple
+starting with the text to play, without changing any state; load(item)
+makes it the current one. Drills whose can_draw_ahead is true may have
+several items drawn before the first is loaded (see drill_prefetch).
+The console modes play and print these events (drill_console.run_console);
+practice_server sends them to network clients.
+"""
+import time
+
+from morse_render import morse_units, seconds_per_unit
+from morse_utils import encode_cached
+
+EXIT_COMMAND = "/quit"
+
+
+def play(text, unit_s):
+    return {"event": "play", "text": text, "unit_s": unit_s,
+            "duration_s": morse_units(encode_cached(text)) * unit_s}
+
+
+def say(text=""):
+    return {"event": "say", "text": text}
+
+
+def prompt(text):
+    return {"event": "prompt", "text": text}
+
+
+class GroupDrill:
+    """Groups of num_chars characters drawn from a DrillSelector (practice1)."""
+
+    title = "practice mode"
+    empty_replays = False
+    can_draw_ahead = True
+
+    def __init__(self, selector, num_chars=5, limit=None):
+        self.selector = selector
+        self.num_chars = num_chars
+        self.limit = limit
+        self.prompt = f"Your answer ({num_chars} chars): "
+        self.picks = []
+        self.text = ""
+
+    def intro(self):
+        return [say(f"\nPractice Mode: Type back the {self.num_chars} characters you hear in Morse."),
+                say("Type /r to repeat, /n for next (shows answer), /s <wpm> to change speed, "
+                    "or /quit to exit.\n")]
+
+    def draw(self):
+        # Weighted towards characters that were missed or answered slowly
+        picks = [self.selector.pick() for _ in range(self.num_chars)]
+        return "".join(self.selector.items[i] for i in picks), picks
+
+    def load(self, item):
+        self.text, self.picks = item
+
+    def normalize(self, line):
+        return line.strip().upper()
+
+    def record(self, answer, response_s):
+        self.selector.record_sequence(self.picks, self.text, answer, response_s)
+
+    def reveal(self):
+        return [say(f"Morse code: {encode_cached(self.text)}"), say(f"Characters: {self.text}")]
+
+    def check(self, answer):
+        """(correct, events, round over)"""
+        if answer == self.text:
+            return True, [say("Correct!\n")], True
+        return False, [say("Incorrect. Try again or type /r to repeat, /n for next, "
+                           "/s <wpm> to change speed.")], False
+
+
+class WordDrill:
+    """
+    Words from a practice_words list (e.g. CompiledWords), typed back whole
+    (mode1). With a plan (row indices, e.g. from DurationIndex.fill) the
+    drill plays exactly those words in order instead of drawing from the
+    selector, and ends after the last one. A planned drill moves through
+    its plan as rounds are loaded, so it cannot be drawn ahead.
+    """
+
+    title = "practice words mode"
+    prompt = "Your answer (word): "
+    empty_replays = True       # an empty answer repeats the word
+
+    def __init__(self, selector, name="", limit=None, plan=None):
+        self.selector = selector
+        self.rows = selector.items
+        self.name = name
+        self.plan = plan
+        self.limit = len(plan) if plan else limit
+        self.index = None
+        self.text = ""
+        self.definition = ""
+        self._planned = 0          # plan words loaded so far
+
+    def intro(self):
+        events = [say(f"\nPractice Words Mode: Using {self.name} with {len(self.rows)} entries.")]
+        if self.plan:
+            n = len(self.plan)
+            events.append(say(f"Timed drill: {n} word{'' if n == 1 else 's'}."))
+        return events + [say("Type the word you hear in Morse."),
+                         say("Commands: /r to repeat, /n to reveal+next, /s <wpm> to change speed, "
+                             "/quit to exit.\n")]
+
+    @property
+    def can_draw_ahead(self):
+        return not self.plan
+
+    def draw(self):
+        index = self.plan[self._planned] if self.plan else self.selector.pick()
+        entry = self.rows[index]
+        return entry.word, index, entry.definition
+
+    def load(self, item):
+        self.text, self.index, self.definition = item
+        if self.plan:
+            self._planned += 1
+
+    def normalize(self, line):
+        return line.strip()
+
+    def record(self, answer, response_s):
+        correct = answer is not None and answer.lower() == self.text.strip().lower()
+        self.selector.record(self.index, correct, response_s)
+
+    def _word_and_definition(self):
+        events = [say(f"Definition: {self.definition}")] if self.definition else []
+        return events + [say()]
+
+    def reveal(self):
+        return [say(f"Reveal → Word: {self.text}")] + self._word_and_definition()
+
+    def check(self, answer):
+        if answer.lower() == self.text.strip().lower():
+            return True, [say("Correct!\n")], True
+        return False, [say(f"Incorrect. The word was: {self.text}")] + self._word_and_definition(), True
+
+
+class DrillSession:
+    """
+    One user's drill: feed it input lines with handle() and act on the
+    events it returns. clock is only used to time answers. Each round's
+    item comes from draw(), the drill's own draw by default (see
+    drill_prefetch for drawing ahead).
+    """
+
+    def __init__(self, drill, unit_s, clock=time.monotonic, draw=None):
+        self.drill = drill
+        self.unit_s = unit_s
+        self.clock = clock
+        self.draw = draw or drill.draw
+        self.rounds = 0
+        self.done = False
+        self._heard = None
+        self._scored = False
+
+    def start(self):
+        return self.drill.intro() + self._next_round()
+
+    def _play(self):
+        event = play(self.drill.text, self.unit_s)
+        # Answers are timed from when the audio would have finished
+        self._heard = self.clock() + event["duration_s"]
+        return event
+
+    def _next_round(self):
+        limit = self.drill.limit
+        if limit is not None and self.rounds >= limit:
+            return self._end([say(f"Reached round limit. Exiting {self.drill.title}.")])
+        self.drill.load(self.draw())
+        self._scored = False
+        return [self._play(), prompt(self.drill.prompt)]
+
+    def _end(self, events=()):
+        self.done = True
+        return list(events) + [{"event": "end"}]
+
+    def _replay(self, events=()):
+        return list(events) + [self._play(), prompt(self.drill.prompt)]
+
+    def handle(self, line):
+        """Process one line of input; returns the resulting events."""
+        if self.done:
+            return [{"event": "end"}]
+        answer = self.drill.normalize(line)
+        upper = answer.upper()
+        if upper == EXIT_COMMAND.upper():
+            return self._end()
+        if upper == "/R" or (not answer and self.drill.empty_replays):
+            return self._replay()
+        if upper == "/N":
+            if not self._scored:
+                self.drill.record(None, None)
+            self.rounds += 1
+            return self.drill.reveal() + self._next_round()
+        if upper.startswith("/S "):
+            try:
+                wpm = int(upper.split()[1])
+                if wpm <= 0:
+                    raise ValueError(wpm)
+                unit_s = seconds_per_unit(wpm)
+            except Exception:
+                return [say("Invalid speed. Usage: /s <wpm>"), prompt(self.drill.prompt)]
+            self.unit_s = unit_s
+            return self._replay([{"event": "speed", "wpm": wpm, "unit_s": unit_s},
+                                 say(f"Speed changed to {wpm} WPM.")])
+
+        # Only the first attempt at an item counts towards the stats
+        if not self._scored and answer:
+            self.drill.record(answer, max(self.clock() - self._heard, 0.0))
+            self._scored = True
+        correct, events, over = self.drill.check(answer)
+        if over:
+            self.rounds += 1
+            return events + self._next_round()
+        return self._replay(events)
@@ -0,0 +1,115 @@
+"""
+Draw and render the next drills in the background while the user answers.
+
+    prefetch = Prefetcher(drill.draw, render_text, unit_s)
+    session = DrillSession(drill, unit_s, draw=prefetch)
+    ...
+    audio = prefetch.audio(text, unit_s)    # None if not prefetched
+
+A worker thread keeps up to depth items ready, each drawn from the drill
+(item[0] is the text to play) and rendered at the current speed. Calling
+the Prefetcher hands out the oldest item. Only the worker ever calls
+draw(), so items come out in the order they were drawn; if none is ready
+yet the caller waits for the worker's next one. set_speed() (on /s <wpm>)
+keeps the items already drawn and has the worker re-render them at the
+new speed, oldest first.
+
+Items are drawn up to depth rounds early, so the answers to the rounds in
+between are not yet reflected in their selection weights.
+"""
+import collections
+import threading
+
+PREFETCH_DEPTH = 2
+
+
+class Prefetcher:
+    def __init__(self, draw, render, unit_s, depth=PREFETCH_DEPTH):
+        self._draw = draw
+        self._render = render
+        self.unit_s = unit_s
+        self.depth = max(1, depth)
+        self.hits = 0
+        self.misses = 0
+        self.error = None
+        self._items = collections.deque()     # [item, unit_s, audio], oldest first
+        self._cond = threading.Condition()
+        self._current = None          # (text, unit_s, audio) of the item last handed out
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="drill-prefetch", daemon=True)
+        self._thread.start()
+
+    def _stale(self):
+        """The oldest item not rendered at the current speed, or None."""
+        return next((entry for entry in self._items if entry[1] != self.unit_s), None)
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._closed and len(self._items) >= self.depth and self._stale() is None:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    entry, unit_s = self._stale(), self.unit_s
+                if entry is None:
+                    # Drawn outside the lock so the caller can take ready items meanwhile;
+                    # rendered at the old speed if set_speed came in, then re-rendered
+                    item = self._draw()
+                    audio = self._render(item[0], unit_s)
+                    with self._cond:
+                        self._items.append([item, unit_s, audio])
+                        self._cond.notify_all()
+                else:
+                    audio = self._render(entry[0][0], unit_s)
+                    with self._cond:
+                        if unit_s == self.unit_s:
+                            entry[1:] = [unit_s, audio]
+                        self._cond.notify_all()
+        except Exception as e:
+            # Fall back to drawing in the caller; the drill itself still works
+            with self._cond:
+                self.error = e
+                self._cond.notify_all()
+
+    def __call__(self):
+        """The next item for the session (a drop-in for drill.draw)."""
+        with self._cond:
+            waited = not self._items
+            while not self._items and self.error is None and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                # The worker has stopped, so the caller is the only one drawing now
+                self.misses += 1
+                self._current = None
+                return self._draw()
+            item, unit_s, audio = self._items.popleft()
+            self._cond.notify_all()
+        if waited:
+            self.misses += 1
+        else:
+            self.hits += 1
+        # Rendered before a speed change the worker has not caught up with: render it when played
+        self._current = (item[0], unit_s, audio) if unit_s == self.unit_s else None
+        return item
+
+    def audio(self, text, unit_s):
+        """Prefetched audio for the item last handed out, if it matches."""
+        current = self._current
+        if current is not None and current[0] == text and current[1] == unit_s:
+            return current[2]
+        return None
+
+    def set_speed(self, unit_s):
+        """Re-render the items drawn so far at unit_s, and render at unit_s from now on."""
+        with self._cond:
+            self.unit_s = unit_s
+            self._current = None
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._items.clear()
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
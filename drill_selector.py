@@ -0,0 +1,341 @@
+"""
+Adaptive drill selection: pick what the user gets wrong (or slowly) more often.
+
+Every item keeps a short memory of its error rate and response time, and
+its sampling weight is derived from those. Weights live in a Fenwick
+(binary indexed) tree, so updating one item and drawing a weighted
+random item are both O(log n), even for word lists with millions of rows.
+
+    selector = DrillSelector(chars, state_path=state_path("chars"))
+    i = selector.pick()
+    ...
+    selector.record(i, correct=True, response_s=0.8)
+    selector.save()
+
+Items never seen get UNSEEN_WEIGHT, so new material keeps coming up, and
+items taken out with exclude() are never picked again. Only items that
+have been drilled or excluded are written to the state file (JSON),
+which lives in MORSE_STATE_DIR (default ~/.morse_practice).
+"""
+import json
+import os
+import random
+import threading
+from array import array
+
+import numpy as np
+
+STATE_DIR_ENV = "MORSE_STATE_DIR"
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser("~"), ".morse_practice")
+STATE_VERSION = 1
+
+UNSEEN_WEIGHT = 1.0
+MIN_WEIGHT = 0.05         # a mastered item still comes up now and then
+ERROR_WEIGHT = 2.0        # weight added at a 100% recent error rate
+SLOW_WEIGHT = 0.5         # weight added per multiple of the mean response time
+MAX_SLOW_RATIO = 3.0
+EMA_ALPHA = 0.3           # how fast an item's error/response memory moves
+AUTOSAVE_EVERY = 25
+
+
+def state_path(name):
+    """Path of the state file called name in the state directory."""
+    return os.path.join(os.environ.get(STATE_DIR_ENV) or DEFAULT_STATE_DIR, name + ".json")
+
+
+class SumTree:
+    """Fenwick tree over n non-negative weights with prefix-sum search."""
+
+    def __init__(self, n, weight=0.0):
+        self.n = n
+        # With every weight equal, node i covers lowbit(i) items
+        i = np.arange(n + 1, dtype=np.int64)
+        self._tree = array("d", (weight * (i & -i)).astype(np.float64).tobytes())
+        self._weights = array("d", np.full(n, weight, dtype=np.float64).tobytes())
+        self._top = 1 << n.bit_length() - 1 if n else 0
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        return self._weights[i]
+
+    def __setitem__(self, i, weight):
+        delta = weight - self._weights[i]
+        self._weights[i] = weight
+        tree = self._tree
+        i += 1
+        while i <= self.n:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of the first i weights."""
+        tree = self._tree
+        total = 0.0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def total(self):
+        return self.prefix(self.n)
+
+    def find(self, u):
+        """Index of the item whose cumulative weight range contains u."""
+        tree = self._tree
+        pos = 0
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and tree[nxt] <= u:
+                u -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        # Rounding can carry u past the last item
+        return min(pos, self.n - 1)
+
+    def sample(self, rng=random):
+        return self.find(rng.random() * self.total())
+
+
+class OverlayTree:
+    """
+    A SumTree's weights with some of them changed, without copying it: only
+    the changed weights and the Fenwick nodes above them are stored, so
+    many selectors can share one base tree (practice_server keeps one per
+    word list). The base must not change while it is shared.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.n = base.n
+        self._tree = {}           # node -> change to the base node's sum
+        self._weights = {}        # index -> weight
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        weight = self._weights.get(i)
+        return self.base[i] if weight is None else weight
+
+    def __setitem__(self, i, weight):
+        delta = weight - self[i]
+        self._weights[i] = weight
+        tree = self._tree
+        i += 1
+        while i <= self.n:
+            tree[i] = tree.get(i, 0.0) + delta
+            i += i & -i
+
+    def prefix(self, i):
+        """Sum of the first i weights."""
+        tree = self._tree
+        total = self.base.prefix(i)
+        while i > 0:
+            total += tree.get(i, 0.0)
+            i -= i & -i
+        return total
+
+    def total(self):
+        return self.prefix(self.n)
+
+    def find(self, u):
+        """Index of the item whose cumulative weight range contains u."""
+        base = self.base._tree
+        tree = self._tree
+        pos = 0
+        step = self.base._top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n:
+                node = base[nxt] + tree.get(nxt, 0.0)
+                if node <= u:
+                    u -= node
+                    pos = nxt
+            step >>= 1
+        return min(pos, self.n - 1)
+
+    def sample(self, rng=random):
+        return self.find(rng.random() * self.total())
+
+
+def write_state(path, state):
+    """Write a DrillSelector.snapshot() to path; False if it could not be written."""
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+    except OSError:
+        return False
+    return True
+
+
+class DrillSelector:
+    """
+    Weighted picker over a sequence of items (a string of characters, a
+    list, or a practice_words CompiledWords). key(item) names an item in
+    the state file. tree, if given, is a SumTree of UNSEEN_WEIGHT over
+    items shared with other selectors; this one only keeps its changes to
+    it. With autosave off, record() leaves saving to the caller (see
+    save_due and snapshot).
+    """
+
+    def __init__(self, items, key=str, state_path=None, rng=random, tree=None, autosave=True):
+        self.items = items
+        self.key = key
+        self.state_path = state_path
+        self.rng = rng
+        self.autosave = autosave
+        self.tree = SumTree(len(items), UNSEEN_WEIGHT) if tree is None else OverlayTree(tree)
+        self._stats = {}          # index -> [key, attempts, error_ema, response_ema]
+        self._excluded = {}       # index -> key
+        self._mean_response = None
+        self._keys = None
+        self._unsaved = 0
+        # pick() may run on a prefetch thread while answers are recorded
+        self._tree_lock = threading.Lock()
+        if state_path:
+            self.load()
+
+    def __len__(self):
+        return len(self.items)
+
+    def pick(self):
+        """Index of the next item to drill."""
+        with self._tree_lock:
+            return self.tree.sample(self.rng)
+
+    def choose(self):
+        """Like random.choice(items), but weighted."""
+        return self.items[self.pick()]
+
+    def weight(self, i):
+        if i in self._excluded:
+            return 0.0
+        st = self._stats.get(i)
+        if st is None:
+            return UNSEEN_WEIGHT
+        _key, _attempts, error, response = st
+        slow = 0.0
+        if response is not None and self._mean_response:
+            slow = min(response / self._mean_response, MAX_SLOW_RATIO)
+        return MIN_WEIGHT + ERROR_WEIGHT * error + SLOW_WEIGHT * slow
+
+    def record(self, i, correct, response_s=None):
+        """Update item i after an answer; response_s is the time taken, if known."""
+        st = self._stats.get(i)
+        if st is None:
+            # First sighting starts from the answer itself
+            st = self._stats[i] = [self.key(self.items[i]), 0, 0.0 if correct else 1.0, response_s]
+        else:
+            st[2] += EMA_ALPHA * ((0.0 if correct else 1.0) - st[2])
+            if response_s is not None:
+                st[3] = response_s if st[3] is None else st[3] + EMA_ALPHA * (response_s - st[3])
+        st[1] += 1
+        if response_s is not None:
+            m = self._mean_response
+            self._mean_response = response_s if m is None else m + 0.05 * (response_s - m)
+        # Other items keep the weight from their own last answer; the mean
+        # only drifts slowly, so they are not all re-weighted here.
+        with self._tree_lock:
+            self.tree[i] = self.weight(i)
+
+        self._unsaved += 1
+        if self.autosave and self.save_due():
+            self.save()
+
+    def exclude(self, i):
+        """Never pick item i again (e.g. a row with nothing to drill); kept in the state file."""
+        self._excluded[i] = self.key(self.items[i])
+        with self._tree_lock:
+            self.tree[i] = 0.0
+        self._unsaved += 1
+
+    def record_sequence(self, indices, expected, answer, response_s=None):
+        """
+        Score a drilled sequence position by position: indices[k] was played
+        as expected[k] and is correct if answer[k] matches. An answer of
+        None (skipped) counts every position as wrong.
+        """
+        answer = answer or ""
+        per_item = None if response_s is None else response_s / max(len(indices), 1)
+        for k, i in enumerate(indices):
+            correct = k < len(answer) and answer[k] == expected[k]
+            self.record(i, correct, per_item)
+
+    def record_key(self, key, correct, response_s=None):
+        """record() for items that are their own key, e.g. single characters."""
+        i = self._index_of(key)
+        if i is not None:
+            self.record(i, correct, response_s)
+
+    def _index_of(self, key):
+        if isinstance(self.items, str):
+            i = self.items.find(key) if len(key) == 1 else -1
+            return i if i >= 0 else None
+        return self._key_index().get(key)
+
+    def _key_index(self):
+        # Only built when the state no longer matches the item order
+        if self._keys is None:
+            self._keys = {self.key(item): i for i, item in enumerate(self.items)}
+        return self._keys
+
+    def stats(self, i):
+        """(attempts, error rate, mean response seconds) for item i, or None if unseen."""
+        st = self._stats.get(i)
+        return None if st is None else tuple(st[1:])
+
+    # -- persistence -------------------------------------------------------
+
+    def _saved_index(self, key, i):
+        # Saved indices are checked first, so an unchanged list loads in
+        # O(items seen) without scanning every key.
+        if 0 <= i < len(self.items) and self.key(self.items[i]) == key:
+            return i
+        return self._index_of(key)
+
+    def load(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != STATE_VERSION:
+            return
+        self._mean_response = state.get("mean_response")
+        for key, (i, attempts, error, response) in state.get("items", {}).items():
+            i = self._saved_index(key, i)
+            if i is not None:
+                self._stats[i] = [key, attempts, error, response]
+        for key, i in state.get("excluded", {}).items():
+            i = self._saved_index(key, i)
+            if i is not None:
+                self._excluded[i] = key
+        for i in list(self._stats) + list(self._excluded):
+            self.tree[i] = self.weight(i)
+
+    def save_due(self):
+        """Whether AUTOSAVE_EVERY changes are waiting to be saved."""
+        return bool(self.state_path) and self._unsaved >= AUTOSAVE_EVERY
+
+    def snapshot(self):
+        """
+        The state file's contents as a new dict, which write_state() can
+        write on another thread; the changes so far count as saved.
+        """
+        self._unsaved = 0
+        return {
+            "version": STATE_VERSION,
+            "mean_response": self._mean_response,
+            "items": {st[0]: [i] + st[1:] for i, st in self._stats.items()},
+            "excluded": {key: i for i, key in self._excluded.items()},
+        }
+
+    def save(self):
+        if self.state_path:
+            write_state(self.state_path, self.snapshot())
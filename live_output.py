@@ -0,0 +1,506 @@
+"""
+Live playback through one long-lived audio stream fed from a ring buffer.
+
+The device (a sound card via SDL, or FakeDevice for headless use) pulls a
+period of samples at a time from its own thread through a callback. The
+callback only copies out of a single-producer/single-consumer RingBuffer;
+a producer thread keeps that ring topped up with the rendered messages
+queued by play() and play_morse(). Neither side takes a lock: each owns
+one of the ring's two counters.
+
+    out = LiveOutput(SDLDevice())          # or FakeDevice() headless
+    out.start()
+    out.play_morse(encode_to_morse("CQ DE W1AW"), seconds_per_unit(60)).wait()
+    print(out.stats())
+    out.close()
+
+Since everything goes out as one continuous stream clocked by the device,
+element spacing is exact to the sample however short the units get
+(60 WPM and beyond); there is no per-symbol stream to open and close.
+
+stats() reports underruns (the device asked for samples while a message
+was still being played and the ring came up short; the rest of that
+period is silence), overruns (the producer found the ring full and had
+to wait for the device) and the ring's fill level as the device found it
+while messages were being played.
+"""
+import atexit
+import collections
+import threading
+import time
+
+import numpy as np
+
+from audio_backend import Playback
+from morse_profile import Ring
+from morse_render import (
+    SAMPLE_RATE, TONE_FREQ_HZ, UNIT_DASH_MULT, UNIT_DOT_MULT, VOLUME, morse_timing, tone_samples,
+)
+
+DEVICE_PERIOD = 512           # samples per device callback
+RING_SECONDS = 0.25
+PRODUCER_BLOCK = 1024         # largest piece the producer writes at once
+FILL_HISTORY = 4096
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 FIFO for exactly one writer thread and one reader
+    thread. written/read only ever grow and each is only advanced by its
+    own side, after the data is in place, so no lock is needed.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0
+        self.read = 0
+
+    def fill(self):
+        return self.written - self.read
+
+    def space(self):
+        return self.capacity - (self.written - self.read)
+
+    def write(self, samples):
+        """Append as much of samples as fits; returns the count written."""
+        n = min(len(samples), self.space())
+        if n <= 0:
+            return 0
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if n > first:
+            self._buf[:n - first] = samples[first:n]
+        self.written += n
+        return n
+
+    def read_into(self, out):
+        """Fill the front of out with up to len(out) samples; returns the count read."""
+        n = min(len(out), self.written - self.read)
+        if n <= 0:
+            return 0
+        start = self.read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        if n > first:
+            out[first:n] = self._buf[:n - first]
+        self.read += n
+        return n
+
+    def discard(self, upto=None):
+        """Reader side: drop what is buffered, or everything before position upto."""
+        self.read = self.written if upto is None else max(self.read, min(upto, self.written))
+
+
+class FakeDevice:
+    """
+    Stands in for a sound card: calls the callback with one period of
+    int16 samples per tick(). start() ticks on a thread in real time (or
+    `speed` times faster); with realtime=False it leaves the clock to the
+    caller, who calls tick() for a fully deterministic clock. With
+    record=True every period is kept in recorded for inspection.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, period=DEVICE_PERIOD, speed=1.0, record=False,
+                 realtime=True):
+        self.sample_rate = sample_rate
+        self.period = period
+        self.speed = speed
+        self.record = record
+        self.realtime = realtime
+        self.recorded = []
+        self.samples = 0            # the device clock, in samples
+        self.late = 0               # real-time ticks that came after their deadline
+        self._callback = None
+        self._thread = None
+        self._running = False
+
+    def open(self, callback):
+        self._callback = callback
+
+    def tick(self, n=1):
+        for _ in range(n):
+            out = np.zeros(self.period, dtype=np.int16)
+            self._callback(out)
+            self.samples += self.period
+            if self.record:
+                self.recorded.append(out)
+
+    def output(self):
+        return np.concatenate(self.recorded) if self.recorded else np.zeros(0, dtype=np.int16)
+
+    def start(self):
+        if not self.realtime:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fake-audio-device", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        step = self.period / float(self.sample_rate) / self.speed
+        deadline = time.perf_counter()
+        while self._running:
+            self.tick()
+            deadline += step
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.late += 1
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def _sdl_pause_without_gil(audio_module):
+    """
+    SDL_PauseAudioDevice through ctypes, which drops the GIL for the call;
+    None where the symbol can't be reached that way (Windows).
+    """
+    import ctypes
+    try:
+        pause = ctypes.CDLL(audio_module.__file__).SDL_PauseAudioDevice
+    except (OSError, AttributeError):
+        return None
+    pause.argtypes = (ctypes.c_uint32, ctypes.c_int)
+    pause.restype = None
+    return pause
+
+
+class SDLDevice:
+    """
+    The default output device through SDL2's callback API (pygame._sdl2).
+
+    pygame keeps the GIL in AudioDevice.pause() while it waits for SDL's
+    mixer lock, and SDL holds that lock while our callback waits for the
+    GIL, so pausing mid-callback deadlocks. close() pauses through ctypes
+    instead, without the GIL; once paused the callback is never entered
+    again and pygame's close() is safe. Without ctypes access it waits for
+    a callback to return and pauses in the gap before the next one, which
+    can still lose the race under heavy CPU load.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, period=DEVICE_PERIOD, name=None):
+        self.sample_rate = sample_rate
+        self.period = period
+        self.name = name
+        self._device = None
+        self._pause = None
+        self._stopping = False
+        self._between = threading.Event()
+
+    def open(self, callback):
+        from pygame._sdl2 import audio, sdl2
+        sdl2.init_subsystem(sdl2.INIT_AUDIO)
+        name = self.name or (audio.get_audio_device_names(False) or [""])[0]
+
+        def fill(_device, memory):
+            out = np.ndarray((len(memory) // 2,), dtype=np.int16, buffer=memory)
+            if self._stopping:
+                out[:] = 0
+                self._between.set()
+            else:
+                callback(out)
+
+        self._device = audio.AudioDevice(devicename=name, iscapture=False, frequency=self.sample_rate,
+                                         audioformat=audio.AUDIO_S16, numchannels=1,
+                                         chunksize=self.period, allowed_changes=0, callback=fill)
+        self.period = self._device.chunksize
+        self._pause = _sdl_pause_without_gil(audio)
+
+    def start(self):
+        self._stopping = False
+        self._device.pause(0)
+
+    def close(self):
+        if self._device is None:
+            return
+        if self._pause is not None:
+            self._pause(self._device.deviceid, 1)
+        else:
+            self._stopping = True
+            self._between.clear()
+            self._between.wait(1.0)
+            self._device.pause(1)
+        self._device.close()
+        self._device = None
+
+
+class LivePlayback(Playback):
+    """Handle to one queued message: over once the device has read past its end."""
+
+    def __init__(self, output, duration_s):
+        super().__init__(duration_s)
+        self.output = output
+        self.start = None             # ring position of the first sample, once writing began
+        self.end = None               # ring position after the last sample, once written
+
+    def is_playing(self):
+        if self._cancelled:
+            return False
+        return self.end is None or self.output.ring.read < self.end
+
+    def cancel(self):
+        if not self._cancelled:
+            self.output.cancel(self)
+        super().cancel()
+
+
+def morse_pieces(morse_text, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE):
+    """
+    A message as alternating silence and cached tone arrays, element by
+    element, with every position rounded from the absolute unit timeline
+    so the spacing never drifts. Concatenated, the pieces equal
+    render_morse(morse_text, ...).
+    """
+    starts, is_dash, total_units = morse_timing(morse_text)
+    unit_samples = float(unit_s) * sample_rate
+    dit = tone_samples(freq_hz, unit_s * UNIT_DOT_MULT, volume, sample_rate)
+    dah = tone_samples(freq_hz, unit_s * UNIT_DASH_MULT, volume, sample_rate)
+    silence = np.zeros(int(np.rint(UNIT_DASH_MULT * 3 * unit_samples)) + 1, dtype=np.int16)
+    pos = 0
+    for at, dash in zip(np.rint(starts * unit_samples).astype(np.int64).tolist(), is_dash.tolist()):
+        gap = at - pos
+        while gap > 0:
+            yield silence[:gap]
+            gap -= min(gap, silence.size)
+        tone = dah if dash else dit
+        yield tone
+        pos = at + tone.size
+    gap = int(np.rint(total_units * unit_samples)) - pos
+    while gap > 0:
+        yield silence[:gap]
+        gap -= min(gap, silence.size)
+
+
+class LiveOutput:
+    def __init__(self, device=None, ring_seconds=RING_SECONDS, sample_rate=SAMPLE_RATE,
+                 block_samples=PRODUCER_BLOCK):
+        self.device = device or SDLDevice(sample_rate)
+        self.sample_rate = sample_rate
+        self.block_samples = block_samples
+        self.ring = RingBuffer(max(int(ring_seconds * sample_rate), 2 * self.device.period))
+        self.underruns = 0
+        self.underrun_samples = 0
+        self.overruns = 0
+        self.callbacks = 0
+        self.fill_levels = Ring(FILL_HISTORY)
+        self._queue = collections.deque()
+        self._wake = threading.Event()
+        self._current = None          # LivePlayback being written by the producer
+        self._closed = False
+        # Reader-side drops: cancelled messages already (partly) in the
+        # ring, and a position everything before which is dropped (cancel all)
+        self._cancelled = collections.deque()
+        self._discard_to = 0
+        self._producer = threading.Thread(target=self._produce, name="live-output-producer", daemon=True)
+
+    # -- device side -------------------------------------------------------
+
+    def _callback(self, out):
+        self.callbacks += 1
+        if self._current is not None:
+            self.fill_levels.add(self.ring.fill() / float(self.ring.capacity))
+        filled = 0
+        while filled < len(out):
+            want = len(out) - filled
+            limit = self._drop_cancelled()
+            if limit is not None:
+                want = min(want, limit - self.ring.read)
+            if want <= 0:
+                break
+            n = self.ring.read_into(out[filled:filled + want])
+            filled += n
+            if n < want:
+                break
+        if filled < len(out):
+            out[filled:] = 0
+            if self._busy():
+                self.underruns += 1
+                self.underrun_samples += len(out) - filled
+
+    def _drop_cancelled(self):
+        """
+        Skip the buffered samples of cancelled messages. Returns the ring
+        position reading must stop at (where the next cancelled message
+        starts, or the current one until the producer lets go of it), or
+        None if nothing ahead is cancelled.
+        """
+        ring = self.ring
+        if self._discard_to > ring.read:
+            ring.discard(self._discard_to)
+        while self._cancelled:
+            handle = self._cancelled[0]
+            # written before end: if end is still unset, nothing after the
+            # cancelled message had been written when written was read
+            written = ring.written
+            end = handle.end
+            if end is not None and ring.read >= end:
+                self._cancelled.popleft()
+            elif ring.read < handle.start:
+                return handle.start
+            elif end is None:
+                ring.discard(written)
+                return ring.read
+            else:
+                ring.discard(end)
+        return None
+
+    def _busy(self):
+        # Audio is owed once a message has started going into the ring and
+        # until its last sample is in; the idle gap between messages (and
+        # the moment before the producer picks a new one up) is not an
+        # underrun, and neither is a message that was cancelled.
+        current = self._current
+        return current is not None and not current._cancelled
+
+    # -- producer side -----------------------------------------------------
+
+    def _produce(self):
+        while not self._closed:
+            if not self._queue:
+                self._wake.wait(0.05)
+                self._wake.clear()
+                continue
+            handle, pieces = self._queue[0]
+            if not handle._cancelled:
+                for piece in pieces:
+                    for i in range(0, len(piece), self.block_samples):
+                        if not self._write(handle, piece[i:i + self.block_samples]):
+                            break
+                    if handle._cancelled or self._closed:
+                        break
+            handle.end = self.ring.written
+            if handle._cancelled and handle.start is not None:
+                # Cancelled mid-write: cancel() may have run before start was set
+                self._cancelled.append(handle)
+            self._queue.popleft()
+            self._current = None
+
+    def _write(self, handle, block):
+        """Write all of block, waiting for the device; False if cancelled or closed."""
+        waited = False
+        while True:
+            if handle.start is None:
+                handle.start = self.ring.written
+            n = self.ring.write(block)
+            if n:
+                self._current = handle
+            block = block[n:]
+            if not len(block):
+                return True
+            if handle._cancelled or self._closed:
+                return False
+            if not waited:
+                self.overruns += 1
+                waited = True
+            time.sleep(self.device.period / float(self.sample_rate) / 2)
+
+    # -- public ------------------------------------------------------------
+
+    def start(self):
+        self.device.open(self._callback)
+        self._producer.start()
+        self.device.start()
+        return self
+
+    def play(self, audio, duration_s=None):
+        """
+        Queue audio (an int16 array, or an iterable of them such as
+        BandSim.blocks()) behind whatever is already queued; returns its
+        LivePlayback. duration_s is only a hint for wait() when audio is
+        an iterable.
+        """
+        if isinstance(audio, np.ndarray):
+            pieces, duration_s = (audio,), len(audio) / float(self.sample_rate)
+        else:
+            pieces = audio
+        handle = LivePlayback(self, duration_s or 0.0)
+        self._queue.append((handle, pieces))
+        self._wake.set()
+        return handle
+
+    def play_morse(self, morse_text, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME):
+        """Queue morse_text, keyed element by element straight into the stream."""
+        return self.play(morse_pieces(morse_text, unit_s, freq_hz, volume, self.sample_rate),
+                         morse_timing(morse_text)[2] * unit_s)
+
+    def cancel(self, handle=None):
+        """
+        Stop handle: a message still queued is skipped by the producer, and
+        whatever of it is already in the ring is dropped by the device
+        side; audio queued before or after it is untouched. Without a
+        handle, everything queued or buffered so far is dropped.
+        """
+        if handle is None:
+            for queued, _ in list(self._queue):
+                queued._cancelled = True
+                if queued.start is not None:
+                    self._cancelled.append(queued)
+            self._discard_to = max(self._discard_to, self.ring.written)
+            return
+        if handle.done():
+            return
+        handle._cancelled = True
+        if handle.start is not None:
+            self._cancelled.append(handle)
+
+    def wait_idle(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue or self.ring.fill():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def stats(self):
+        fills = self.fill_levels.snapshot()
+        return {
+            "callbacks": self.callbacks,
+            "underruns": self.underruns,
+            "underrun_samples": self.underrun_samples,
+            "overruns": self.overruns,
+            "ring_samples": self.ring.capacity,
+            "fill_min": float(fills.min()) if fills.size else 0.0,
+            "fill_mean": float(fills.mean()) if fills.size else 0.0,
+            "fill_p5": float(np.percentile(fills, 5)) if fills.size else 0.0,
+        }
+
+    def close(self):
+        self._closed = True
+        self.cancel()
+        self._wake.set()
+        if self._producer.is_alive():
+            self._producer.join(timeout=1.0)
+        self.device.close()
+
+
+_live = None
+_live_lock = threading.Lock()
+
+
+def get_live_output():
+    """
+    The shared LiveOutput on the default device, started on first use and
+    closed at exit (close_live_output), so the device is paused before
+    interpreter teardown rather than left calling back into Python.
+    """
+    global _live
+    with _live_lock:
+        if _live is None:
+            _live = LiveOutput().start()
+            atexit.register(close_live_output)
+        return _live
+
+
+def close_live_output():
+    global _live
+    with _live_lock:
+        if _live is not None:
+            _live.close()
+            _live = None
+    atexit.unregister(close_live_output)
@@ -1,104 +1,50 @@
-<<<<<<< HEAD
-import winsound  # Windows only
-import time
-
-# Morse Code dictionary
-MORSE_CODE = {
-    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.',
-    'F': '..-.', 'G': '--.', 'H': '....', 'I': '..', 'J': '.---',
-    'K': '-.-', 'L': '.-..', 'M': '--', 'N': '-.', 'O': '---',
-    'P': '.--.', 'Q': '--.-', 'R': '.-.', 'S': '...', 'T': '-',
-    'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-', 'Y': '-.--',
-    'Z': '--..',
-    '0': '-----', '1': '.----', '2': '..---', '3': '...--',
-    '4': '....-', '5': '.....', '6': '-....', '7': '--...',
-    '8': '---..', '9': '----.'
-}
-
-def play_morse(text, wpm=20, freq=600):
-    """Play text in Morse code with proper spacing."""
-    dot_duration = 1.2 / wpm  # dit length (sec)
-    dash_duration = 3 * dot_duration
-    intra_char_gap = dot_duration
-    letter_gap = 3 * dot_duration
-    word_gap = 7 * dot_duration
-
-    text = text.upper()
-
-    # Print converted Morse for reference
-    morse_text = " ".join(MORSE_CODE.get(ch, "") for ch in text if ch != " ")
-    print(f"[{text}] -> {morse_text}")
-
-    for idx, char in enumerate(text):
-        if char == " ":
-            time.sleep(word_gap)
-            continue
-
-        morse = MORSE_CODE.get(char, "")
-        for i, symbol in enumerate(morse):
-            if symbol == ".":
-                winsound.Beep(freq, int(dot_duration * 1000))
-            elif symbol == "-":
-                winsound.Beep(freq, int(dash_duration * 1000))
-
-            # Gap between symbols of same letter (except after last one)
-            if i < len(morse) - 1:
-                time.sleep(intra_char_gap)
-
-        # Gap between letters (except if next char is space or end of text)
-        if idx < len(text) - 1 and text[idx + 1] != " ":
-            time.sleep(letter_gap)
-
-if __name__ == "__main__":
-    print("Morse Code Trainer (type 'exit' to quit)\n")
-    wpm = int(input("Set speed (WPM): "))
-    freq = int(input("Set tone frequency (Hz): "))
-
-    while True:
-        msg = input("\nEnter text: ")
-        if msg.strip().lower() in ("exit", "quit", "q"):
-            print("Exiting...")
-            break
-        play_morse(msg, wpm=wpm, freq=freq)
-=======
+import argparse
+import importlib
 import sys
-from pygame import mixer
-from audio_pygame import play_morse
-from morse_utils import encode_to_morse
-from practice import practice_mode
-from practice1 import practice_mode as practice1_mode
-from practice_words.mode import practice_mode as practice_words_mode
-
-# Configuration
-TONE_FREQ_HZ = 528
+import morse_profile
+from audio_backend import BACKENDS, close_backend, play_pcm, render_morse_pcm, set_backend
+from morse_render import TONE_FREQ_HZ, VOLUME, SAMPLE_RATE, evict_stale_tones, seconds_per_unit
+from morse_utils import ENCODE_CACHE, encode_cached
+
+# Configuration (tone settings live in morse_render, shared with the backends)
 WPM = 20
-VOLUME = 0.5
-SAMPLE_RATE = 44100
 EXIT_COMMAND = "/quit"
 TEXT_PROMPT = "Enter text (or /quit): "
 
-def seconds_per_unit(wpm):
-    return 1.2 / float(wpm)
+# Practice modes are only imported when their command is first used, so
+# starting up to play text never loads pygame's display, fonts or CSV code.
+MODES = {
+    "practice": ("practice", "practice_mode"),
+    "practice1": ("practice1", "practice_mode"),
+    "practice_words": ("practice_words.mode", "practice_mode"),
+    "practice_words1": ("practice_words.mode1", "practice_mode"),
+}
+
+def load_mode(name):
+    module, attr = MODES[name]
+    return getattr(importlib.import_module(module), attr)
 
 def handle_speed_command(parts):
     global WPM
     if len(parts) > 1 and parts[1].isdigit():
         WPM = int(parts[1])
         print(f"Speed changed to {WPM} WPM.")
-        return seconds_per_unit(WPM)
+        unit_s = seconds_per_unit(WPM)
+        evict_stale_tones(unit_s)
+        return unit_s
     else:
         print("Usage: /s <wpm>")
         return seconds_per_unit(WPM)
 
 def handle_practice_command(parts, unit_s):
     num_chars = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 5
-    practice_mode(unit_s, num_chars)
+    load_mode("practice")(unit_s, num_chars)
 
 def handle_practice1_command(parts, unit_s):
     num_chars = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 5
     print(f"Starting practice1 mode with {num_chars} characters.")
-    practice1_mode(unit_s, num_chars)
-    
+    load_mode("practice1")(unit_s, num_chars)
+
 def handle_practice_words_command(parts, unit_s):
     """
     Usage:
@@ -114,32 +60,80 @@ def handle_practice_words_command(parts, unit_s):
     if len(parts) > 2 and parts[2].isdigit():
         limit = int(parts[2])
     print(f"Starting practice_words mode using {csv_path} ...")
-    practice_words_mode(unit_s, csv_path, limit)
+    load_mode("practice_words")(unit_s, csv_path, limit)
+
+def handle_timed_words_command(parts, unit_s):
+    """
+    Usage:
+      /timed <csv_path> <minutes> [chars]
+    Random words (of exactly `chars` characters, if given) adding up to
+    that much Morse at the current speed, typed back one at a time.
+    """
+    try:
+        csv_path, minutes = parts[1], float(parts[2])
+        chars = int(parts[3]) if len(parts) > 3 else None
+    except (IndexError, ValueError):
+        print("Usage: /timed <csv_path> <minutes> [chars]")
+        return
+    print(f"Starting a {minutes:g} minute drill at {WPM} WPM using {csv_path} ...")
+    load_mode("practice_words1")(unit_s, csv_path, budget_s=60 * minutes, chars=chars)
+
+# /command -> handler(parts, unit_s)
+COMMANDS = {
+    "/practice": handle_practice_command,
+    "/practice1": handle_practice1_command,
+    "/p1": handle_practice1_command,
+    "/practice_words": handle_practice_words_command,
+    "/pw": handle_practice_words_command,
+    "/timed": handle_timed_words_command,
+}
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Morse code output and practice.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="audio output (default: $MORSE_AUDIO_BACKEND or pygame)")
+    parser.add_argument("--wav", metavar="PATH",
+                        help="output file for --backend wav (default: $MORSE_WAV_PATH or morse_out.wav)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time encode/render/playback and print a summary on exit (also $MORSE_PROFILE=1)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="also write a cProfile of the session to PATH (implies --profile)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     global WPM
-    import pygame
-    pygame.init()
-    mixer.init(frequency=SAMPLE_RATE, size=-16, channels=1, buffer=512)
+    args = parse_args(argv)
+    if args.profile or args.profile_out:
+        morse_profile.enable(args.profile_out)
+    # Only the audio backend is opened here (for pygame: just the mixer);
+    # the GUI practice mode initializes the display when it starts.
+    name = args.backend or ("wav" if args.wav else None)
+    options = {"path": args.wav} if args.wav and name == "wav" else {}
+    backend = set_backend(name, **options)
     unit_s = seconds_per_unit(WPM)
-    print(f"[Morse Out] {WPM} WPM | {TONE_FREQ_HZ} Hz | volume {VOLUME} | sample_rate {SAMPLE_RATE}")
+    print(f"[Morse Out] {WPM} WPM | {TONE_FREQ_HZ} Hz | volume {VOLUME} | sample_rate {SAMPLE_RATE} | {backend.name}")
     print(f"Type {EXIT_COMMAND} to exit.\n")
 
     try:
-        last_text = ""
+        # The last message as played: (text, morse, unit_s, audio)
+        last = None
         while True:
             text = input(TEXT_PROMPT)
             if text is None:
                 continue
             text = text.strip()
             if not text:
-                # Replay last text if available
-                if last_text:
-                    morse = encode_to_morse(last_text)
+                # Replay last text if available: its audio as played, or
+                # re-rendered from its Morse after a speed change
+                if last:
+                    last_text, morse, last_unit_s, audio = last
+                    if last_unit_s != unit_s:
+                        audio = render_morse_pcm(morse, unit_s)
+                        last = (last_text, morse, unit_s, audio)
                     print(f"Replaying: {last_text}")
                     print(f"Morse: {morse}")
-                    play_morse(morse, unit_s)
+                    play_pcm(audio)
                 continue
             if text.lower() == EXIT_COMMAND.lower():
                 break
@@ -150,34 +144,28 @@ def main():
             if cmd == "/s":
                 unit_s = handle_speed_command(parts)
                 continue
-            elif cmd in ("/practice",):
-                handle_practice_command(parts, unit_s)
-                continue
-            elif cmd in ("/practice1", "/p1"):
-                handle_practice1_command(parts, unit_s)
-                continue
-            elif cmd in ("/practice_words", "/pw"):
-                handle_practice_words_command(parts, unit_s)
+            elif cmd in COMMANDS:
+                COMMANDS[cmd](parts, unit_s)
                 continue
 
-            morse = encode_to_morse(text)
+            with morse_profile.span("encode"):
+                morse = encode_cached(text)
             print(f"Morse: {morse}")
-            play_morse(morse, unit_s)
-            last_text = text
+            audio = render_morse_pcm(morse, unit_s)
+            play_pcm(audio)
+            last = (text, morse, unit_s, audio)
 
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         pass
     finally:
-        try:
-            mixer.quit()
-        except Exception:
-            pass
-        try:
-            pygame.quit()
-        except Exception:
-            pass
+        close_backend()
+        if "pygame" in sys.modules:
+            sys.modules["pygame"].quit()
         print("\nBye.")
+        if morse_profile.enabled:
+            print("encode cache: {hits} hits, {misses} misses, {evictions} evictions, "
+                  "{size}/{maxsize} words".format(**ENCODE_CACHE.stats()), file=sys.stderr)
+        morse_profile.finish()
 
 if __name__ == "__main__":
     main()
->>>>>>> 56568d9579da9d9cf0482b8b6efcab385141c7ce
@@ -0,0 +1,121 @@
+"""
+Per-character PCM atlas for assembling drills without rendering.
+
+A GlyphAtlas renders every character's complete waveform (its tones plus
+the trailing intra-character gap) once for a given speed, frequency,
+volume and sample rate, and keeps them back to back in one int16 array.
+A drill is then just atlas slices with character or word gaps between
+them, taken from one preallocated block of silence:
+
+    atlas = get_atlas(unit_s)
+    audio = atlas.render("CQ DE W1AW")
+
+get_atlas() keeps the atlas for the current settings and builds a new
+one the first time it is asked for different ones (e.g. after /s <wpm>).
+
+Each glyph and gap is rounded to whole samples on its own, so positions
+can differ from render_morse by under a sample per character; when
+unit_s * sample_rate is a whole number (e.g. 20 WPM at 44.1 kHz) the
+output is identical.
+"""
+import threading
+import time
+
+import numpy as np
+
+from morse_render import (
+    SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, UNIT_GAP_INTER, UNIT_GAP_INTRA, UNIT_GAP_WORD,
+    render_morse,
+)
+from morse_utils import MORSE_CODE
+
+
+class GlyphAtlas:
+    def __init__(self, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE,
+                 chars=None):
+        t0 = time.perf_counter()
+        self.unit_s = float(unit_s)
+        self.freq_hz = freq_hz
+        self.volume = volume
+        self.sample_rate = sample_rate
+        chars = MORSE_CODE if chars is None else chars
+
+        rendered = [(ch, render_morse(MORSE_CODE[ch], unit_s, freq_hz, volume, sample_rate))
+                    for ch in chars]
+        self.pcm = np.concatenate([audio for _, audio in rendered])
+        self.pcm.flags.writeable = False
+        self._glyphs = {}
+        pos = 0
+        for ch, audio in rendered:
+            self._glyphs[ch] = self.pcm[pos:pos + audio.size]
+            pos += audio.size
+
+        # Glyphs already end with the intra gap; separators top that up
+        unit_samples = self.unit_s * sample_rate
+        self.char_gap = int(np.rint((UNIT_GAP_INTER - UNIT_GAP_INTRA) * unit_samples))
+        self.word_gap = int(np.rint((UNIT_GAP_WORD - UNIT_GAP_INTRA) * unit_samples))
+        self._silence = np.zeros(max(self.char_gap, self.word_gap), dtype=np.int16)
+        self._silence.flags.writeable = False
+        self.build_seconds = time.perf_counter() - t0
+
+    @property
+    def key(self):
+        return atlas_key(self.unit_s, self.freq_hz, self.volume, self.sample_rate)
+
+    def __contains__(self, ch):
+        return ch in self._glyphs
+
+    def glyph(self, ch):
+        """Read-only view of one character's waveform."""
+        return self._glyphs[ch.upper()]
+
+    def segments(self, text):
+        """
+        Views (glyphs and gaps, no copies) that make up text in order.
+        Characters not in the atlas are skipped, as encode_to_morse does.
+        """
+        glyphs = self._glyphs
+        char_gap = self._silence[:self.char_gap]
+        word_gap = self._silence[:self.word_gap]
+        out = []
+        for word in text.upper().split():
+            first = True
+            for ch in word:
+                g = glyphs.get(ch)
+                if g is None:
+                    continue
+                if out:
+                    out.append(char_gap if not first else word_gap)
+                out.append(g)
+                first = False
+        return out
+
+    def render(self, text):
+        """
+        Contiguous int16 audio for text. A single character comes back as
+        its read-only atlas view; anything longer is one concatenation.
+        """
+        parts = self.segments(text)
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(parts)
+
+
+def atlas_key(unit_s, freq_hz, volume, sample_rate):
+    return (round(float(unit_s), 9), float(freq_hz), float(volume), int(sample_rate))
+
+
+_atlas = None
+_atlas_lock = threading.Lock()
+
+
+def get_atlas(unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE):
+    """The atlas for these settings, built on first use after they change."""
+    global _atlas
+    key = atlas_key(unit_s, freq_hz, volume, sample_rate)
+    with _atlas_lock:
+        if _atlas is None or _atlas.key != key:
+            _atlas = GlyphAtlas(unit_s, freq_hz, volume, sample_rate)
+        return _atlas
@@ -0,0 +1,322 @@
+"""
+Streaming audio -> text Morse decoder.
+
+Audio is cut into short blocks and the tone energy of each block is
+measured with a single-bin DFT (Goertzel) at the tone frequency. Blocks
+above an adaptive threshold are key-down. Runs of key-down/up blocks are
+classified against a running dit-length estimate and turned into text
+through morse_utils.MORSE_DECODE as soon as each character ends.
+
+The wpm hint only seeds that estimate. The first few marks are held
+back until the shortest runs among them give a measured dit length, and
+are then decoded against it, so a wrong hint does not garble the start.
+
+    python morse_decode.py recording.wav [--freq 350] [--wpm 20]
+"""
+import argparse
+import sys
+import wave
+
+import numpy as np
+
+from morse_render import SAMPLE_RATE, TONE_FREQ_HZ, seconds_per_unit
+from morse_utils import MORSE_DECODE
+
+BLOCK_MS = 5.0
+MIN_LEVEL = 0.02          # ignore anything quieter than this (fraction of full scale)
+PEAK_HALF_LIFE_S = 3.0    # how fast the peak level estimate forgets a loud signal
+FLOOR_RISE_S = 2.0        # time constant for the noise floor to rise towards the signal
+DIT_SMOOTHING = 0.2       # weight of each new element in the dit/dah length estimates
+UNKNOWN_CHAR = "*"
+WARMUP_MARKS = 6          # marks measured before the first character is decoded
+
+
+class MorseDecoder:
+    """
+    Incremental decoder. feed() takes int16 (or float) mono samples of any
+    length and returns the text completed so far; flush() ends the stream.
+    State is a handful of numbers plus less than one block of samples, so
+    memory stays flat on arbitrarily long input.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, freq_hz=TONE_FREQ_HZ, wpm=20, block_ms=None):
+        self.sample_rate = int(sample_rate)
+        if block_ms is None:
+            # At least five blocks per expected dit, so fast code still resolves
+            block_ms = min(BLOCK_MS, 1000.0 * seconds_per_unit(wpm) / 5.0)
+        self.block = max(8, int(round(self.sample_rate * block_ms / 1000.0)))
+        self.block_s = self.block / float(self.sample_rate)
+
+        n = np.arange(self.block)
+        w = 2.0 * np.pi * float(freq_hz) / self.sample_rate
+        # Reference pair for the single-bin DFT, scaled so a full-scale sine reads 1.0
+        scale = 2.0 / (self.block * 32768.0)
+        self._ref = np.stack([np.cos(w * n), np.sin(w * n)], axis=1) * scale
+
+        self._pending = np.zeros(0, dtype=np.float64)
+        self._peak = 0.0
+        self._floor = 0.0
+        self._peak_decay = 0.5 ** (self.block_s / PEAK_HALF_LIFE_S)
+        self._floor_keep = np.exp(-self.block_s / FLOOR_RISE_S)
+
+        # Running means of short (dit) and long (dah) marks
+        self.dit_s = seconds_per_unit(wpm)
+        self.dah_s = 3.0 * self.dit_s
+        self._key_down = False
+        self._run_blocks = 0
+        self._code = ""
+        self._emitted_char = False   # a char ended during the current key-up run
+        self._emitted_word = False   # a word space ended during the current key-up run
+        self._has_text = False
+        self._warmup = []            # completed (key_down, blocks) runs; None once done
+
+        self.samples_in = 0
+
+    # -- signal level -----------------------------------------------------
+
+    def _levels(self, samples):
+        data = np.concatenate([self._pending, np.asarray(samples, dtype=np.float64).ravel()])
+        n_blocks = data.size // self.block
+        self._pending = data[n_blocks * self.block:]
+        if not n_blocks:
+            return np.zeros(0)
+        iq = data[:n_blocks * self.block].reshape(n_blocks, self.block) @ self._ref
+        return np.hypot(iq[:, 0], iq[:, 1])
+
+    def _threshold(self, levels):
+        # Peak decays with time; the floor drops at once but only creeps up
+        # (over seconds), so a long dah cannot pass for the noise floor.
+        n = levels.size
+        self._peak = max(self._peak * self._peak_decay ** n, float(levels.max()))
+        low = float(np.percentile(levels, 10))
+        keep = self._floor_keep ** n
+        self._floor = min(low, keep * self._floor + (1.0 - keep) * low)
+        return max(MIN_LEVEL, self._floor + 0.5 * (self._peak - self._floor))
+
+    # -- run classification -----------------------------------------------
+
+    def _end_mark(self, n_blocks):
+        d = n_blocks * self.block_s
+        if d < 0.4 * self.dit_s:
+            # Much shorter than any dit we expected (allowing a block of
+            # quantization either way): the sender is faster
+            self.dit_s = d
+            self._fit_dah()
+        elif d > 2.5 * self.dah_s:
+            # Much longer than any dah we expected: the sender is slower
+            self.dah_s = d
+            self._fit_dit()
+        # Dit or dah, whichever running mean is closer on a log scale
+        if d * d < self.dit_s * self.dah_s:
+            self._code += "."
+            self.dit_s += DIT_SMOOTHING * (d - self.dit_s)
+            self._fit_dah()
+        else:
+            self._code += "-"
+            self.dah_s += DIT_SMOOTHING * (d - self.dah_s)
+            self._fit_dit()
+
+    def _end_gap(self, n_blocks):
+        # An intra-character gap is one unit long, as good a dit sample as a mark
+        d = n_blocks * self.block_s
+        if d < 2.0 * self.dit_s:
+            self.dit_s += DIT_SMOOTHING * (d - self.dit_s)
+            self._fit_dah()
+
+    # Keep dah between 2 and 4 dits so the two estimates can't merge,
+    # moving whichever one was not just measured.
+    def _fit_dah(self):
+        self.dah_s = min(max(self.dah_s, 2.0 * self.dit_s), 4.0 * self.dit_s)
+
+    def _fit_dit(self):
+        self.dit_s = min(max(self.dit_s, self.dah_s / 4.0), self.dah_s / 2.0)
+
+    def _space_so_far(self, n_blocks):
+        # Called while key-up: emit a char/word as soon as the gap is long enough
+        d = n_blocks * self.block_s
+        out = ""
+        if self._code and not self._emitted_char and d >= 2.0 * self.dit_s:
+            out += MORSE_DECODE.get(self._code, UNKNOWN_CHAR)
+            self._code = ""
+            self._emitted_char = True
+            self._has_text = True
+        if self._has_text and not self._emitted_word and d >= 5.0 * self.dit_s:
+            out += " "
+            self._emitted_word = True
+        return out
+
+    # -- warm-up ------------------------------------------------------------
+
+    def _measured_dit(self):
+        # Dits and intra-character gaps are one unit; dahs and character
+        # gaps three. The threshold shortens marks about as much as it
+        # lengthens gaps, so a mark and a gap of one unit are averaged.
+        marks = [n for down, n in self._warmup if down]
+        gaps = [n for down, n in self._warmup if not down]
+        if not marks:
+            return self.dit_s
+        short = self._cluster(marks)
+        gap = self._cluster(gaps)
+        if max(marks) >= 2 * min(marks):
+            # Dits and dahs: the short marks are dits
+            if gap is not None and gap < 3.0 * short:
+                return 0.5 * (short + gap)
+            return short
+        if gap is not None and gap < 0.8 * short:
+            # Only dahs, with one-unit gaps between them
+            return 0.5 * (short / 3.0 + gap)
+        # One kind of mark and no shorter gap ("EEE", "T T T"): dits and
+        # dahs can't be told apart, so the hint stands
+        return self.dit_s
+
+    def _cluster(self, runs):
+        """Mean length in seconds of the runs within 2x of the shortest (None if none)."""
+        if not runs:
+            return None
+        lengths = np.array(runs, dtype=np.float64) * self.block_s
+        return float(lengths[lengths < 2.0 * lengths.min()].mean())
+
+    def _end_warmup(self):
+        self.dit_s = self._measured_dit()
+        self.dah_s = 3.0 * self.dit_s
+        runs, self._warmup = self._warmup, None
+        out = []
+        for down, n_blocks in runs:
+            if down:
+                self._end_mark(n_blocks)
+                self._emitted_char = self._emitted_word = False
+            else:
+                out.append(self._space_so_far(n_blocks))
+                self._end_gap(n_blocks)
+        return "".join(out)
+
+    def _end_run(self):
+        # The run of self._key_down that just ended
+        if self._warmup is None:
+            if self._key_down:
+                self._end_mark(self._run_blocks)
+                self._emitted_char = self._emitted_word = False
+            elif self._run_blocks:
+                self._end_gap(self._run_blocks)
+            return ""
+        if self._key_down or self._warmup:
+            # (silence before the first mark measures nothing)
+            self._warmup.append((self._key_down, self._run_blocks))
+        if sum(down for down, _ in self._warmup) >= WARMUP_MARKS:
+            return self._end_warmup()
+        return ""
+
+    def _warmup_gap(self):
+        # A gap far longer than any mark so far ends the message: decode
+        # what there is rather than wait for more marks
+        longest = max((n for down, n in self._warmup if down), default=0)
+        return longest and self._run_blocks > 7 * longest
+
+    def _runs(self, key):
+        # Yield (is_key_down, length) runs of a boolean block array
+        edges = np.flatnonzero(key[1:] != key[:-1]) + 1
+        bounds = np.concatenate(([0], edges, [key.size]))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield bool(key[start]), int(stop - start)
+
+    # -- public API -----------------------------------------------------
+
+    def feed(self, samples):
+        self.samples_in += len(samples)
+        levels = self._levels(samples)
+        if not levels.size:
+            return ""
+        key = levels > self._threshold(levels)
+        out = []
+        for down, length in self._runs(key):
+            if down == self._key_down:
+                self._run_blocks += length
+            else:
+                out.append(self._end_run())
+                self._key_down = down
+                self._run_blocks = length
+            if not self._key_down:
+                if self._warmup is not None and self._warmup_gap():
+                    out.append(self._end_warmup())
+                if self._warmup is None:
+                    out.append(self._space_so_far(self._run_blocks))
+        return "".join(out)
+
+    def flush(self):
+        out = ""
+        if self._key_down and self._run_blocks:
+            out += self._end_run()
+            self._key_down = False
+            self._run_blocks = 0
+        if self._warmup is not None:
+            out += self._end_warmup()
+        if self._code:
+            out += MORSE_DECODE.get(self._code, UNKNOWN_CHAR)
+            self._code = ""
+            self._has_text = True
+        return out
+
+    @property
+    def wpm(self):
+        return 1.2 / self.dit_s
+
+
+def read_wav_chunks(path, chunk_frames=65536):
+    """
+    Yield int16 mono chunks from a 16-bit PCM WAV file,
+    one chunk at a time. Multi-channel audio is averaged down to mono.
+    """
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels = wf.getnchannels()
+        while True:
+            frames = wf.readframes(chunk_frames)
+            if not frames:
+                break
+            audio = np.frombuffer(frames, dtype="<i2")
+            if channels > 1:
+                audio = audio.reshape(-1, channels).mean(axis=1).astype(np.int16)
+            yield audio
+
+
+def decode_stream(chunks, sample_rate=SAMPLE_RATE, freq_hz=TONE_FREQ_HZ, wpm=20, decoder=None):
+    """Decode an iterable of sample chunks, yielding text as it is recognised."""
+    if decoder is None:
+        decoder = MorseDecoder(sample_rate, freq_hz, wpm)
+    for chunk in chunks:
+        text = decoder.feed(chunk)
+        if text:
+            yield text
+    text = decoder.flush()
+    if text:
+        yield text
+
+
+def wav_sample_rate(path):
+    with wave.open(path, "rb") as wf:
+        return wf.getframerate()
+
+
+def decode_wav(path, freq_hz=TONE_FREQ_HZ, wpm=20):
+    rate = wav_sample_rate(path)
+    return "".join(decode_stream(read_wav_chunks(path), rate, freq_hz, wpm)).strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode Morse from a 16-bit WAV file.")
+    parser.add_argument("wav")
+    parser.add_argument("--freq", type=float, default=TONE_FREQ_HZ, help="tone frequency in Hz")
+    parser.add_argument("--wpm", type=float, default=20, help="initial speed guess")
+    args = parser.parse_args(argv)
+
+    decoder = MorseDecoder(wav_sample_rate(args.wav), args.freq, args.wpm)
+    for text in decode_stream(read_wav_chunks(args.wav), decoder=decoder):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+    print(f"[estimated speed {decoder.wpm:.1f} WPM]", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Opt-in timing of the hot paths, for finding where time goes.
+
+Turn it on with MORSE_PROFILE=1 (or main.py --profile). Spans are then
+recorded per stage into fixed-size in-memory ring buffers:
+
+    encode           text -> Morse in main
+    render           Morse/text -> PCM for one message
+    synth            synthesizing a tone (tone-cache misses only)
+    start            backend start: Sound/play_buffer construction + play
+    sleep_overshoot  how much longer a playback sleep took than asked
+    wait_overshoot   how long after the audio's nominal end wait() returned
+    gap_sleep        overshoot of the per-symbol player's gap sleeps
+    frame            drawing one update of the pygame practice window
+
+finish() (called when main exits) prints count, mean and p50/p95/p99
+per stage. With MORSE_PROFILE_OUT=path (or --profile-out path) a
+cProfile of the whole run is written there too, for pstats/snakeviz.
+
+When profiling is off span() hands back a shared no-op context manager,
+so an instrumented call costs one function call and a flag check.
+"""
+import os
+import sys
+import time
+from array import array
+from contextlib import nullcontext
+
+import numpy as np
+
+PROFILE_ENV = "MORSE_PROFILE"
+PROFILE_OUT_ENV = "MORSE_PROFILE_OUT"
+RING_CAPACITY = 4096
+
+_NULL_SPAN = nullcontext()
+_rings = {}
+_profiler = None
+_pstats_path = None
+enabled = False
+
+
+class Ring:
+    """The last `capacity` values recorded for one stage."""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.values = array("d", bytes(8 * capacity))
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.count % self.capacity] = value
+        self.count += 1
+
+    def snapshot(self):
+        n = min(self.count, self.capacity)
+        return np.frombuffer(self.values, dtype=np.float64, count=n).copy()
+
+
+class _Span:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.t0)
+
+
+def record(stage, seconds):
+    """Add one measurement (in seconds) to stage's ring buffer."""
+    if not enabled:
+        return
+    ring = _rings.get(stage)
+    if ring is None:
+        ring = _rings[stage] = Ring()
+    ring.add(seconds)
+
+
+def span(stage):
+    """Context manager timing its body into stage; a no-op when disabled."""
+    return _Span(stage) if enabled else _NULL_SPAN
+
+
+def enable(pstats_path=None):
+    """Start recording; with pstats_path also run cProfile until finish()."""
+    global enabled, _profiler, _pstats_path
+    enabled = True
+    pstats_path = pstats_path or os.environ.get(PROFILE_OUT_ENV)
+    if pstats_path and _profiler is None:
+        import cProfile
+        _pstats_path = pstats_path
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def reset():
+    _rings.clear()
+
+
+def summary():
+    """Table of count, mean and p50/p95/p99/max per stage, in milliseconds."""
+    lines = [f"{'stage':<16} {'count':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+    for stage in sorted(_rings):
+        ring = _rings[stage]
+        values = ring.snapshot() * 1e3
+        if not values.size:
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        lines.append(f"{stage:<16} {ring.count:>7} {values.mean():>8.3f} {p50:>8.3f} "
+                     f"{p95:>8.3f} {p99:>8.3f} {values.max():>8.3f}")
+    return "\n".join(lines)
+
+
+def finish(file=None):
+    """Stop cProfile (writing its stats) and print the summary, if enabled."""
+    global _profiler
+    if not enabled:
+        return
+    file = file or sys.stderr
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_pstats_path)
+        _profiler = None
+        print(f"cProfile stats written to {_pstats_path}", file=file)
+    if _rings:
+        print(summary(), file=file)
+
+
+if os.environ.get(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off"):
+    enable()
@@ -0,0 +1,187 @@
+import numpy as np
+
+from morse_seq import MorseSeq
+from tone_cache import cached_tone, keep_durations
+from tone_synth import synth_tone
+
+# Tone settings shared by every backend and by main.py's banner
+TONE_FREQ_HZ = 528
+VOLUME = 0.5
+SAMPLE_RATE = 44100
+
+UNIT_DOT_MULT = 1.0
+UNIT_DASH_MULT = 3.0
+UNIT_GAP_INTRA = 1.0      # gap between symbols within a character
+UNIT_GAP_INTER = 3.0      # gap between characters
+UNIT_GAP_WORD = 7.0       # gap between words
+
+_DOT = ord('.')
+_DASH = ord('-')
+_SPACE = ord(' ')
+_SLASH = ord('/')
+
+
+def _synth_tone_samples(freq_hz, duration_sec, volume, sample_rate):
+    audio = synth_tone(freq_hz, duration_sec, volume, sample_rate)
+    audio.flags.writeable = False  # shared through the tone cache
+    return audio
+
+
+def tone_samples(freq_hz, duration_sec, volume, sample_rate):
+    """
+    Same tone_synth tone as the backends' make_tone_buffer, returned as a
+    read-only mono int16 array instead of a backend sound object.
+    """
+    return cached_tone("pcm", freq_hz, duration_sec, volume, sample_rate, _synth_tone_samples)
+
+
+def seconds_per_unit(wpm):
+    """Length of one unit at wpm words per minute (PARIS: 50 units a word)."""
+    return 1.2 / float(wpm)
+
+
+def element_durations(unit_s):
+    return (unit_s * UNIT_DOT_MULT, unit_s * UNIT_DASH_MULT)
+
+
+def evict_stale_tones(unit_s):
+    """Drop cached tones that do not belong to the speed unit_s."""
+    return keep_durations(element_durations(unit_s))
+
+
+def morse_timing(morse_text):
+    """
+    Compile a Morse string into a timeline measured in units.
+
+    Returns (starts, is_dash, total_units): the start of every tone, whether
+    it is a dah, and the length of the whole message. Every tone is followed
+    by the intra-character gap; a run of separators tops that up to the
+    largest gap in the run, so " / " between words is one word gap rather
+    than char + word + char gaps. Characters other than '.', '-', ' ' and
+    '/' are ignored, as in play_morse. morse_text may also be a MorseSeq.
+    """
+    if isinstance(morse_text, MorseSeq):
+        codes = morse_text.ascii_codes()
+    else:
+        codes = np.frombuffer(morse_text.encode('ascii', 'ignore'), dtype=np.uint8)
+        codes = codes[(codes == _DOT) | (codes == _DASH) | (codes == _SPACE) | (codes == _SLASH)]
+
+    is_tone = (codes == _DOT) | (codes == _DASH)
+    is_dash = codes[is_tone] == _DASH
+    n_tones = is_dash.size
+
+    # Units consumed by each tone: the tone itself plus the trailing intra gap
+    tone_adv = np.where(is_dash, UNIT_DASH_MULT, UNIT_DOT_MULT) + UNIT_GAP_INTRA
+
+    # Collapse each separator run into its largest top-up. A run's slot is the
+    # number of tones before it, i.e. the index of the tone it precedes.
+    sep = ~is_tone
+    gap_by_slot = np.zeros(n_tones + 1)
+    if sep.any():
+        slots = np.cumsum(is_tone)[sep]
+        gaps = np.where(codes[sep] == _SLASH,
+                        UNIT_GAP_WORD - UNIT_GAP_INTRA,
+                        UNIT_GAP_INTER - UNIT_GAP_INTRA)
+        gaps = np.maximum(gaps, 0.0)
+        run_starts = np.flatnonzero(np.r_[True, slots[1:] != slots[:-1]])
+        gap_by_slot[slots[run_starts]] = np.maximum.reduceat(gaps, run_starts)
+
+    starts = np.cumsum(np.r_[0.0, tone_adv])[:n_tones] + np.cumsum(gap_by_slot)[:n_tones]
+    total_units = float(tone_adv.sum() + gap_by_slot.sum())
+    return starts, is_dash, total_units
+
+
+def morse_units(morse_text):
+    """
+    Length in units of morse_timing(morse_text), counted straight from the
+    string. Only valid for encode_to_morse output (one " " between
+    characters, " / " between words). A MorseSeq knows its own.
+    """
+    if isinstance(morse_text, MorseSeq):
+        return morse_text.units
+    # Each tone is its length plus the intra gap; " " tops a gap up to the
+    # character gap and " / " (two spaces, one slash) up to the word gap.
+    return (2 * morse_text.count('.') + 4 * morse_text.count('-')
+            + 2 * morse_text.count(' ') + 2 * morse_text.count('/'))
+
+
+def render_morse(morse_text, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE,
+                 start_units=0.0):
+    """
+    Render a whole Morse string (tones and silences) into one contiguous
+    mono int16 buffer. Tone positions are derived from the unit timeline,
+    so there is no cumulative drift however long the message is.
+
+    start_units places the message that far into a longer timeline: the
+    buffer then starts at that point's sample, so pieces rendered with
+    running offsets join up exactly as if rendered in one go.
+    """
+    unit_s = float(unit_s)
+    starts, is_dash, total_units = morse_timing(morse_text)
+    unit_samples = unit_s * sample_rate
+    base = int(np.rint(start_units * unit_samples))
+    start_samples = np.rint((start_units + starts) * unit_samples).astype(np.int64) - base
+
+    dit = tone_samples(freq_hz, unit_s * UNIT_DOT_MULT, volume, sample_rate)
+    dah = tone_samples(freq_hz, unit_s * UNIT_DASH_MULT, volume, sample_rate)
+
+    n_total = int(np.rint((start_units + total_units) * unit_samples)) - base
+    if start_samples.size:
+        n_total = max(n_total, int(start_samples[-1]) + (dah.size if is_dash[-1] else dit.size))
+    out = np.zeros(n_total, dtype=np.int16)
+
+    # Write every dit (then every dah) in one assignment through a writable
+    # sliding-window view, so no per-tone Python loop or index array is needed.
+    for mask, tone in ((~is_dash, dit), (is_dash, dah)):
+        at = start_samples[mask]
+        if at.size:
+            windows = np.lib.stride_tricks.sliding_window_view(out, tone.size, writeable=True)
+            windows[at] = tone
+    return out
+
+
+class PrefixRender:
+    """
+    Audio of a Morse message that grows one character at a time, as in
+    progressive practice. append() renders only the new character (after
+    the character gap) onto the end of the buffer, so each step costs the
+    same however long the prefix already is. audio always equals
+    render_morse() of the whole prefix.
+    """
+
+    def __init__(self, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE):
+        self.unit_s = float(unit_s)
+        self.freq_hz = freq_hz
+        self.volume = volume
+        self.sample_rate = sample_rate
+        self.n_chars = 0
+        self.units = 0.0
+        self._buf = np.zeros(0, dtype=np.int16)
+        self._len = 0
+
+    @property
+    def audio(self):
+        return self._buf[:self._len]
+
+    def append(self, code):
+        """Add one character given by its Morse code; an empty code adds nothing but still counts."""
+        self.n_chars += 1
+        if not code:
+            return self.audio
+        piece = code if self.units == 0 else " " + code
+        segment = render_morse(piece, self.unit_s, self.freq_hz, self.volume, self.sample_rate,
+                               start_units=self.units)
+        self.units += morse_units(piece)
+        end = self._len + segment.size
+        if end > self._buf.size:
+            # Grow geometrically so appends stay amortized O(1)
+            grown = np.zeros(max(end, 2 * self._buf.size), dtype=np.int16)
+            grown[:self._len] = self._buf[:self._len]
+            self._buf = grown
+        self._buf[self._len:end] = segment
+        self._len = end
+        return self.audio
+
+
+def buffer_seconds(audio, sample_rate=SAMPLE_RATE):
+    return audio.size / float(sample_rate)
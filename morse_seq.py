@@ -0,0 +1,317 @@
+"""
+Encoded Morse packed two bits per element.
+
+encode_to_morse output is a str of '.', '-', ' ' and '/': a byte per
+element plus ~50 bytes of object overhead. MorseSeq holds the same
+elements as 2-bit codes, four to a byte, and converts both ways:
+
+    seq = MorseSeq.from_str(encode_to_morse("CQ DE W1AW"))
+    str(seq)                      # the original string
+    seq.units                     # morse_units(str(seq))
+    seq[:4] + seq[-4:]            # slicing is a view, + packs a new one
+    render_morse(seq, unit_s)     # the renderers take it directly
+
+A single short MorseSeq is no smaller than its str (the Python objects
+dominate); the saving comes from MorseSeqList, which keeps a whole word
+list in one packed buffer plus an offset and a unit count per entry and
+hands out MorseSeq views on demand.
+
+units follows morse_timing: each tone plus its intra gap, and each run
+of separators as its largest gap, so a slice that cuts " / " in half
+still counts a word gap. The first .units of a slice builds prefix
+tables over the sequence it was cut from; from then on every slice of
+it gets its units in O(1).
+"""
+import re
+
+import numpy as np
+
+ELEMENTS = ".- /"                 # 2-bit code -> element
+# Units per element, as morse_units counts them for encode_to_morse output
+UNIT_WEIGHTS = np.array([2, 4, 2, 2], dtype=np.int64)
+# What a separator adds on top of the preceding intra gap (morse_render's
+# UNIT_GAP_INTER/UNIT_GAP_WORD less UNIT_GAP_INTRA); a run adds its largest
+RUN_GAPS = np.array([0, 0, 2, 6], dtype=np.int64)
+_SEPARATOR_RUN = re.compile(r"[ /]+")
+
+_ASCII = np.frombuffer(ELEMENTS.encode("ascii"), dtype=np.uint8)
+_INVALID = 255
+_TO_CODE = np.full(256, _INVALID, dtype=np.uint8)
+_TO_CODE[_ASCII] = np.arange(len(ELEMENTS), dtype=np.uint8)
+_DIGITS = str.maketrans(ELEMENTS, "0123")
+_ELEMENT_SET = frozenset(ELEMENTS)
+# Every byte value unpacked to its four codes, lowest bits first
+_UNPACK = ((np.arange(256, dtype=np.uint8)[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3)
+
+
+def codes_from_str(morse_text):
+    """2-bit codes (one uint8 each) of morse_text; other characters are dropped."""
+    codes = _TO_CODE[np.frombuffer(morse_text.encode("ascii", "ignore"), dtype=np.uint8)]
+    return codes[codes != _INVALID]
+
+
+def pack_codes(codes):
+    """Four codes to a byte, first code in the lowest bits."""
+    padded = np.zeros(-(-codes.size // 4) * 4, dtype=np.uint8)
+    padded[:codes.size] = codes
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)).tobytes()
+
+
+def codes_units(codes):
+    """Length in units of codes, as morse_timing counts it."""
+    is_tone = codes < 2
+    units = int(UNIT_WEIGHTS[codes[is_tone]].sum())
+    sep = np.flatnonzero(~is_tone)
+    if sep.size:
+        run_starts = np.flatnonzero(np.r_[True, np.diff(sep) > 1])
+        units += int(np.maximum.reduceat(RUN_GAPS[codes[sep]], run_starts).sum())
+    return units
+
+
+def _str_units(morse_text):
+    # codes_units for a clean str without going through numpy
+    tones = 2 * morse_text.count(".") + 4 * morse_text.count("-")
+    slashes = morse_text.count("/")
+    if (slashes == morse_text.count(" / ") and "  " not in morse_text
+            and morse_text[:1] not in " /" and morse_text[-1:] not in " /"):
+        # encode_to_morse output: every run is " " or " / ", which weigh what they add
+        return tones + 2 * morse_text.count(" ") + 2 * slashes
+    return tones + sum(6 if "/" in run else 2 for run in _SEPARATOR_RUN.findall(morse_text))
+
+
+class _RunIndex:
+    """
+    Prefix tables over n elements of a packed buffer from position base,
+    built on first use: tones and slashes before every position, where
+    each tone is, and the units so far with each separator run's gap
+    counted at its first element. units(i, j) then only has to fix up the
+    runs a slice cuts, in O(1).
+    """
+
+    __slots__ = ("data", "base", "n", "_tones", "_tone_pos", "_slashes", "_units")
+
+    def __init__(self, data, base, n):
+        self.data = data
+        self.base = base
+        self.n = n
+        self._units = None
+
+    def _build(self):
+        codes = unpack_codes(self.data, self.base, self.n)
+        is_tone = codes < 2
+        self._tones = np.r_[0, np.cumsum(is_tone)]
+        self._tone_pos = np.flatnonzero(is_tone)
+        self._slashes = np.r_[0, np.cumsum(codes == 3)]
+        counted = np.where(is_tone, UNIT_WEIGHTS[codes], 0)
+        sep = np.flatnonzero(~is_tone)
+        if sep.size:
+            run_starts = np.flatnonzero(np.r_[True, np.diff(sep) > 1])
+            counted[sep[run_starts]] = np.maximum.reduceat(RUN_GAPS[codes[sep]], run_starts)
+        self._units = np.r_[0, np.cumsum(counted)]
+
+    def _is_sep(self, p):
+        return self._tones[p + 1] == self._tones[p]
+
+    def _run_end(self, p):
+        # First tone at or after p (n if none)
+        k = self._tones[p]
+        return int(self._tone_pos[k]) if k < self._tone_pos.size else self.n
+
+    def _run_start(self, p):
+        # Just after the last tone before p (0 if none)
+        k = self._tones[p]
+        return int(self._tone_pos[k - 1]) + 1 if k else 0
+
+    def _gap(self, a, b):
+        """Largest gap among separators a..b (all one run)."""
+        if b <= a:
+            return 0
+        return 6 if self._slashes[b] > self._slashes[a] else 2
+
+    def units(self, i, j):
+        """Units of elements i..j (relative to base)."""
+        if self._units is None:
+            self._build()
+        if j <= i:
+            return 0
+        units = int(self._units[j] - self._units[i])
+        if self._is_sep(i) and i > 0 and self._is_sep(i - 1):
+            # Starts inside a run counted before i: count the part kept
+            units += self._gap(i, min(self._run_end(i), j))
+        if j < self.n and self._is_sep(j - 1) and self._is_sep(j):
+            start = self._run_start(j)
+            if start >= i:
+                # Ends inside a run counted whole at its start: count the part kept
+                units += self._gap(start, j) - self._gap(start, self._run_end(j))
+        return units
+
+
+def unpack_codes(data, start, length):
+    """Codes start..start+length of a packed buffer."""
+    if not length:
+        return np.zeros(0, dtype=np.uint8)
+    first, last = start // 4, (start + length + 3) // 4
+    raw = np.frombuffer(data, dtype=np.uint8, count=last - first, offset=first)
+    return _UNPACK[raw].ravel()[start % 4:start % 4 + length]
+
+
+class MorseSeq:
+    """
+    Immutable packed Morse: len() in elements, .units in Morse units.
+    Slices share the parent's buffer.
+    """
+
+    __slots__ = ("_data", "_start", "_len", "_units", "_index")
+
+    def __init__(self, data=b"", start=0, length=0, units=None, index=None):
+        self._data = data
+        self._start = start
+        self._len = length
+        self._units = units
+        self._index = index           # _RunIndex shared with the sequence this was sliced from
+
+    @classmethod
+    def from_codes(cls, codes):
+        return cls(pack_codes(codes), 0, int(codes.size), codes_units(codes))
+
+    @classmethod
+    def from_str(cls, morse_text):
+        if not morse_text or not _ELEMENT_SET.issuperset(morse_text):
+            return cls.from_codes(codes_from_str(morse_text))
+        # Short clean strings (the usual case) skip numpy: read the codes
+        # as a base-4 number, last element first, so element 0 lands in
+        # the lowest bits of byte 0.
+        n = len(morse_text)
+        data = int(morse_text.translate(_DIGITS)[::-1], 4).to_bytes((n + 3) // 4, "little")
+        return cls(data, 0, n, _str_units(morse_text))
+
+    def codes(self):
+        return unpack_codes(self._data, self._start, self._len)
+
+    def ascii_codes(self):
+        """The elements as ASCII bytes ('.', '-', ' ', '/') in a uint8 array."""
+        return _ASCII[self.codes()]
+
+    @property
+    def units(self):
+        # Known up front for from_str/concatenation/list entries; a slice
+        # asks the index it shares with its parent
+        if self._units is None:
+            index = self._index
+            self._units = index.units(self._start - index.base, self._start - index.base + self._len)
+        return self._units
+
+    def _run_index(self):
+        if self._index is None:
+            self._index = _RunIndex(self._data, self._start, self._len)
+        return self._index
+
+    @property
+    def nbytes(self):
+        """Packed bytes this sequence covers."""
+        return (self._start % 4 + self._len + 3) // 4
+
+    def __len__(self):
+        return self._len
+
+    def __str__(self):
+        return self.ascii_codes().tobytes().decode("ascii")
+
+    def __repr__(self):
+        return f"MorseSeq({str(self)!r})"
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return MorseSeq.from_codes(self.codes()[index])
+            return MorseSeq(self._data, self._start + start, max(stop - start, 0), index=self._run_index())
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("MorseSeq index out of range")
+        return ELEMENTS[unpack_codes(self._data, self._start + index, 1)[0]]
+
+    def __add__(self, other):
+        if isinstance(other, str):
+            other = MorseSeq.from_str(other)
+        elif not isinstance(other, MorseSeq):
+            return NotImplemented
+        # Recounted: separator runs at the join merge into one gap
+        return MorseSeq.from_codes(np.concatenate([self.codes(), other.codes()]))
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            return MorseSeq.from_str(other) + self
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, MorseSeq):
+            return self._len == other._len and np.array_equal(self.codes(), other.codes())
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))      # equal to the str it stands for, so hashes alike
+
+
+class MorseSeqList:
+    """
+    Many MorseSeq in one packed buffer: 2 bits per element plus an offset
+    and a unit count per entry. Indexing returns a MorseSeq view with its
+    units already known.
+    """
+
+    def __init__(self, data, offsets, units):
+        self._data = data
+        self.offsets = offsets
+        self.units = units
+
+    @classmethod
+    def from_strings(cls, morse_texts):
+        morse_texts = list(morse_texts)
+        # "replace" keeps one byte per character, so the lengths below still line up
+        raw = _TO_CODE[np.frombuffer("".join(morse_texts).encode("ascii", "replace"), dtype=np.uint8)]
+        valid = raw != _INVALID
+        codes = raw[valid]
+        ends = np.cumsum([len(m) for m in morse_texts], dtype=np.int64)
+        bounds = np.r_[0, ends]
+        # Element count at every boundary of the joined input
+        kept = np.r_[0, np.cumsum(valid, dtype=np.int64)][bounds]
+        entry = np.repeat(np.arange(len(morse_texts)), np.diff(kept))
+        # Units as codes_units counts them, with no separator run crossing
+        # from one entry into the next
+        is_tone = codes < 2
+        units = np.bincount(entry[is_tone], UNIT_WEIGHTS[codes[is_tone]], minlength=len(morse_texts))
+        sep = np.flatnonzero(~is_tone)
+        if sep.size:
+            run_starts = np.flatnonzero(np.r_[True, (np.diff(sep) > 1) | (np.diff(entry[sep]) != 0)])
+            gaps = np.maximum.reduceat(RUN_GAPS[codes[sep]], run_starts)
+            units += np.bincount(entry[sep[run_starts]], gaps, minlength=len(morse_texts))
+        index_dtype = np.uint32 if codes.size < 2 ** 32 else np.uint64
+        return cls(pack_codes(codes), kept.astype(index_dtype), units.astype(np.uint32))
+
+    @property
+    def nbytes(self):
+        return len(self._data) + self.offsets.nbytes + self.units.nbytes
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("MorseSeqList index out of range")
+        start = int(self.offsets[i])
+        return MorseSeq(self._data, start, int(self.offsets[i + 1]) - start, int(self.units[i]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,239 @@
+"""
+Streaming text -> Morse -> PCM pipeline for arbitrarily long input.
+
+Each stage is a generator that pulls from the one before it:
+
+    read_text -> encode_stage -> timing_stage -> pcm_stage -> write_wav_stream
+
+Only a few words of text and one piece of audio are held at a time, so
+memory stays flat however long the input is. Every stage records its
+item count and time in a StageStats. The tones are keyed from one
+continuous tone_synth.ToneSynth, so the whole stream sounds like a
+single oscillator being keyed rather than tones pasted in at phase 0.
+
+    python morse_stream.py book.txt -o book.wav --wpm 20 --stats
+    cat news.txt | python morse_stream.py - -o - | some-player -
+"""
+import argparse
+import struct
+import sys
+import time
+
+import numpy as np
+
+from morse_render import (
+    SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, UNIT_DASH_MULT, UNIT_DOT_MULT, morse_timing, seconds_per_unit,
+)
+from morse_utils import encode_to_morse
+from tone_synth import ToneSynth
+
+TEXT_CHUNK_CHARS = 4096
+WORDS_PER_PIECE = 8
+BLOCK_SAMPLES = 4096
+
+
+class StageStats:
+    """Items produced and wall time spent inside one pipeline stage."""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.amount = 0       # stage-specific size (chars, tones, samples, bytes)
+        self.seconds = 0.0    # inclusive: also counts time spent in upstream stages
+
+    def timed(self, gen, measure=len):
+        """Wrap generator gen, timing each next() and counting what it yields."""
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(gen)
+            except StopIteration:
+                self.seconds += time.perf_counter() - t0
+                return
+            self.seconds += time.perf_counter() - t0
+            self.items += 1
+            self.amount += measure(item)
+            yield item
+
+
+def read_text(f, chunk_chars=TEXT_CHUNK_CHARS):
+    while True:
+        chunk = f.read(chunk_chars)
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode_stage(chunks, words_per_piece=WORDS_PER_PIECE):
+    """
+    Yield Morse for a few complete words at a time. A word split across
+    text chunks is carried over; every piece after the first starts with
+    the word separator so the pieces can be played back to back.
+    """
+    carry = ""
+    first = True
+    for chunk in chunks:
+        text = carry + chunk
+        # Keep an unfinished trailing word for the next chunk
+        if text and not text[-1].isspace():
+            words = text.split()
+            carry = words.pop() if words else ""
+        else:
+            words = text.split()
+            carry = ""
+        for i in range(0, len(words), words_per_piece):
+            morse = encode_to_morse(" ".join(words[i:i + words_per_piece]))
+            if morse:
+                yield morse if first else " / " + morse
+                first = False
+    morse = encode_to_morse(carry)
+    if morse:
+        yield morse if first else " / " + morse
+
+
+def timing_stage(pieces, unit_s, sample_rate=SAMPLE_RATE):
+    """
+    Turn Morse pieces into absolute sample positions: yields
+    (start_samples, is_dash, end_sample) per piece. Positions come from
+    the running unit count, so there is no drift between pieces.
+    """
+    unit_samples = float(unit_s) * sample_rate
+    units = 0.0
+    for morse in pieces:
+        starts, is_dash, total = morse_timing(morse)
+        start_samples = np.rint((units + starts) * unit_samples).astype(np.int64)
+        units += total
+        yield start_samples, is_dash, int(np.rint(units * unit_samples))
+
+
+def pcm_stage(events, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME, sample_rate=SAMPLE_RATE,
+              block_samples=BLOCK_SAMPLES):
+    """
+    Yield int16 blocks of block_samples (the last one may be shorter).
+    Every tone is synthesized in place, with the oscillator skipped over
+    the silence since the previous one.
+    """
+    synth = ToneSynth(sample_rate)
+    # Same tone lengths as tone_samples
+    dit = max(1, int(unit_s * UNIT_DOT_MULT * sample_rate))
+    dah = max(1, int(unit_s * UNIT_DASH_MULT * sample_rate))
+    pos = 0                                   # absolute sample index of leftover[0]
+    keyed = 0                                 # absolute sample the oscillator has reached
+    leftover = np.zeros(0, dtype=np.int16)
+    for start_samples, is_dash, end in events:
+        stop = end
+        if start_samples.size:
+            stop = max(stop, int(start_samples[-1]) + (dah if is_dash[-1] else dit))
+        piece = np.zeros(max(stop - pos, leftover.size), dtype=np.int16)
+        piece[:leftover.size] = leftover
+        for at, dash in zip(start_samples.tolist(), is_dash.tolist()):
+            n = dah if dash else dit
+            synth.skip(at - keyed, freq_hz)
+            synth.tone(n, freq_hz, volume, out=piece[at - pos:at - pos + n])
+            keyed = at + n
+        # Emit whole blocks up to the end of this piece's timeline
+        n_full = (max(end - pos, 0) // block_samples) * block_samples
+        for i in range(0, n_full, block_samples):
+            yield piece[i:i + block_samples]
+        leftover = piece[n_full:]
+        pos += n_full
+    if leftover.size:
+        yield leftover
+
+
+def wav_header(sample_rate, n_frames=None):
+    """44-byte mono 16-bit WAV header; unknown length uses the 0xFFFFFFFF convention."""
+    data_bytes = 0xFFFFFFFF if n_frames is None else 2 * n_frames
+    riff_bytes = 0xFFFFFFFF if n_frames is None else 36 + data_bytes
+    return (b"RIFF" + struct.pack("<I", riff_bytes) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, 2 * sample_rate, 2, 16)
+            + b"data" + struct.pack("<I", data_bytes))
+
+
+def write_wav_stream(blocks, out, sample_rate=SAMPLE_RATE):
+    """
+    Write blocks to a binary stream as WAV. Seekable outputs get exact
+    sizes patched in at the end; pipes get the 'unknown length' header.
+    Yields the number of bytes written per block, for the stats wrapper.
+    """
+    try:
+        seekable = out.seekable()
+    except (AttributeError, OSError):
+        seekable = False
+    out.write(wav_header(sample_rate))
+    n_frames = 0
+    for block in blocks:
+        data = block.astype("<i2", copy=False).tobytes()
+        out.write(data)
+        n_frames += block.size
+        yield len(data)
+    if seekable:
+        out.seek(0)
+        out.write(wav_header(sample_rate, n_frames))
+        out.seek(0, 2)
+    out.flush()
+
+
+def run_pipeline(text_file, out, unit_s, freq_hz=TONE_FREQ_HZ, volume=VOLUME,
+                 sample_rate=SAMPLE_RATE, block_samples=BLOCK_SAMPLES):
+    """Stream text_file to out as WAV; returns the list of StageStats."""
+    stats = [
+        StageStats("read", "chars"),
+        StageStats("encode", "morse chars"),
+        StageStats("timing", "tones"),
+        StageStats("pcm", "samples"),
+        StageStats("write", "bytes"),
+    ]
+    read, encode, timing, pcm, write = stats
+    chunks = read.timed(read_text(text_file))
+    pieces = encode.timed(encode_stage(chunks))
+    events = timing.timed(timing_stage(pieces, unit_s, sample_rate), measure=lambda e: e[0].size)
+    blocks = pcm.timed(pcm_stage(events, unit_s, freq_hz, volume, sample_rate, block_samples))
+    for _ in write.timed(write_wav_stream(blocks, out, sample_rate), measure=lambda n: n):
+        pass
+    return stats
+
+
+def format_stats(stats, sample_rate=SAMPLE_RATE):
+    lines = [f"{'stage':<8} {'items':>9} {'amount':>14} {'unit':<12} {'self s':>8} {'rate/s':>14}"]
+    upstream = 0.0
+    for s in stats:
+        own = max(s.seconds - upstream, 0.0)   # subtract time spent in earlier stages
+        upstream = s.seconds
+        rate = s.amount / own if own > 0 else float("inf")
+        lines.append(f"{s.name:<8} {s.items:>9} {s.amount:>14,} {s.unit:<12} {own:>8.3f} {rate:>14,.0f}")
+    samples = stats[3].amount
+    total = stats[-1].seconds
+    if total > 0:
+        lines.append(f"{samples / sample_rate:.1f} s of audio in {total:.2f} s "
+                     f"({samples / sample_rate / total:.0f}x realtime)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream text to a Morse WAV file.")
+    parser.add_argument("input", help="text file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="WAV file, or - for stdout (default)")
+    parser.add_argument("--wpm", type=float, default=20)
+    parser.add_argument("--freq", type=float, default=TONE_FREQ_HZ)
+    parser.add_argument("--block", type=int, default=BLOCK_SAMPLES, help="samples per PCM block")
+    parser.add_argument("--stats", action="store_true", help="print per-stage throughput to stderr")
+    args = parser.parse_args(argv)
+
+    unit_s = seconds_per_unit(args.wpm)
+    text_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        stats = run_pipeline(text_file, out, unit_s, args.freq, block_samples=args.block)
+    finally:
+        if text_file is not sys.stdin:
+            text_file.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    if args.stats:
+        print(format_stats(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,32 @@
-import morse3
+import os
+import threading
+from collections import OrderedDict
+
+# Morse Code dictionary (same characters the morse3 package knows)
+MORSE_CODE = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.',
+    'F': '..-.', 'G': '--.', 'H': '....', 'I': '..', 'J': '.---',
+    'K': '-.-', 'L': '.-..', 'M': '--', 'N': '-.', 'O': '---',
+    'P': '.--.', 'Q': '--.-', 'R': '.-.', 'S': '...', 'T': '-',
+    'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-', 'Y': '-.--',
+    'Z': '--..',
+    '0': '-----', '1': '.----', '2': '..---', '3': '...--',
+    '4': '....-', '5': '.....', '6': '-....', '7': '--...',
+    '8': '---..', '9': '----.',
+    '.': '.-.-.-', ',': '--..--', '?': '..--..', '!': '-.-.--',
+    '-': '-....-', '/': '-..-.', '@': '.--.-.', '(': '-.--.',
+    ')': '-.--.-',
+}
+
+# str.translate table: every character becomes its code plus a trailing
+# space, and a (single, normalized) space becomes the word separator.
+_ENCODE_TABLE = {}
+for _ch, _code in MORSE_CODE.items():
+    _ENCODE_TABLE[ord(_ch)] = _code + " "
+    _ENCODE_TABLE[ord(_ch.lower())] = _code + " "
+_ENCODE_TABLE[ord(" ")] = "/ "
+_ENCODABLE = frozenset(chr(c) for c in _ENCODE_TABLE)
+del _ch, _code
 
 def normalize_morse(s):
     s = s.strip()
@@ -6,11 +34,112 @@ def normalize_morse(s):
     s = " ".join(s.split())
     return s
 
+def _normalize_text(s):
+    # Single spaces between words; characters with no Morse code are dropped
+    text = " ".join(s.split())
+    if not _ENCODABLE.issuperset(text):
+        words = ("".join(ch for ch in w if ch in _ENCODABLE) for w in text.split(" "))
+        text = " ".join(w for w in words if w)
+    return text
+
 def encode_to_morse(s):
-    words = [w for w in s.split() if w]
-    encoded_words = []
-    for w in words:
-        code = morse3.Morse(w).stringToMorse()
-        code = " ".join(code.split())
-        encoded_words.append(code)
-    return " / ".join(encoded_words)
\ No newline at end of file
+    """
+    Encode text as Morse: letters separated by " ", words by " / ".
+    Characters without a Morse code are skipped.
+    """
+    text = _normalize_text(s)
+    if not text:
+        return ""
+    # Drop the trailing space left after the last character's code
+    return text.translate(_ENCODE_TABLE)[:-1]
+
+def encode_many(texts):
+    """
+    encode_to_morse for a batch of texts, returned as a list in the same
+    order. The whole batch goes through a single str.translate call.
+    """
+    texts = [_normalize_text(s) for s in texts]
+    if not texts:
+        return []
+    # Normalized texts contain no newlines and '\n' is not in the table,
+    # so it survives translation as a record separator.
+    encoded = "\n".join(texts).translate(_ENCODE_TABLE).split("\n")
+    return [code[:-1] for code in encoded]
+
+DEFAULT_ENCODE_CACHE_SIZE = 4096
+
+
+class EncodeCache:
+    """
+    Bounded LRU of word -> Morse for encode_cached. Words are cached
+    rather than whole texts, so sentences that share words share entries.
+    """
+
+    def __init__(self, maxsize=DEFAULT_ENCODE_CACHE_SIZE):
+        self.maxsize = max(1, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def word(self, word):
+        """Morse of one normalized word (no spaces, only encodable characters)."""
+        # Hits skip the lock: get and move_to_end are each atomic, and a
+        # word evicted in between just isn't moved.
+        code = self._entries.get(word)
+        if code is not None:
+            try:
+                self._entries.move_to_end(word)
+            except KeyError:
+                pass
+            self.hits += 1
+            return code
+        with self._lock:
+            self.misses += 1
+            code = self._entries[word] = word.translate(_ENCODE_TABLE)[:-1]
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return code
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+ENCODE_CACHE = EncodeCache(int(os.environ.get("MORSE_ENCODE_CACHE_SIZE", DEFAULT_ENCODE_CACHE_SIZE)))
+
+def encode_cached(s):
+    """
+    encode_to_morse through ENCODE_CACHE, word by word: the same result,
+    without re-encoding words seen recently. For interactive use; bulk
+    encoding is faster through encode_to_morse/encode_many.
+    """
+    text = _normalize_text(s)
+    if not text:
+        return ""
+    return " / ".join([ENCODE_CACHE.word(w) for w in text.split(" ")])
+
+MORSE_DECODE = {code: ch for ch, code in MORSE_CODE.items()}
+
+def decode_morse(morse, unknown="*"):
+    """
+    Decode a Morse string in encode_to_morse's format back to (upper-case) text.
+    Codes that are not in the table come back as `unknown`.
+    """
+    words = normalize_morse(morse).split(" / ")
+    return " ".join("".join(MORSE_DECODE.get(code, unknown) for code in w.split()) for w in words if w)
@@ -1,48 +1,158 @@
 import pygame
-import random
 import string
-from morse_utils import encode_to_morse
-from audio_pygame import play_morse
+import time
+import morse_profile
+from drill_selector import DrillSelector, state_path
+from audio_backend import play_text_async, stop_playback
+from morse_profile import span
 
 EXIT_COMMAND = "/quit"
+STATE_NAME = "chars"
+WINDOW_SIZE = (500, 100)
+BACKGROUND = (30, 30, 30)
+PROMPT_COLOR = (200, 200, 200)
+FEEDBACK_COLOR = (255, 180, 180)
+PROMPT_POS = (20, 40)
+FEEDBACK_POS = (20, 70)
+# Nothing on screen changes by itself, so the loop sleeps in event.wait
+# until a key or window event arrives. The timeout only bounds how long
+# Python goes without running, so Ctrl+C still gets through.
+WAIT_TIMEOUT_MS = 500
 
-def practice_mode(unit_s, num_chars=5):
+
+class PracticeWindow:
+    """
+    The practice window's two text lines, drawn only when they change.
+    The prompt prefix and every input glyph are rendered once; an update
+    repaints just the line that changed and pushes only that rect.
+    """
+
+    def __init__(self, screen, font, prompt):
+        self.screen = screen
+        self.font = font
+        self.prefix = font.render(prompt, True, PROMPT_COLOR)
+        self.glyphs = {}
+        self.line_height = font.get_linesize()
+        width = screen.get_width()
+        self.input_rect = pygame.Rect(PROMPT_POS[0] + self.prefix.get_width(), PROMPT_POS[1],
+                                      width - PROMPT_POS[0] - self.prefix.get_width(), self.line_height)
+        self.feedback_rect = pygame.Rect(0, FEEDBACK_POS[1], width, self.line_height)
+        self.user_input = ""
+        self.feedback = ""
+        self.frames = 0
+
+    def glyph(self, char):
+        surface = self.glyphs.get(char)
+        if surface is None:
+            surface = self.glyphs[char] = self.font.render(char, True, PROMPT_COLOR)
+        return surface
+
+    def redraw(self):
+        """Paint the whole window, e.g. after it was exposed."""
+        with span("frame"):
+            self.screen.fill(BACKGROUND)
+            self.screen.blit(self.prefix, PROMPT_POS)
+            self._draw_input()
+            self._draw_feedback()
+            pygame.display.flip()
+        self.frames += 1
+
+    def show(self, user_input, feedback):
+        """Bring both lines up to date, repainting only what changed."""
+        if user_input == self.user_input and feedback == self.feedback:
+            return
+        dirty = []
+        with span("frame"):
+            if user_input != self.user_input:
+                self.user_input = user_input
+                dirty.append(self._draw_input())
+            if feedback != self.feedback:
+                self.feedback = feedback
+                dirty.append(self._draw_feedback())
+            pygame.display.update(dirty)
+        self.frames += 1
+
+    def _draw_input(self):
+        self.screen.fill(BACKGROUND, self.input_rect)
+        x = self.input_rect.x
+        for char in self.user_input:
+            glyph = self.glyph(char)
+            self.screen.blit(glyph, (x, PROMPT_POS[1]))
+            x += glyph.get_width()
+        return self.input_rect
+
+    def _draw_feedback(self):
+        self.screen.fill(BACKGROUND, self.feedback_rect)
+        if self.feedback:
+            self.screen.blit(self.font.render(self.feedback, True, FEEDBACK_COLOR), FEEDBACK_POS)
+        return self.feedback_rect
+
+
+def practice_mode(unit_s, num_chars=5, selector=None):
     chars = string.ascii_uppercase + string.digits
+    if selector is None:
+        selector = DrillSelector(chars, state_path=state_path(STATE_NAME))
+    try:
+        stats = _run(unit_s, num_chars, selector)
+    finally:
+        selector.save()
+    if morse_profile.enabled:
+        print(f"window: {stats['frames']} frames, {stats['wakeups']} wakeups, "
+              f"{stats['cpu_s']:.2f} s CPU in {stats['wall_s']:.1f} s "
+              f"({100 * stats['cpu_s'] / max(stats['wall_s'], 1e-9):.1f}%)")
+
+def _run(unit_s, num_chars, selector):
+    chars = selector.items
     print(f"\nPractice Mode: Type back the {num_chars} characters you hear in Morse.")
     print("Press ESC to repeat Morse, TAB to advance, or close the window to exit.\n")
 
-    screen = pygame.display.set_mode((500, 100))
+    # main.py only brings up the mixer; the window needs video and fonts
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE)
     pygame.display.set_caption("Morse Practice (ESC=repeat, TAB=next)")
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
 
     font = pygame.font.Font(None, 36)
+    window = PracticeWindow(screen, font, f"Type answer ({num_chars} chars): ")
+    window.redraw()
 
+    wall0 = time.monotonic()
+    cpu0 = time.process_time()
+    wakeups = 0
     running = True
     while running:
-        seq = ''.join(random.choice(chars) for _ in range(num_chars))
-        morse = encode_to_morse(seq)
+        # Weighted towards characters that were missed or answered slowly
+        picks = [selector.pick() for _ in range(num_chars)]
+        seq = ''.join(chars[i] for i in picks)
         answered = False
         user_input = ""
 
-        play_morse(morse, unit_s)
+        # Playback runs on the mixer while this loop waits for keys;
+        # starting new audio cuts off the old. The audio is assembled from
+        # the glyph atlas, so nothing is rendered per round.
+        playback = play_text_async(seq, unit_s)
+        heard = time.monotonic() + playback.duration_s
+        scored = False
         feedback = ""
+        window.show(user_input, feedback)
         while not answered and running:
-            screen.fill((30, 30, 30))
-            prompt = f"Type answer ({num_chars} chars): {user_input}"
-            text = font.render(prompt, True, (200, 200, 200))
-            screen.blit(text, (20, 40))
-            if feedback:
-                feedback_text = font.render(feedback, True, (255, 180, 180))
-                screen.blit(feedback_text, (20, 70))
-            pygame.display.flip()
-
-            for event in pygame.event.get():
+            event = pygame.event.wait(WAIT_TIMEOUT_MS)
+            wakeups += 1
+            events = [event] + pygame.event.get() if event.type != pygame.NOEVENT else []
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                     answered = True
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    window.redraw()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_F1:
-                        play_morse(morse, unit_s)
+                        play_text_async(seq, unit_s)
                     elif event.key == pygame.K_F2:
+                        stop_playback()
+                        if not scored:
+                            selector.record_sequence(picks, seq, None)
                         if feedback:
                             print(feedback)
                         answered = True
@@ -53,6 +163,11 @@ def practice_mode(unit_s, num_chars=5):
                             running = False
                             answered = True
                         elif user_input:
+                            # Only the first attempt counts towards the stats
+                            if not scored:
+                                response_s = max(time.monotonic() - heard, 0.0)
+                                selector.record_sequence(picks, seq, user_input.upper(), response_s)
+                                scored = True
                             if user_input.upper() == seq:
                                 feedback = "Correct!"
                             else:
@@ -62,4 +177,12 @@ def practice_mode(unit_s, num_chars=5):
                         char = event.unicode.upper()
                         if char in chars and len(user_input) < num_chars:
                             user_input += char
-            pygame.time.wait(10)
\ No newline at end of file
+            if not answered:
+                window.show(user_input, feedback)
+    stop_playback()
+    return {
+        "frames": window.frames,
+        "wakeups": wakeups,
+        "cpu_s": time.process_time() - cpu0,
+        "wall_s": time.monotonic() - wall0,
+    }
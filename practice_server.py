@@ -0,0 +1,259 @@
+"""
+Practice server: many drill sessions over a Unix socket or localhost TCP.
+
+    python practice_server.py --unix /tmp/morse.sock --words words.csv
+    python practice_server.py --port 7373 --words words.csv other.csv
+
+Every connection is one DrillSession (drill_engine), so the drills are the
+ones practice1 and practice_words.mode1 run on the console. The protocol
+is JSON lines. The client opens with a hello:
+
+    {"mode": "groups", "chars": 5, "wpm": 20, "audio": "timing"}
+    {"mode": "words", "list": "words", "wpm": 20, "audio": "pcm", "limit": 10}
+
+"list" is the file name (without .csv) of one of the --words lists and
+"student" (optional) keeps that student's drill stats across connections;
+without it a session's stats are thrown away when it ends. After the
+hello every line from the client is what a user would type (answers,
+/r, /n, /s <wpm>, /quit) and the server sends back drill_engine events.
+"play" events go out without their text (that is the answer) and carry
+the audio instead, depending on "audio":
+
+    timing   "tones": [[start_s, length_s], ...] for the client to key
+    pcm      "pcm": base64 int16 mono at "sample_rate", from a GlyphAtlas
+
+Sessions share the word lists (compiled, memory-mapped), one selection
+tree per list and one atlas per speed; the per-session state is a
+DrillSession and a DrillSelector holding only that student's changes to
+the shared tree. Students' state files are written by one writer thread,
+off the event loop.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from drill_engine import DrillSession, GroupDrill, WordDrill
+from drill_selector import UNSEEN_WEIGHT, DrillSelector, SumTree, state_path, write_state
+from morse_atlas import GlyphAtlas
+from morse_render import SAMPLE_RATE, UNIT_DASH_MULT, UNIT_DOT_MULT, morse_timing, seconds_per_unit
+from morse_utils import encode_to_morse
+
+GROUP_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+AUDIO_MODES = ("timing", "pcm")
+DEFAULT_WPM = 20
+MAX_CHARS = 50
+MAX_ATLASES = 8           # speeds kept rendered for pcm sessions
+IDLE_TIMEOUT_S = 600.0
+LINE_LIMIT = 4096
+BACKLOG = 1024            # pending connections; asyncio's default of 100 is easily overrun
+
+
+class ProtocolError(Exception):
+    pass
+
+
+@lru_cache(maxsize=4096)
+def tone_times(text, unit_s):
+    """[[start_s, length_s], ...] for every tone of text at unit_s, from morse_timing."""
+    starts, is_dash, _ = morse_timing(encode_to_morse(text))
+    lengths = np.where(is_dash, UNIT_DASH_MULT, UNIT_DOT_MULT)
+    return np.round(np.c_[starts, lengths] * unit_s, 6).tolist()
+
+
+class PracticeServer:
+    def __init__(self, word_lists=(), idle_timeout=IDLE_TIMEOUT_S, sample_rate=SAMPLE_RATE):
+        self.word_lists = {os.path.splitext(os.path.basename(p))[0]: p for p in word_lists}
+        self.idle_timeout = idle_timeout
+        self.sample_rate = sample_rate
+        self._rows = {}
+        self._trees = {}
+        self._atlases = OrderedDict()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-writer")
+        self.active = 0
+        self.sessions = 0
+        self.lines = 0
+
+    def rows(self, name):
+        """The compiled word list called name, loaded once for all sessions."""
+        from practice_words.compiled import load_compiled
+        if name not in self.word_lists:
+            raise ProtocolError(f"unknown word list {name!r}; have {sorted(self.word_lists)}")
+        rows = self._rows.get(name)
+        if rows is None:
+            rows = self._rows[name] = load_compiled(self.word_lists[name])
+            if not rows:
+                raise ProtocolError(f"word list {name!r} is empty")
+            self._trees[name] = SumTree(len(rows), UNSEEN_WEIGHT)
+        return rows
+
+    def atlas(self, unit_s):
+        key = round(unit_s, 9)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = GlyphAtlas(unit_s, sample_rate=self.sample_rate)
+            if len(self._atlases) > MAX_ATLASES:
+                self._atlases.popitem(last=False)
+        else:
+            self._atlases.move_to_end(key)
+        return atlas
+
+    def open_session(self, hello):
+        """(session, selector, audio mode) for a client's hello."""
+        from practice_words.compiled import entry_key
+        if not isinstance(hello, dict):
+            raise ProtocolError("hello must be a JSON object")
+        audio = hello.get("audio", "timing")
+        if audio not in AUDIO_MODES:
+            raise ProtocolError(f"audio must be one of {AUDIO_MODES}")
+        try:
+            wpm = int(hello.get("wpm", DEFAULT_WPM))
+            limit = hello.get("limit")
+            limit = None if limit is None else int(limit)
+        except (TypeError, ValueError):
+            raise ProtocolError("wpm and limit must be integers")
+        if wpm <= 0:
+            raise ProtocolError("wpm must be positive")
+
+        student = hello.get("student")
+        if student is not None and not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", str(student)):
+            raise ProtocolError("student may only use letters, digits, '_' and '-'")
+
+        mode = hello.get("mode", "groups")
+        if mode == "groups":
+            num_chars = hello.get("chars", 5)
+            if not isinstance(num_chars, int) or not 0 < num_chars <= MAX_CHARS:
+                raise ProtocolError(f"chars must be an integer from 1 to {MAX_CHARS}")
+            path = state_path(f"{student}_chars") if student else None
+            selector = DrillSelector(GROUP_CHARS, state_path=path, autosave=False)
+            drill = GroupDrill(selector, num_chars, limit)
+        elif mode == "words":
+            name = str(hello.get("list", ""))
+            rows = self.rows(name)
+            path = state_path(f"{student}_words_{name}") if student else None
+            selector = DrillSelector(rows, key=entry_key, state_path=path,
+                                     tree=self._trees[name], autosave=False)
+            drill = WordDrill(selector, name, limit)
+        else:
+            raise ProtocolError("mode must be 'groups' or 'words'")
+        return DrillSession(drill, seconds_per_unit(wpm)), selector, audio
+
+    def encode(self, event, audio):
+        """One event as a JSON line for a client using audio."""
+        if event["event"] != "play":
+            return json.dumps(event).encode() + b"\n"
+        event = dict(event)
+        text = event.pop("text")
+        if audio == "timing":
+            event["tones"] = tone_times(text, event["unit_s"])
+            return json.dumps(event).encode() + b"\n"
+        event["sample_rate"] = self.sample_rate
+        pcm = base64.b64encode(self.atlas(event["unit_s"]).render(text))
+        # base64 never needs escaping, so splice it in instead of having
+        # json.dumps scan a few hundred KB of it
+        return json.dumps(event).encode()[:-1] + b', "pcm": "' + pcm + b'"}\n'
+
+    def save(self, selector):
+        """Queue selector's state for the writer thread; files are written in order."""
+        if selector.state_path:
+            self._writer.submit(write_state, selector.state_path, selector.snapshot())
+
+    def close(self):
+        """Wait for the state files still queued to be written."""
+        self._writer.shutdown(wait=True)
+
+    async def _send(self, writer, events, audio):
+        writer.write(b"".join(self.encode(e, audio) for e in events))
+        await writer.drain()
+
+    async def _readline(self, reader):
+        line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        if not line:
+            raise ConnectionResetError("client closed the connection")
+        self.lines += 1
+        return line.decode("utf-8", "replace")
+
+    async def handle_client(self, reader, writer):
+        self.active += 1
+        self.sessions += 1
+        selector = None
+        try:
+            try:
+                session, selector, audio = self.open_session(json.loads(await self._readline(reader)))
+            except (ValueError, ProtocolError) as e:
+                await self._send(writer, [{"event": "error", "text": str(e)}], None)
+                return
+            events = session.start()
+            while True:
+                await self._send(writer, events, audio)
+                if session.done:
+                    break
+                events = session.handle(await self._readline(reader))
+                if selector.save_due():
+                    self.save(selector)
+        except (ConnectionError, asyncio.TimeoutError, ValueError):
+            # Gone, idle or sending junk; drop whatever is still queued for it
+            writer.transport.abort()
+        except asyncio.CancelledError:
+            writer.transport.abort()
+            raise
+        finally:
+            self.active -= 1
+            if selector is not None:
+                self.save(selector)
+            writer.close()
+
+    async def start(self, unix=None, host="127.0.0.1", port=0):
+        """Start listening; returns the asyncio server."""
+        if unix:
+            return await asyncio.start_unix_server(self.handle_client, unix, limit=LINE_LIMIT,
+                                                   backlog=BACKLOG)
+        return await asyncio.start_server(self.handle_client, host, port, limit=LINE_LIMIT,
+                                          backlog=BACKLOG)
+
+
+async def serve(server, unix=None, host="127.0.0.1", port=0):
+    srv = await server.start(unix, host, port)
+    where = unix or ", ".join("%s:%s" % s.getsockname()[:2] for s in srv.sockets)
+    print(f"Practice server listening on {where}", file=sys.stderr)
+    async with srv:
+        await srv.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Morse practice drills to many clients.")
+    parser.add_argument("--unix", metavar="PATH", help="listen on this Unix socket")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=7373)
+    parser.add_argument("--words", nargs="*", default=[], metavar="CSV",
+                        help="word lists clients may pick with \"list\"")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT_S,
+                        help="drop clients silent for this many seconds")
+    args = parser.parse_args(argv)
+
+    server = PracticeServer(args.words, args.idle_timeout)
+    for name in server.word_lists:
+        t0 = time.perf_counter()
+        print(f"Loaded {name}: {len(server.rows(name))} words in {time.perf_counter() - t0:.2f} s",
+              file=sys.stderr)
+    try:
+        asyncio.run(serve(server, args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+if __name__ == "__main__":
+    main()
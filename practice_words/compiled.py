@@ -0,0 +1,357 @@
+"""
+Precompiled word lists: every CSV row with its Morse already worked out.
+
+A compiled file holds, per row, the word, its definition, the canonical
+form the progressive mode quizzes on, the word's Morse, the Morse of the
+canonical form (one code per canonical character) and the word's length
+in Morse units. Strings live in UTF-8 pools addressed by offset arrays,
+so loading is one mmap and a handful of np.frombuffer views; nothing is
+parsed or encoded during a session.
+
+load_compiled() keeps <csv>.mwc next to the CSV and recompiles when the
+CSV's size or mtime changes. The interactive modes use open_word_list()
+instead, which falls back to the CSV's line-offset index (store.WordStore)
+rather than compiling when the compiled file is missing or stale, and
+works out each entry's fields as it is drawn. Compiling
+streams the CSV a batch of rows at a time and spills the string pools
+to temporary files, so only the per-row offset and unit arrays are held
+in memory, however long the CSV. To compile ahead of time (e.g. for a read-only install):
+
+    python -m practice_words.compiled words.csv [-o words.mwc]
+"""
+import argparse
+import io
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from morse_render import morse_units
+from morse_utils import MORSE_CODE, encode_many, encode_to_morse
+from practice_words.mode import iter_words
+from practice_words.store import WordStore
+
+COMPILED_SUFFIX = ".mwc"
+_MAGIC = b"MWCOMP\x00\x01"
+_FIELDS = ("word", "definition", "canonical", "morse", "canonical_morse")
+# magic, csv mtime_ns, csv size, row count, then the byte length of each string pool
+_HEADER = struct.Struct("<8sqqq" + "q" * len(_FIELDS))
+COMPILE_BATCH = 8192          # rows encoded at a time
+
+WordEntry = namedtuple("WordEntry", _FIELDS + ("units",))
+
+
+def canonical_form(word):
+    """Letters and digits of word, upper-cased: what the progressive mode quizzes on."""
+    # Spaces, hyphens and underscores are dropped for practice
+    return "".join(ch for ch in word if ch.isalnum()).upper()
+
+
+def entry_key(entry):
+    """Name of a WordEntry in drill_selector state files."""
+    return entry.word
+
+
+def canonical_codes(canonical):
+    """
+    Morse of canonical with exactly one code per character, space-separated.
+    Characters without a code get an empty slot so that positions line up.
+    """
+    return " ".join(MORSE_CODE.get(ch, "") for ch in canonical)
+
+
+def prefix_morse(canonical_morse, n_chars):
+    """Morse for the first n_chars of a canonical form, from its canonical_morse."""
+    return " ".join(code for code in canonical_morse.split(" ")[:n_chars] if code)
+
+
+def word_entry(word, definition):
+    """The WordEntry a compiled list holds for one (word, definition) row."""
+    canonical = canonical_form(word)
+    morse = encode_to_morse(word)
+    return WordEntry(word, definition, canonical, morse, canonical_codes(canonical), morse_units(morse))
+
+
+def _pad8(n):
+    return -n % 8
+
+
+def _batches(rows, size=COMPILE_BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _columns(rows):
+    """Every field of the compiled format for one batch of (word, definition) rows."""
+    words = [w for w, _ in rows]
+    canonicals = [w.upper() if w.isalnum() else canonical_form(w) for w in words]
+    # An ASCII canonical form has a code for every character, so the batch
+    # encoder already gives one code per character.
+    canonical_morse = encode_many(canonicals)
+    for i, c in enumerate(canonicals):
+        if not c.isascii():
+            canonical_morse[i] = canonical_codes(c)
+    return {
+        "word": words,
+        "definition": [d for _, d in rows],
+        "canonical": canonicals,
+        "morse": encode_many(words),
+        "canonical_morse": canonical_morse,
+    }
+
+
+def write_compiled(rows, out, mtime_ns=0, size=0):
+    """
+    Write (word, definition) rows, any iterable, to binary file out in the
+    compiled format. Rows are encoded a batch at a time and each string
+    pool goes to a temporary file until the arrays ahead of it are known.
+    """
+    units = []
+    lengths = {name: [] for name in _FIELDS}
+    pools = {name: tempfile.TemporaryFile() for name in _FIELDS}
+    try:
+        count = 0
+        for batch in _batches(rows):
+            columns = _columns(batch)
+            units.append(np.array([morse_units(m) for m in columns["morse"]], dtype="<u4"))
+            for name in _FIELDS:
+                encoded = [v.encode("utf-8") for v in columns[name]]
+                lengths[name].append(np.array([len(b) for b in encoded], dtype="<u8"))
+                pools[name].write(b"".join(encoded))
+            count += len(batch)
+
+        offsets = []
+        for name in _FIELDS:
+            arr = np.zeros(count + 1, dtype="<u8")
+            if count:
+                np.cumsum(np.concatenate(lengths[name]), out=arr[1:])
+            offsets.append(arr)
+            lengths[name] = None
+        units = np.concatenate(units) if units else np.zeros(0, dtype="<u4")
+
+        # Layout: header, units, one offsets array per field, then the string
+        # pools. Arrays start on 8-byte boundaries.
+        out.write(_HEADER.pack(_MAGIC, mtime_ns, size, count, *(int(arr[-1]) for arr in offsets)))
+        pos = _HEADER.size
+        for arr in [units] + offsets:
+            pad = _pad8(pos)
+            out.write(bytes(pad))
+            out.write(arr.tobytes())
+            pos += pad + arr.nbytes
+        for name in _FIELDS:
+            pools[name].seek(0)
+            shutil.copyfileobj(pools[name], out)
+    finally:
+        for f in pools.values():
+            f.close()
+
+
+def compile_rows(rows, mtime_ns=0, size=0):
+    """Pack (word, definition) rows into the compiled format; returns bytes."""
+    out = io.BytesIO()
+    write_compiled(rows, out, mtime_ns, size)
+    return out.getvalue()
+
+
+def compile_csv(csv_path, out_path=None):
+    """Compile csv_path to out_path (default <csv>.mwc); returns out_path."""
+    out_path = out_path or csv_path + COMPILED_SUFFIX
+    st = os.stat(csv_path)
+    tmp = out_path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            write_compiled(iter_words(csv_path), f, st.st_mtime_ns, st.st_size)
+        os.replace(tmp, out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return out_path
+
+
+class CompiledWords:
+    """
+    Sequence of WordEntry read from a compiled buffer (bytes or mmap).
+
+        words = load_compiled("words.csv")
+        entry = random.choice(words)
+        play_morse(entry.morse, unit_s)
+    """
+
+    def __init__(self, buf, source=None):
+        self.source = source
+        self._buf = buf
+        magic, self.mtime_ns, self.size, count, *blob_lens = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"not a compiled word list: {source or 'buffer'}")
+        self._count = count
+        pos = _HEADER.size
+        pos += _pad8(pos)
+        self.units = np.frombuffer(buf, dtype="<u4", count=count, offset=pos)
+        pos += self.units.nbytes
+        self._offsets = []
+        for _ in _FIELDS:
+            pos += _pad8(pos)
+            offsets = np.frombuffer(buf, dtype="<u8", count=count + 1, offset=pos)
+            self._offsets.append(offsets)
+            pos += offsets.nbytes
+        self._bases = []
+        for n in blob_lens:
+            self._bases.append(pos)
+            pos += n
+
+    def _field(self, f, i):
+        offsets = self._offsets[f]
+        base = self._bases[f]
+        return self._buf[base + int(offsets[i]):base + int(offsets[i + 1])].decode("utf-8")
+
+    def char_counts(self):
+        """Characters in every entry's canonical form, from the pool without decoding it."""
+        f = _FIELDS.index("canonical")
+        offsets = self._offsets[f].astype(np.int64)
+        pool = np.frombuffer(self._buf, dtype=np.uint8, count=int(offsets[-1]), offset=self._bases[f])
+        # UTF-8: every byte that is not a continuation byte (10xxxxxx) starts a character
+        starts = np.r_[0, np.cumsum((pool & 0xC0) != 0x80, dtype=np.int64)]
+        return np.diff(starts[offsets])
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("CompiledWords index out of range")
+        return WordEntry(*(self._field(f, i) for f in range(len(_FIELDS))), int(self.units[i]))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        # The arrays are views into the mmap and must go before it can close
+        self.units = None
+        self._offsets = []
+        self._count = 0
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StoreWords:
+    """
+    Sequence of WordEntry over a WordStore, each worked out when it is
+    read: what open_word_list gives while the compiled file is stale.
+    """
+
+    def __init__(self, store):
+        self.source = store.csv_path
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, i):
+        return word_entry(*self._store[i])
+
+    def __iter__(self):
+        for row in self._store:
+            yield word_entry(*row)
+
+    def close(self):
+        self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_compiled(path):
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompiledWords(buf, path)
+
+
+def _current_compiled(compiled_path, st):
+    """The compiled list at compiled_path if it was built from the CSV stat()ed as st, else None."""
+    try:
+        words = open_compiled(compiled_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if words.mtime_ns == st.st_mtime_ns and words.size == st.st_size:
+        return words
+    words.close()
+    return None
+
+
+def load_compiled(csv_path, compiled_path=None):
+    """
+    CompiledWords for csv_path, using (and refreshing) the cached compiled
+    file. If the cache cannot be written the list is compiled in memory.
+    """
+    compiled_path = compiled_path or csv_path + COMPILED_SUFFIX
+    st = os.stat(csv_path)
+    words = _current_compiled(compiled_path, st)
+    if words is not None:
+        return words
+    try:
+        return open_compiled(compile_csv(csv_path, compiled_path))
+    except OSError:
+        # Read-only location: keep the compiled list for this session only
+        return CompiledWords(compile_rows(iter_words(csv_path), st.st_mtime_ns, st.st_size), csv_path)
+
+
+def open_word_list(csv_path, compiled_path=None):
+    """
+    The rows of csv_path for an interactive session: CompiledWords if the
+    compiled file is current, else StoreWords over the CSV's line-offset
+    index. On a million-row CSV that index takes about 4 s to build (and
+    no time once its .idx is cached) against about 8 s for a compile, so
+    a new or edited list opens without waiting for one. Timed drills need
+    the compiled units and use load_compiled.
+    """
+    compiled_path = compiled_path or csv_path + COMPILED_SUFFIX
+    words = _current_compiled(compiled_path, os.stat(csv_path))
+    return words if words is not None else StoreWords(WordStore(csv_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile practice_words CSVs for fast loading.")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("-o", "--output", help="output file (only with a single CSV; default <csv>.mwc)")
+    args = parser.parse_args(argv)
+    if args.output and len(args.csv) > 1:
+        parser.error("-o/--output needs exactly one CSV")
+
+    for csv_path in args.csv:
+        t0 = time.perf_counter()
+        out = compile_csv(csv_path, args.output)
+        elapsed = time.perf_counter() - t0
+        with open_compiled(out) as words:
+            print(f"{csv_path}: {len(words)} entries -> {out} "
+                  f"({os.path.getsize(out) / 1e6:.1f} MB, {elapsed:.2f} s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
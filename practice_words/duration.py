@@ -0,0 +1,156 @@
+"""
+Word lists indexed by how long each word takes to send.
+
+A compiled list already stores every word's length in Morse units
+(dits, dahs and gaps). DurationIndex keeps those units, and each word's
+character count, as NumPy arrays sorted once at load. A range query by
+duration or length is then two np.searchsorted calls (O(log n)), and a
+random word from the range is one more index into the sorted order.
+
+    index = DurationIndex.from_compiled(load_compiled("words.csv")).subset(chars=5)
+    plan = index.fill(180, seconds_per_unit(18), random.Random())
+    # 5-letter words that, sent back to back, take 3:00
+
+Timings are for words sent as one message ("W1 W2 W3"): each word's own
+units plus a word gap between words (WORD_GAP_UNITS on top of the gap
+already counted at the end of each word).
+"""
+import math
+
+import numpy as np
+
+from morse_render import UNIT_GAP_INTRA, UNIT_GAP_WORD
+
+WORD_GAP_UNITS = int(UNIT_GAP_WORD - UNIT_GAP_INTRA)
+
+
+class DurationIndex:
+    """
+    Entries of a word list sorted by Morse units and by character count.
+    units and chars are per entry of the whole list; ids (default: all)
+    picks the entries this index covers. Queries return those ids.
+    Entries with no Morse (nothing encodable) are left out.
+    """
+
+    def __init__(self, units, chars, ids=None):
+        self._units = np.asarray(units, dtype=np.int64)
+        self._chars = np.asarray(chars, dtype=np.int64)
+        ids = np.arange(self._units.size) if ids is None else np.asarray(ids, dtype=np.int64)
+        self.ids = ids[self._units[ids] > 0]
+        units = self._units[self.ids]
+        chars = self._chars[self.ids]
+        self._by_units = self.ids[np.argsort(units, kind="stable")]
+        self._sorted_units = self._units[self._by_units]
+        self._by_chars = self.ids[np.argsort(chars, kind="stable")]
+        self._sorted_chars = self._chars[self._by_chars]
+        # Distinct lengths, for planning the end of a fill
+        self._lengths = np.unique(self._sorted_units)
+
+    @classmethod
+    def from_compiled(cls, words):
+        """Index a CompiledWords (units come from the file, nothing is encoded)."""
+        return cls(words.units, words.char_counts())
+
+    def __len__(self):
+        return self.ids.size
+
+    @property
+    def min_units(self):
+        return int(self._sorted_units[0]) if self.ids.size else 0
+
+    @property
+    def max_units(self):
+        return int(self._sorted_units[-1]) if self.ids.size else 0
+
+    def _units_range(self, lo, hi):
+        """Span of the units-sorted order with lo <= units <= hi."""
+        return (int(np.searchsorted(self._sorted_units, lo, "left")),
+                int(np.searchsorted(self._sorted_units, hi, "right")))
+
+    def by_units(self, lo, hi):
+        """ids of the words lasting lo..hi units (inclusive), shortest first."""
+        start, stop = self._units_range(lo, hi)
+        return self._by_units[start:stop]
+
+    def by_seconds(self, lo_s, hi_s, unit_s):
+        """ids of the words lasting lo_s..hi_s seconds at unit_s."""
+        return self.by_units(math.ceil(lo_s / unit_s - 1e-9), math.floor(hi_s / unit_s + 1e-9))
+
+    def by_chars(self, lo, hi=None):
+        """ids of the words with lo..hi characters (inclusive; hi defaults to lo)."""
+        hi = lo if hi is None else hi
+        start = int(np.searchsorted(self._sorted_chars, lo, "left"))
+        stop = int(np.searchsorted(self._sorted_chars, hi, "right"))
+        return self._by_chars[start:stop]
+
+    def subset(self, chars=None, units=None):
+        """
+        A smaller index over the words with chars and units in the given
+        (lo, hi) ranges (a single number means exactly that). Built once
+        in O(n), so repeated draws from e.g. "5-letter words" stay O(log n).
+        """
+        keep = np.ones(self.ids.size, dtype=bool)
+        for values, bounds in ((self._chars, chars), (self._units, units)):
+            if bounds is None:
+                continue
+            lo, hi = (bounds, bounds) if np.isscalar(bounds) else bounds
+            selected = values[self.ids]
+            keep &= (selected >= lo) & (selected <= hi)
+        return DurationIndex(self._units, self._chars, self.ids[keep])
+
+    def message_units(self, ids):
+        """Length of ids sent as one message, word gaps included."""
+        return int(self._units[ids].sum()) + WORD_GAP_UNITS * max(len(ids) - 1, 0)
+
+    def seconds(self, ids, unit_s):
+        return self.message_units(ids) * unit_s
+
+    def _pick(self, rng, lo, hi):
+        start, stop = self._units_range(lo, hi)
+        return int(self._by_units[rng.randrange(start, stop)]) if stop > start else None
+
+    def fill(self, budget_s, unit_s, rng):
+        """
+        Random words whose message fills budget_s at unit_s: exactly, to
+        the list's unit granularity (every length is a whole number of
+        units, and encode_to_morse lengths are all even), whenever the
+        list's lengths can make up the last stretch. rng is a
+        random.Random. Each draw is a couple of searchsorted calls on the
+        remaining budget; only the last two words look at the distinct
+        lengths (a few dozen at most), never at the whole list.
+        """
+        if not self.ids.size:
+            return []
+        gap = WORD_GAP_UNITS
+        step = math.gcd(gap, *(int(v) for v in self._lengths))
+        # Count every word with a trailing word gap and give the budget one
+        # too, since the last word has none.
+        remaining = math.floor(budget_s / unit_s + 1e-9) // step * step + gap
+        cost_min, cost_max = self.min_units + gap, self.max_units + gap
+        picks = []
+        while remaining >= cost_min:
+            if remaining <= cost_max:
+                pick = self._pick(rng, remaining - gap, remaining - gap)
+                if pick is not None:
+                    # A word of exactly the remaining length finishes the budget
+                    picks.append(pick)
+                    break
+            if remaining <= 2 * cost_max:
+                # Two words left: choose the first so that the second fits exactly
+                lengths = self._lengths
+                fits = lengths[np.isin(remaining - 2 * gap - lengths, lengths)]
+                if fits.size:
+                    length = int(fits[rng.randrange(fits.size)])
+                    picks.append(self._pick(rng, length, length))
+                    remaining -= length + gap
+                    continue
+            # Prefer words that leave room for at least one more; otherwise
+            # take the longest that fits and stop
+            pick = self._pick(rng, 0, remaining - cost_min - gap)
+            if pick is None:
+                start, stop = self._units_range(0, remaining - gap)
+                picks.append(int(self._by_units[stop - 1]))
+                break
+            picks.append(pick)
+            remaining -= int(self._units[pick]) + gap
+        return picks
@@ -0,0 +1,232 @@
+"""
+Batch export of practice_words CSV entries to WAV drills.
+
+Every (word, wpm, freq) combination is rendered to its own file:
+
+    <out>/<csv name>/<wpm>wpm_<freq>hz/<row>_<word>.wav
+
+<row> is zero-padded to ROW_DIGITS whatever the list's length, so adding
+rows never renames the files already exported. Work is spread over a
+process pool in chunks, and files that already exist are skipped, so an
+interrupted export can simply be re-run.
+
+    python -m practice_words.export words.csv [more.csv ...] --out drills \\
+        --wpm 15 20 25 --freq 528 --workers 8
+
+With any of band_sim's options (--snr, --qsb, --qrm, ...) every drill is
+rendered under those band conditions instead, seeded from its file name
+so a re-run produces the same file. The conditions are named in the
+directory (<wpm>wpm_<freq>hz_snr3_qrm2, see band_sim.conditions_tag), so
+drills made under different conditions never pass for each other.
+
+With --budget SECONDS each CSV instead gives --drills timed drills per
+speed and tone: random words (of --chars characters, if given) sent as
+one message lasting exactly that long, picked through a DurationIndex.
+Each WAV gets a .txt answer key next to it:
+
+    <out>/<csv name>/<wpm>wpm_<freq>hz/timed_<budget>s[_<chars>ch]_<n>.wav
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import band_sim
+from audio_backend import write_wav
+from morse_render import SAMPLE_RATE, TONE_FREQ_HZ, VOLUME, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+from practice_words.mode import load_words
+from practice_words.compiled import load_compiled
+from practice_words.duration import DurationIndex
+
+DEFAULT_WPMS = (15, 20, 25)
+CHUNK_SIZE = 256
+ROW_DIGITS = 7
+PROGRESS_INTERVAL_S = 1.0
+
+
+def _safe_name(word, max_len=40):
+    return re.sub(r"[^A-Za-z0-9]+", "_", word).strip("_")[:max_len] or "word"
+
+
+def _drill_dir(base, wpm, freq, conditions):
+    tag = band_sim.conditions_tag(conditions)
+    return os.path.join(base, f"{wpm}wpm_{freq:g}hz" + (f"_{tag}" if tag else ""))
+
+
+def plan_exports(csv_paths, out_dir, wpms, freqs, counts=None, conditions=None):
+    """
+    Yield (word, wpm, freq, path) for every file that does not exist yet
+    in the directory for these conditions. Files already on disk are
+    counted in counts["skipped"].
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("skipped", 0)
+    for csv_path in csv_paths:
+        rows = load_words(csv_path)
+        base = os.path.join(out_dir, os.path.splitext(os.path.basename(csv_path))[0])
+        for wpm in wpms:
+            for freq in freqs:
+                sub = _drill_dir(base, wpm, freq, conditions)
+                os.makedirs(sub, exist_ok=True)
+                existing = set(os.listdir(sub))
+                for i, (word, _definition) in enumerate(rows):
+                    name = f"{i:0{ROW_DIGITS}d}_{_safe_name(word)}.wav"
+                    if name in existing:
+                        counts["skipped"] += 1
+                        continue
+                    yield word, wpm, freq, os.path.join(sub, name)
+
+
+def plan_timed_exports(csv_paths, out_dir, wpms, freqs, budget_s, chars=None, drills=1, counts=None,
+                       conditions=None):
+    """
+    Yield (text, wpm, freq, path) for every timed drill not on disk yet,
+    writing its answer key (the words, one per line) as it goes. Words are
+    chosen with a generator seeded from the file's path under out_dir, so
+    a re-run of an interrupted export plans the same drills.
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("skipped", 0)
+    for csv_path in csv_paths:
+        words = load_compiled(csv_path)
+        index = DurationIndex.from_compiled(words)
+        if chars:
+            index = index.subset(chars=chars)
+        base = os.path.join(out_dir, os.path.splitext(os.path.basename(csv_path))[0])
+        stem = f"timed_{budget_s:g}s" + (f"_{chars}ch" if chars else "")
+        for wpm in wpms:
+            for freq in freqs:
+                sub = _drill_dir(base, wpm, freq, conditions)
+                os.makedirs(sub, exist_ok=True)
+                for n in range(drills):
+                    name = f"{stem}_{n}.wav"
+                    path = os.path.join(sub, name)
+                    if os.path.exists(path):
+                        counts["skipped"] += 1
+                        continue
+                    rng = random.Random(zlib.crc32(os.path.relpath(path, out_dir).encode("utf-8")))
+                    plan = [words[i].word for i in index.fill(budget_s, seconds_per_unit(wpm), rng)]
+                    if not plan:
+                        print(f"{csv_path}: no words fit {budget_s:g} s at {wpm} WPM", file=sys.stderr)
+                        break
+                    with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as key:
+                        key.write("\n".join(plan) + "\n")
+                    yield " ".join(plan), wpm, freq, path
+
+
+def export_chunk(tasks, conditions=None):
+    """
+    Render one chunk of (word, wpm, freq, path), clean or under band_sim
+    conditions; returns (files, audio seconds).
+    """
+    audio_s = 0.0
+    for word, wpm, freq, path in tasks:
+        if conditions:
+            seed = zlib.crc32(os.path.basename(path).encode("utf-8"))
+            audio = band_sim.make_sim(word, wpm, freq, sample_rate=SAMPLE_RATE, seed=seed,
+                                      **conditions).render()
+        else:
+            audio = render_morse(encode_to_morse(word), seconds_per_unit(wpm), freq, VOLUME, SAMPLE_RATE)
+        # Write under a temporary name so an interrupted run never leaves
+        # a truncated file that a re-run would skip.
+        tmp = path + ".part"
+        write_wav(tmp, audio, SAMPLE_RATE)
+        os.replace(tmp, path)
+        audio_s += audio.size / float(SAMPLE_RATE)
+    return len(tasks), audio_s
+
+
+def _chunks(tasks, size):
+    chunk = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export(csv_paths, out_dir, wpms=DEFAULT_WPMS, freqs=(TONE_FREQ_HZ,), workers=None,
+           chunk_size=CHUNK_SIZE, progress=True, conditions=None, budget_s=None, chars=None, drills=1):
+    """
+    Render every missing drill file; returns a summary dict. conditions
+    are band_sim.make_sim keyword arguments, or None for clean audio.
+    With budget_s, renders timed drills (see plan_timed_exports) instead
+    of one file per word.
+    """
+    workers = workers or os.cpu_count() or 1
+    counts = {"skipped": 0}
+    if budget_s:
+        tasks = plan_timed_exports(csv_paths, out_dir, wpms, freqs, budget_s, chars, drills, counts, conditions)
+        chunk_size = 1           # each task is a whole drill
+    else:
+        tasks = plan_exports(csv_paths, out_dir, wpms, freqs, counts, conditions)
+    chunks = _chunks(tasks, chunk_size)
+    done = 0
+    audio_s = 0.0
+    t0 = last_report = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of chunks in flight so planning never runs
+        # far ahead of rendering on huge word lists.
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(export_chunk, chunk, conditions))
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    n, secs = f.result()
+                    done += n
+                    audio_s += secs
+            now = time.perf_counter()
+            if progress and now - last_report >= PROGRESS_INTERVAL_S:
+                _report(done, audio_s, now - t0)
+                last_report = now
+        for f in pending:
+            n, secs = f.result()
+            done += n
+            audio_s += secs
+
+    elapsed = time.perf_counter() - t0
+    if progress:
+        _report(done, audio_s, elapsed, final=True)
+        print(f"Skipped {counts['skipped']} existing file(s).", file=sys.stderr)
+    return {"written": done, "skipped": counts["skipped"], "audio_s": audio_s, "elapsed_s": elapsed}
+
+
+def _report(done, audio_s, elapsed, final=False):
+    rate = done / elapsed if elapsed > 0 else 0.0
+    speed = audio_s / elapsed if elapsed > 0 else 0.0
+    end = "\n" if final else "\r"
+    print(f"{done} files | {rate:.0f} files/s | {speed:.0f}x realtime", end=end, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export practice_words CSV entries to WAV drills.")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("--out", default="drills", help="output directory (default: drills)")
+    parser.add_argument("--wpm", type=int, nargs="+", default=list(DEFAULT_WPMS))
+    parser.add_argument("--freq", type=float, nargs="+", default=[TONE_FREQ_HZ])
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="words per task")
+    parser.add_argument("--budget", type=float, metavar="SECONDS",
+                        help="write timed drills of this length instead of one file per word")
+    parser.add_argument("--chars", type=int, help="with --budget: only words of this many characters")
+    parser.add_argument("--drills", type=int, default=1, help="with --budget: drills per speed and tone")
+    band_sim.add_arguments(parser)
+    args = parser.parse_args(argv)
+    export(args.csv, args.out, args.wpm, args.freq, args.workers, args.chunk_size,
+           conditions=band_sim.conditions_from_args(args), budget_s=args.budget, chars=args.chars,
+           drills=args.drills)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,79 @@
 
 import csv
-import random
-from morse_utils import encode_to_morse
-from audio_pygame import play_morse
+import os
+import time
+from audio_backend import get_backend, play_pcm
+from morse_render import PrefixRender, evict_stale_tones, seconds_per_unit
+from drill_selector import DrillSelector, state_path
 
 EXIT_COMMAND = "/quit"
 
-def seconds_per_unit(wpm):
-    return 1.2 / float(wpm)
-
-def load_words(csv_path):
+def detect_columns(first):
+    """
+    Decide from the first CSV row whether the file has a header.
+    Returns (has_header, idx_word, idx_def); idx_def is None when there is
+    no definition column.
     """
-    Load rows of (word, definition) from a CSV file.
+    header_lower = [c.strip().lower() for c in first]
+    if any(h in ("word", "definition", "def", "meaning") for h in header_lower):
+        idx_word = None
+        idx_def = None
+        for i, h in enumerate(header_lower):
+            if idx_word is None and h in ("word", "term", "text"):
+                idx_word = i
+            if idx_def is None and h in ("definition", "def", "meaning", "hint"):
+                idx_def = i
+        if idx_word is None:
+            # fallback to first column
+            idx_word = 0
+        if idx_def is None:
+            # fallback to second if exists
+            idx_def = 1 if len(first) > 1 else None
+        return True, idx_word, idx_def
+    # No header: positional (word, definition) columns
+    return False, 0, 1
+
+def row_entry(row, idx_word, idx_def):
+    """(word, definition) for one parsed CSV row, or None for blank/malformed rows."""
+    if not row:
+        return None
+    w = row[idx_word].strip() if idx_word < len(row) else ""
+    d = row[idx_def].strip() if (idx_def is not None and idx_def < len(row)) else ""
+    return (w, d) if w else None
+
+def iter_words(csv_path):
+    """
+    Yield (word, definition) rows from a CSV file, one at a time.
     Accepts a header with names like 'word' and 'definition' or positional columns.
     Skips blank or malformed rows.
     """
-    rows = []
     with open(csv_path, newline='', encoding='utf-8') as f:
         reader = csv.reader(f)
         # Peek first row to decide if it's a header
         first = next(reader, None)
         if first is None:
-            return rows
-        # Determine header
-        header_lower = [c.strip().lower() for c in first]
-        if any(h in ("word", "definition", "def", "meaning") for h in header_lower):
-            # Treat as headered file
-            idx_word = None
-            idx_def = None
-            for i, h in enumerate(header_lower):
-                if idx_word is None and h in ("word", "term", "text"):
-                    idx_word = i
-                if idx_def is None and h in ("definition", "def", "meaning", "hint"):
-                    idx_def = i
-            if idx_word is None:
-                # fallback to first column
-                idx_word = 0
-            if idx_def is None:
-                # fallback to second if exists
-                idx_def = 1 if len(first) > 1 else None
-
-            for row in reader:
-                if not row:
-                    continue
-                w = row[idx_word].strip() if idx_word < len(row) else ""
-                d = row[idx_def].strip() if (idx_def is not None and idx_def < len(row)) else ""
-                if w:
-                    rows.append((w, d))
-        else:
+            return
+        has_header, idx_word, idx_def = detect_columns(first)
+        if not has_header:
             # Treat as data row
-            if first and first[0].strip():
-                rows.append((first[0].strip(), first[1].strip() if len(first) > 1 else ""))
-            for row in reader:
-                if not row:
-                    continue
-                w = row[0].strip()
-                d = row[1].strip() if len(row) > 1 else ""
-                if w:
-                    rows.append((w, d))
-    return rows
+            entry = row_entry(first, idx_word, idx_def)
+            if entry:
+                yield entry
+        for row in reader:
+            entry = row_entry(row, idx_word, idx_def)
+            if entry:
+                yield entry
 
-def _strip_non_alnum(s: str) -> str:
-    # Keep letters and digits; collapse spaces/hyphens/underscores for practice
-    return "".join(ch for ch in s if ch.isalnum())
+def load_words(csv_path):
+    """All (word, definition) rows of a CSV file as a list; see iter_words."""
+    return list(iter_words(csv_path))
 
-def practice_mode(unit_s, csv_path, limit=None):
+def practice_mode(unit_s, csv_path, limit=None, selector=None):
     """
     Progressive per-character practice for WORDS from a CSV.
 
     Flow for each round:
-      1) Pick a random word W.
+      1) Pick a word W (missed and slow words come up more often).
       2) Play Morse for the first character of W.
       3) User guesses the character:
          - If correct, play Morse for W[:2] and guess the 2nd char,
@@ -77,9 +81,15 @@ def practice_mode(unit_s, csv_path, limit=None):
          - If incorrect, tell them and replay the current prefix.
       4) Reveal with /n, repeat with /r, change speed with /s <wpm>, or /quit to exit.
       5) You may also type the entire word at any time to finish the round.
+
+    Words are drawn by a DrillSelector (built over the loaded list unless
+    one is passed in); a word counts as known when it is completed without
+    a wrong guess.
     """
+    # Imported here: compiled builds on iter_words above
+    from practice_words.compiled import entry_key, open_word_list
     try:
-        rows = load_words(csv_path)
+        rows = open_word_list(csv_path)
     except FileNotFoundError:
         print(f"CSV not found: {csv_path}")
         return
@@ -91,6 +101,28 @@ def practice_mode(unit_s, csv_path, limit=None):
         print("No words found in CSV. Ensure it has at least one column with words, and optional definition.")
         return
 
+    if selector is None:
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        selector = DrillSelector(rows, key=entry_key, state_path=state_path(f"words_{stem}_progressive"))
+    try:
+        _run(unit_s, csv_path, rows, limit, selector)
+    finally:
+        selector.save()
+
+def _prefix_audio(renders, codes, unit_s, n_chars):
+    """
+    PCM of the first n_chars codes at unit_s. Each speed keeps its own
+    PrefixRender, which only renders the characters it has not seen yet.
+    """
+    render = renders.get(unit_s)
+    if render is None:
+        render = renders[unit_s] = PrefixRender(unit_s, sample_rate=get_backend().sample_rate)
+    while render.n_chars < n_chars:
+        render.append(codes[render.n_chars])
+    return render.audio
+
+def _run(unit_s, csv_path, rows, limit, selector):
+    from practice_words.compiled import canonical_form
     print(f"\nPractice Words Mode (progressive): Using {csv_path} with {len(rows)} entries.")
     print("Guess one character at a time. After each correct guess, the sequence grows and is replayed.")
     print("Commands: /r to repeat, /n to reveal+next, /s <wpm> to change speed, /quit to exit.\n")
@@ -101,26 +133,33 @@ def practice_mode(unit_s, csv_path, limit=None):
             print("Reached round limit. Exiting practice words mode.")
             break
 
-        word, definition = random.choice(rows)
+        i = selector.pick()
+        entry = rows[i]
+        word, definition = entry.word, entry.definition
         # canonical version for matching
-        canonical = _strip_non_alnum(word).upper()
+        canonical = entry.canonical
         if not canonical:
-            # skip weird rows
+            # skip weird rows, and stop drawing them
+            selector.exclude(i)
             continue
 
         # progressive index (0-based char we want the user to identify next)
         idx = 0
+        # One Morse code per canonical character; the prefix audio is
+        # extended a character at a time rather than re-rendered
+        codes = entry.canonical_morse.split(" ")
+        renders = {}
         # Always start by playing the first char
-        prefix = canonical[: idx + 1]
-        morse_prefix = encode_to_morse(prefix)
-        play_morse(morse_prefix, unit_s)
+        play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
+        started = time.monotonic()
+        missed = False
 
         while True:
             prompt = f"Guess char #{idx+1} (or type the whole word): "
             answer = input(prompt).strip()
             if not answer:
                 # empty input == repeat
-                play_morse(morse_prefix, unit_s)
+                play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
                 continue
 
             # Commands (case-insensitive)
@@ -128,9 +167,10 @@ def practice_mode(unit_s, csv_path, limit=None):
             if upper == EXIT_COMMAND.upper():
                 return
             elif upper == "/R":
-                play_morse(morse_prefix, unit_s)
+                play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
                 continue
             elif upper == "/N":
+                selector.record(i, False)
                 print(f"Reveal → Word: {word}")
                 if definition:
                     print(f"Definition: {definition}")
@@ -141,21 +181,24 @@ def practice_mode(unit_s, csv_path, limit=None):
                 try:
                     wpm = int(upper.split()[1])
                     unit_s = seconds_per_unit(wpm)
+                    evict_stale_tones(unit_s)
                     print(f"Speed changed to {wpm} WPM.")
-                    play_morse(morse_prefix, unit_s)
+                    play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
                 except Exception:
                     print("Invalid speed. Usage: /s <wpm>")
                 continue
 
             # If they typed multiple characters, allow a full-word solve
             if len(answer) > 1:
-                if _strip_non_alnum(answer).upper() == canonical:
+                if canonical_form(answer) == canonical:
+                    selector.record(i, not missed, (time.monotonic() - started) / len(canonical))
                     print(f"Correct! The word was: {word}\n")
                     rounds += 1
                     break
                 else:
+                    missed = True
                     print("Not quite. Keep going—listen again.")
-                    play_morse(morse_prefix, unit_s)
+                    play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
                     continue
 
             # Single-character guess path
@@ -164,6 +207,7 @@ def practice_mode(unit_s, csv_path, limit=None):
             if guess == correct:
                 idx += 1
                 if idx == len(canonical):
+                    selector.record(i, not missed, (time.monotonic() - started) / len(canonical))
                     print(f"Great! Completed: {word}")
                     if definition:
                         print(f"Definition: {definition}")
@@ -172,9 +216,8 @@ def practice_mode(unit_s, csv_path, limit=None):
                     break
                 else:
                     # Grow the sequence by one and replay
-                    prefix = canonical[: idx + 1]
-                    morse_prefix = encode_to_morse(prefix)
-                    play_morse(morse_prefix, unit_s)
+                    play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
             else:
+                missed = True
                 print(f"Incorrect for position {idx+1}. Try again. (Hint: target length {len(canonical)})")
-                play_morse(morse_prefix, unit_s)
+                play_pcm(_prefix_audio(renders, codes, unit_s, idx + 1))
@@ -1,66 +1,11 @@
-
-import csv
+import os
 import random
-from morse_utils import encode_to_morse
-from audio_pygame import play_morse
-
-EXIT_COMMAND = "/quit"
-
-def seconds_per_unit(wpm):
-    return 1.2 / float(wpm)
-
-def load_words(csv_path):
-    """
-    Load rows of (word, definition) from a CSV file.
-    Accepts a header with names like 'word' and 'definition' or positional columns.
-    Skips blank or malformed rows.
-    """
-    rows = []
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        # Peek first row to decide if it's a header
-        first = next(reader, None)
-        if first is None:
-            return rows
-        # Determine header
-        header_lower = [c.strip().lower() for c in first]
-        if any(h in ("word", "definition", "def", "meaning") for h in header_lower):
-            # Treat as headered file
-            idx_word = None
-            idx_def = None
-            for i, h in enumerate(header_lower):
-                if idx_word is None and h in ("word", "term", "text"):
-                    idx_word = i
-                if idx_def is None and h in ("definition", "def", "meaning", "hint"):
-                    idx_def = i
-            if idx_word is None:
-                # fallback to first column
-                idx_word = 0
-            if idx_def is None:
-                # fallback to second if exists
-                idx_def = 1 if len(first) > 1 else None
+from drill_selector import DrillSelector, state_path
+from drill_console import run_drill
+from drill_engine import WordDrill
+from practice_words.compiled import entry_key, load_compiled, open_word_list
 
-            for row in reader:
-                if not row:
-                    continue
-                w = row[idx_word].strip() if idx_word < len(row) else ""
-                d = row[idx_def].strip() if (idx_def is not None and idx_def < len(row)) else ""
-                if w:
-                    rows.append((w, d))
-        else:
-            # Treat as data row
-            if first and first[0].strip():
-                rows.append((first[0].strip(), first[1].strip() if len(first) > 1 else ""))
-            for row in reader:
-                if not row:
-                    continue
-                w = row[0].strip()
-                d = row[1].strip() if len(row) > 1 else ""
-                if w:
-                    rows.append((w, d))
-    return rows
-
-def practice_mode(unit_s, csv_path, limit=None):
+def practice_mode(unit_s, csv_path, limit=None, selector=None, budget_s=None, chars=None):
     """
     Console practice mode similar to practice1:
     - Plays a random WORD from the CSV as Morse
@@ -70,9 +15,16 @@ def practice_mode(unit_s, csv_path, limit=None):
       /n         reveal the word + definition, then go to next
       /s <wpm>   change speed
       /quit      exit
+    Words are drawn by a DrillSelector (built over the loaded list unless
+    one is passed in), so missed and slow words come back more often.
+
+    With budget_s the drill is instead a fixed set of random words (of
+    `chars` characters, if given) whose Morse at unit_s adds up to
+    budget_s seconds, picked through a DurationIndex.
     """
     try:
-        rows = load_words(csv_path)
+        # Timed drills need every word's length in units up front
+        rows = load_compiled(csv_path) if budget_s else open_word_list(csv_path)
     except FileNotFoundError:
         print(f"CSV not found: {csv_path}")
         return
@@ -84,55 +36,24 @@ def practice_mode(unit_s, csv_path, limit=None):
         print("No words found in CSV. Ensure it has at least one column with words, and optional definition.")
         return
 
-    print(f"\nPractice Words Mode: Using {csv_path} with {len(rows)} entries.")
-    print("Type the word you hear in Morse.")
-    print("Commands: /r to repeat, /n to reveal+next, /s <wpm> to change speed, /quit to exit.\n")
-
-    rounds = 0
-    while True:
-        if limit is not None and rounds >= limit:
-            print("Reached round limit. Exiting practice words mode.")
-            break
-        word, definition = random.choice(rows)
-        morse = encode_to_morse(word)
-        play_morse(morse, unit_s)
-
-        while True:
-            answer = input("Your answer (word): ").strip()
-            if not answer:
-                # empty repeats
-                play_morse(morse, unit_s)
-                continue
-
-            upper = answer.upper()
-            if upper == EXIT_COMMAND.upper():
-                return
-            elif upper == "/R":
-                play_morse(morse, unit_s)
-                continue
-            elif upper == "/N":
-                print(f"Reveal → Word: {word}")
-                if definition:
-                    print(f"Definition: {definition}")
-                print()
-                rounds += 1
-                break
-            elif upper.startswith("/S "):
-                try:
-                    wpm = int(upper.split()[1])
-                    unit_s = seconds_per_unit(wpm)
-                    print(f"Speed changed to {wpm} WPM.")
-                    play_morse(morse, unit_s)
-                except Exception:
-                    print("Invalid speed. Usage: /s <wpm>")
-                continue
-            else:
-                if answer.strip().lower() == word.strip().lower():
-                    print("Correct!\n")
-                else:
-                    print(f"Incorrect. The word was: {word}")
-                    if definition:
-                        print(f"Definition: {definition}")
-                    print()
-                rounds += 1
-                break
+    if selector is None:
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        selector = DrillSelector(rows, key=entry_key, state_path=state_path(f"words_{stem}"))
+    plan = None
+    if budget_s:
+        plan = timed_plan(rows, budget_s, unit_s, chars)
+        if not plan:
+            print("No words fit that time budget" + (f" with {chars} characters." if chars else "."))
+            return
+    try:
+        run_drill(WordDrill(selector, csv_path, limit, plan), unit_s)
+    finally:
+        selector.save()
+
+def timed_plan(rows, budget_s, unit_s, chars=None, rng=None):
+    """Row indices of random words filling budget_s seconds of Morse at unit_s."""
+    from practice_words.duration import DurationIndex
+    index = DurationIndex.from_compiled(rows)
+    if chars:
+        index = index.subset(chars=chars)
+    return index.fill(budget_s, unit_s, rng or random.Random())
@@ -0,0 +1,184 @@
+"""
+Lazily loaded, indexed access to large word-list CSVs.
+
+WordStore scans the CSV once and records the byte range of every usable
+(word, definition) row. The index is cached next to the CSV
+(<csv>.idx) and rebuilt when the CSV's size or mtime changes. Rows are
+parsed on demand from an mmap of the CSV, so opening a multi-million row
+file is near-instant and random.choice(store) is O(1).
+
+Header detection and row rules are the same as mode.iter_words. For the
+practice modes, compiled.open_word_list wraps a WordStore in StoreWords
+when the compiled list is missing or out of date, so a new or edited CSV
+only costs this scan rather than a full compile.
+"""
+import csv
+import io
+import mmap
+import os
+import struct
+from array import array
+
+from practice_words.mode import detect_columns, row_entry
+
+INDEX_SUFFIX = ".idx"
+_MAGIC = b"MWIDX\x00\x00\x01"
+# magic, csv mtime_ns, csv size, row count, idx_word, idx_def (-1 = none)
+_HEADER = struct.Struct("<8sqqqqq")
+
+
+def _parse_record(data):
+    """Parse one CSV record (bytes, possibly spanning lines) into a row list."""
+    return next(csv.reader(io.StringIO(data.decode("utf-8"), newline="")), [])
+
+
+def _records(f):
+    """
+    Yield (start, end, data) for each CSV record in binary file f.
+    Newlines inside quoted fields do not end a record: a record is
+    complete once it holds an even number of quote characters.
+    """
+    start = pos = 0
+    quotes = 0
+    lines = []
+    for line in f:
+        pos += len(line)
+        quotes += line.count(b'"')
+        lines.append(line)
+        if quotes % 2 == 0:
+            yield start, pos, b"".join(lines)
+            start = pos
+            quotes = 0
+            lines = []
+    if lines:
+        yield start, pos, b"".join(lines)
+
+
+def build_index(csv_path):
+    """Scan csv_path; returns (offsets array of start/end pairs, idx_word, idx_def)."""
+    offsets = array("Q")
+    idx_word, idx_def = 0, 1
+    with open(csv_path, "rb") as f:
+        records = _records(f)
+        first = next(records, None)
+        if first is None:
+            return offsets, idx_word, idx_def
+        start, end, data = first
+        row = _parse_record(data)
+        has_header, idx_word, idx_def = detect_columns(row)
+        if not has_header and row_entry(row, idx_word, idx_def):
+            offsets.extend((start, end))
+        for start, end, data in records:
+            if row_entry(_parse_record(data), idx_word, idx_def):
+                offsets.extend((start, end))
+    return offsets, idx_word, idx_def
+
+
+class WordStore:
+    """
+    Sequence of (word, definition) rows backed by the CSV file itself.
+
+        store = WordStore("words.csv")
+        word, definition = random.choice(store)
+    """
+
+    def __init__(self, csv_path, index_path=None, use_cache=True):
+        self.csv_path = csv_path
+        self.index_path = index_path or csv_path + INDEX_SUFFIX
+        st = os.stat(csv_path)
+        self._csv_file = open(csv_path, "rb")
+        self._csv_map = mmap.mmap(self._csv_file.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+
+        self._index_file = None
+        self._index_map = None
+        self._index_view = None
+        loaded = self._load_index(st) if use_cache else None
+        if loaded is None:
+            offsets, self.idx_word, self.idx_def = build_index(csv_path)
+            if use_cache:
+                self._save_index(st, offsets)
+            self._offsets = offsets
+        else:
+            self._offsets = loaded
+        self._count = len(self._offsets) // 2
+
+    # -- index cache -----------------------------------------------------
+
+    def _load_index(self, st):
+        try:
+            f = open(self.index_path, "rb")
+        except OSError:
+            return None
+        try:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size:
+                f.close()
+                return None
+            magic, mtime_ns, size, count, idx_word, idx_def = _HEADER.unpack(head)
+            if magic != _MAGIC or mtime_ns != st.st_mtime_ns or size != st.st_size:
+                f.close()
+                return None
+            self.idx_word = idx_word
+            self.idx_def = None if idx_def < 0 else idx_def
+            if not count:
+                f.close()
+                return array("Q")
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, struct.error):
+            f.close()
+            return None
+        self._index_file = f
+        self._index_view = memoryview(self._index_map)
+        return self._index_view[_HEADER.size:_HEADER.size + 16 * count].cast("Q")
+
+    def _save_index(self, st, offsets):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, st.st_mtime_ns, st.st_size, len(offsets) // 2,
+                                     self.idx_word, -1 if self.idx_def is None else self.idx_def))
+                offsets.tofile(f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            # Read-only location: keep the in-memory index for this session
+            pass
+
+    # -- sequence protocol -------------------------------------------------
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("WordStore index out of range")
+        start = self._offsets[2 * i]
+        end = self._offsets[2 * i + 1]
+        return row_entry(_parse_record(self._csv_map[start:end]), self.idx_word, self.idx_def)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        # Views into the index mmap must be released before it can close
+        for view in (self._offsets, self._index_view):
+            if isinstance(view, memoryview):
+                view.release()
+        self._offsets = array("Q")
+        self._index_view = None
+        self._count = 0
+        for m in (self._index_map, self._csv_map):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in (self._index_file, self._csv_file):
+            if f is not None:
+                f.close()
+        self._index_map = self._index_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
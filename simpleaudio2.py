@@ -1,46 +1,37 @@
-import numpy as np
-import audio_simpleaudio as sa
+"""
+Playback through simpleaudio WaveObjects. simpleaudio is an optional extra
+(pip install simpleaudio) and not in requirements.txt.
+"""
+import simpleaudio as sa
 import time
+from morse_render import (
+    TONE_FREQ_HZ, VOLUME, SAMPLE_RATE,
+    UNIT_DOT_MULT, UNIT_DASH_MULT, UNIT_GAP_INTRA, UNIT_GAP_INTER, UNIT_GAP_WORD,
+    render_morse,
+)
+from morse_profile import record
+from tone_cache import cached_tone
+from tone_synth import synth_tone
 
-TONE_FREQ_HZ = 528
-VOLUME = 0.5
-SAMPLE_RATE = 44100
-
-UNIT_DOT_MULT = 1.0
-UNIT_DASH_MULT = 3.0
-UNIT_GAP_INTRA = 1.0      # gap between symbols within a character
-UNIT_GAP_INTER = 3.0      # gap between characters
-UNIT_GAP_WORD = 7.0       # gap between words
-
-def make_tone_buffer(freq_hz, duration_sec, volume, sample_rate):
+def _synth_tone_buffer(freq_hz, duration_sec, volume, sample_rate):
     """
     Build a sine tone as a simpleaudio WaveObject (16-bit PCM, mono).
-    Includes a 5 ms fade-in/out to avoid clicks.
+    Includes raised-cosine ramps (tone_synth) to avoid clicks.
     """
-    duration_sec = max(0.0, float(duration_sec))
-    n_samples = max(1, int(duration_sec * sample_rate))
-
-    # Time base
-    t = np.arange(n_samples, dtype=np.float64) / sample_rate
-    wave = np.sin(2.0 * np.pi * float(freq_hz) * t)
-
-    # Fade-in/out (5 ms each) to prevent clicks
-    fade_len = int(0.005 * sample_rate)
-    if fade_len * 2 < n_samples:
-        envelope = np.ones(n_samples, dtype=np.float64)
-        envelope[:fade_len] = np.linspace(0.0, 1.0, fade_len, endpoint=True)
-        envelope[-fade_len:] = np.linspace(1.0, 0.0, fade_len, endpoint=True)
-        wave *= envelope
+    audio_i16 = synth_tone(freq_hz, duration_sec, volume, sample_rate)
 
-    # Clamp volume to [0, 1] and scale to int16
-    vol = max(0.0, min(1.0, float(volume)))
-    audio_i16 = np.int16(wave * vol * 32767)
+    # WaveObject keeps the array itself (buffer protocol), not a bytes copy
+    return sa.WaveObject(audio_i16, num_channels=1, bytes_per_sample=2, sample_rate=sample_rate)
 
-    # Create a WaveObject: mono (1 channel), 2 bytes/sample, given sample rate
-    return sa.WaveObject(audio_i16.tobytes(), num_channels=1, bytes_per_sample=2, sample_rate=sample_rate)
+def make_tone_buffer(freq_hz, duration_sec, volume, sample_rate):
+    """Cached WaveObject for this tone; built once per (freq, duration, volume, rate)."""
+    return cached_tone("simpleaudio2", freq_hz, duration_sec, volume, sample_rate, _synth_tone_buffer)
 
 def play_silence(duration_sec):
-    time.sleep(max(0.0, float(duration_sec)))
+    duration_sec = max(0.0, float(duration_sec))
+    t0 = time.perf_counter()
+    time.sleep(duration_sec)
+    record("gap_sleep", time.perf_counter() - t0 - duration_sec)
 
 def play_tone(duration_sec):
     wave_obj = make_tone_buffer(TONE_FREQ_HZ, duration_sec, VOLUME, SAMPLE_RATE)
@@ -59,6 +50,17 @@ def play_symbol(symbol, unit_s):
 
 def play_morse(morse_text, unit_s):
     """
+    Render the whole message into one buffer and play it as a single
+    WaveObject, so element timing is sample-accurate instead of depending
+    on sleep/wait_done() jitter between symbols.
+    """
+    audio = render_morse(morse_text, unit_s, TONE_FREQ_HZ, VOLUME, SAMPLE_RATE)
+    if audio.size:
+        sa.WaveObject(audio, num_channels=1, bytes_per_sample=2, sample_rate=SAMPLE_RATE).play().wait_done()
+
+def play_morse_per_symbol(morse_text, unit_s):
+    """
+    Previous symbol-by-symbol player, kept for benchmarking against play_morse.
     morse_text: string of '.', '-', ' ' (char gap), '/' (word gap)
     unit_s: length of one Morse "unit" in seconds
     """
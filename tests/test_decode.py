@@ -0,0 +1,50 @@
+import pytest
+
+from morse_decode import MorseDecoder, decode_stream
+from morse_render import SAMPLE_RATE, render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+TEXT = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG 0123456789 PARIS CQ DE W1AW"
+SPEEDS = [5, 10, 15, 20, 30, 40, 60]
+
+
+def round_trip(text, wpm, hint_wpm, chunk=4096):
+    audio = render_morse(encode_to_morse(text), seconds_per_unit(wpm))
+    decoder = MorseDecoder(SAMPLE_RATE, wpm=hint_wpm)
+    chunks = (audio[i:i + chunk] for i in range(0, audio.size, chunk))
+    return "".join(decode_stream(chunks, decoder=decoder)).strip(), decoder
+
+
+@pytest.mark.parametrize("wpm", SPEEDS)
+def test_round_trip_with_matching_hint(wpm):
+    out, decoder = round_trip(TEXT, wpm, wpm)
+    assert out == TEXT
+    assert decoder.wpm == pytest.approx(wpm, rel=0.15)
+
+
+@pytest.mark.parametrize("wpm", SPEEDS)
+def test_round_trip_with_default_hint(wpm):
+    # The first marks are measured before anything is decoded, so a hint
+    # off by 3x either way still gets the opening characters right
+    out, decoder = round_trip(TEXT, wpm, 20)
+    assert out == TEXT
+    assert decoder.wpm == pytest.approx(wpm, rel=0.15)
+
+
+@pytest.mark.parametrize("chunk", [1, 37, 512, 1 << 20])
+def test_chunking_does_not_change_the_text(chunk):
+    out, _ = round_trip("CQ DE W1AW", 25, 25, chunk)
+    assert out == "CQ DE W1AW"
+
+
+@pytest.mark.parametrize("text", ["E", "T", "EEE", "TTT", "T T T", "M", "SOS"])
+@pytest.mark.parametrize("wpm", [10, 20, 60])
+def test_short_messages_with_matching_hint(text, wpm):
+    assert round_trip(text, wpm, wpm)[0] == text
+
+
+def test_one_kind_of_mark_goes_by_the_hint():
+    # Dahs at 20 WPM are as long as dits at about 7 WPM, and with no dit
+    # or one-unit gap to compare them with, the hint decides which they are
+    assert round_trip("TTT", 20, 7)[0] == "S"
+    assert round_trip("EEE", 7, 20)[0] == "T T T"
@@ -0,0 +1,54 @@
+import pytest
+
+import drill_console
+from drill_engine import GroupDrill, WordDrill
+from drill_selector import DrillSelector
+from practice_words.compiled import CompiledWords, compile_rows
+
+WORDS = [f"W{i}" for i in range(6)]
+
+
+@pytest.fixture
+def played(monkeypatch):
+    """Texts handed to the backend, in order (render_text/play_pcm stubbed to pass the text through)."""
+    out = []
+    monkeypatch.setattr(drill_console, "get_backend", lambda: None)
+    monkeypatch.setattr(drill_console, "render_text", lambda text, unit_s: (text, unit_s))
+    monkeypatch.setattr(drill_console, "play_pcm", lambda audio: out.append(audio))
+    return out
+
+
+def answering(drill, script=()):
+    """read() that answers every round right, first sending script's lines at the given prompt numbers."""
+    script = dict(script)
+    asked = [0]
+
+    def read(prompt):
+        asked[0] += 1
+        return script.pop(asked[0], None) or drill.text
+    return read
+
+
+@pytest.mark.parametrize("depth", [0, 2])
+def test_timed_plan_plays_in_order_across_a_speed_change(played, depth):
+    rows = CompiledWords(compile_rows([(w, "") for w in WORDS]))
+    plan = [0, 1, 2, 3, 4, 5]
+    drill = WordDrill(DrillSelector(rows), "words", plan=plan)
+    drill_console.run_drill(drill, 0.06, answering(drill, {3: "/s 25"}), prefetch_depth=depth)
+    # W2 is replayed at the new speed, then the plan carries on where it was
+    assert [text for text, _ in played] == ["W0", "W1", "W2", "W2", "W3", "W4", "W5"]
+    assert [unit_s for _, unit_s in played] == [0.06] * 3 + [0.048] * 4
+
+
+def test_prefetched_groups_replay_at_the_new_speed(played):
+    drill = GroupDrill(DrillSelector("ABC"), num_chars=3, limit=5)
+    seen = []
+
+    def read(prompt):
+        seen.append(drill.text)
+        return "/s 25" if len(seen) == 2 else drill.text
+    drill_console.run_drill(drill, 0.06, read, prefetch_depth=2)
+    # What was played is what each prompt asked about: the second group twice
+    assert [text for text, _ in played] == seen
+    assert seen[1] == seen[2] and len(seen) == 6
+    assert [unit_s for _, unit_s in played] == [0.06] * 2 + [0.048] * 4
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from drill_prefetch import Prefetcher
+
+
+def settle(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "prefetch worker did not catch up"
+        time.sleep(0.001)
+
+
+class Counter:
+    """A drawer with state: every draw moves on to the next item."""
+
+    def __init__(self):
+        self.n = 0
+        self.threads = set()
+
+    def __call__(self):
+        self.threads.add(threading.current_thread().name)
+        self.n += 1
+        return (f"W{self.n - 1}",)
+
+
+def rendered(log):
+    def render(text, unit_s):
+        log.append((text, unit_s))
+        return (text, unit_s)
+    return render
+
+
+def test_items_come_out_in_draw_order_from_one_drawing_thread():
+    draw, log = Counter(), []
+    prefetch = Prefetcher(draw, rendered(log), 0.06, depth=2)
+    try:
+        got = [prefetch()[0] for _ in range(20)]
+    finally:
+        prefetch.close()
+    assert got == [f"W{i}" for i in range(20)]
+    assert draw.threads == {"drill-prefetch"}
+
+
+def test_set_speed_re_renders_the_drawn_items_in_order():
+    draw, log = Counter(), []
+    prefetch = Prefetcher(draw, rendered(log), 0.06, depth=2)
+    try:
+        assert prefetch()[0] == "W0"
+        settle(lambda: draw.n == 3)              # W1 and W2 ready at the old speed
+        prefetch.set_speed(0.048)
+        settle(lambda: [t for t, u in log if u == 0.048][:2] == ["W1", "W2"])
+        got = []
+        for _ in range(4):
+            text = prefetch()[0]
+            got.append((text, prefetch.audio(text, 0.048)))
+    finally:
+        prefetch.close()
+    assert [t for t, _ in got] == ["W1", "W2", "W3", "W4"]
+    # Nothing drawn at the old speed was lost, and the re-rendered audio is handed out
+    assert got[0][1] == ("W1", 0.048) and got[1][1] == ("W2", 0.048)
@@ -0,0 +1,38 @@
+import random
+
+from drill_selector import UNSEEN_WEIGHT, DrillSelector, SumTree
+
+
+def test_excluded_item_is_never_picked_and_stays_excluded(tmp_path):
+    path = str(tmp_path / "state.json")
+    selector = DrillSelector("ABC", state_path=path, rng=random.Random(1))
+    selector.exclude(1)
+    selector.record(0, False, 1.0)
+    assert "B" not in {selector.choose() for _ in range(200)}
+    selector.save()
+
+    reloaded = DrillSelector("ABC", state_path=path, rng=random.Random(1))
+    assert reloaded.weight(1) == 0.0
+    assert reloaded.stats(0) == (1, 1.0, 1.0)
+    assert "B" not in {reloaded.choose() for _ in range(200)}
+
+    # Found again by key when the list order changes
+    moved = DrillSelector("BCA", state_path=path)
+    assert moved.weight(0) == 0.0 and moved.weight(1) > 0.0
+
+
+def test_selectors_sharing_a_tree_keep_their_own_weights():
+    shared = SumTree(1000, UNSEEN_WEIGHT)
+    alone = DrillSelector(range(1000), rng=random.Random(2))
+    overlay = DrillSelector(range(1000), rng=random.Random(2), tree=shared)
+    other = DrillSelector(range(1000), tree=shared)
+    rng = random.Random(3)
+    for _ in range(300):
+        i, correct, response = rng.randrange(1000), rng.random() < 0.5, rng.random()
+        alone.record(i, correct, response)
+        overlay.record(i, correct, response)
+    alone.exclude(7)
+    overlay.exclude(7)
+
+    assert [alone.pick() for _ in range(500)] == [overlay.pick() for _ in range(500)]
+    assert shared.total() == other.tree.total() == 1000 * UNSEEN_WEIGHT
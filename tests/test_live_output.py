@@ -0,0 +1,150 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import audio_backend
+from live_output import FakeDevice, LiveOutput, RingBuffer
+from morse_render import render_morse, seconds_per_unit
+from morse_utils import encode_to_morse
+
+PERIOD = 256
+
+
+def settle(condition, timeout=5.0):
+    """Wait for the producer thread to get somewhere."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "producer did not catch up"
+        time.sleep(0.0005)
+
+
+def run_until_done(out, device, handles):
+    """Tick only when a full period is buffered (or nothing more is coming): no underruns by construction."""
+    while not all(h.done() for h in handles):
+        settle(lambda: out.ring.fill() >= device.period or all(h.end is not None for h in handles))
+        device.tick()
+
+
+@pytest.fixture
+def live():
+    device = FakeDevice(period=PERIOD, record=True, realtime=False)
+    out = LiveOutput(device, ring_seconds=0.0).start()      # the smallest ring: two periods
+    yield out, device
+    out.close()
+
+
+def tone(value, n):
+    return np.full(n, value, dtype=np.int16)
+
+
+def count(samples, value):
+    return int((samples == value).sum())
+
+
+def test_ring_buffer_wraps():
+    ring = RingBuffer(8)
+    out = np.zeros(8, dtype=np.int16)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 6
+    assert ring.read_into(out[:4]) == 4
+    assert ring.write(np.arange(6, 12, dtype=np.int16)) == 6
+    assert ring.write(np.arange(3, dtype=np.int16)) == 0
+    assert ring.read_into(out) == 8
+    assert out.tolist() == list(range(4, 12))
+    ring.write(np.arange(5, dtype=np.int16))
+    ring.discard(ring.read + 2)
+    assert ring.fill() == 3
+
+
+@pytest.mark.parametrize("wpm", [20, 60, 100])
+def test_morse_is_sample_exact(wpm):
+    device = FakeDevice(period=PERIOD, record=True, realtime=False)
+    out = LiveOutput(device, ring_seconds=0.05).start()
+    unit_s = seconds_per_unit(wpm)
+    morse = [encode_to_morse(m) for m in ("CQ CQ DE W1AW", "5NN TU", "PARIS")]
+    handles = [out.play_morse(m, unit_s) for m in morse]
+    run_until_done(out, device, handles)
+    out.close()
+    expected = np.concatenate([render_morse(m, unit_s) for m in morse])
+    got = device.output()
+    # Ticks before the producer's first write only add leading silence
+    first = int(np.flatnonzero(got)[0]) - int(np.flatnonzero(expected)[0])
+    assert np.array_equal(got[first:first + expected.size], expected)
+    assert not got[first + expected.size:].any()
+    stats = out.stats()
+    assert stats["underruns"] == 0
+    # The ring is far smaller than the messages: the producer had to wait
+    assert stats["overruns"] > 0
+
+
+def test_underruns_count_only_while_a_message_is_owed(live):
+    out, device = live
+    more = threading.Event()
+
+    def slow():
+        yield tone(1000, PERIOD)
+        more.wait()
+        yield tone(1000, PERIOD)
+
+    device.tick(3)                               # idle: nothing owed
+    handle = out.play(slow(), 0.0)
+    settle(lambda: out.ring.fill() == PERIOD)
+    device.tick(4)                               # one period of audio, then three short
+    assert out.underruns == 3
+    assert out.underrun_samples == 3 * PERIOD
+    more.set()
+    settle(lambda: handle.end is not None)
+    device.tick(2)
+    assert handle.done()
+    assert out.underruns == 3
+    assert count(device.output(), 1000) == 2 * PERIOD
+
+
+def test_cancelling_a_queued_message_keeps_its_neighbours(live):
+    out, device = live
+    a, b, c = (out.play(tone(v, 5000)) for v in (1000, 2000, 3000))
+    settle(lambda: out.ring.space() == 0)        # the producer is stuck on a
+    b.cancel()
+    run_until_done(out, device, [a, c])
+    got = device.output()
+    assert (count(got, 1000), count(got, 2000), count(got, 3000)) == (5000, 0, 5000)
+    assert out.underruns == 0
+
+
+def test_cancelling_the_playing_message_drops_only_its_own_audio(live):
+    out, device = live
+    a, b = out.play(tone(1000, 20000)), out.play(tone(2000, 5000))
+    settle(lambda: out.ring.space() == 0)
+    device.tick(10)
+    a.cancel()
+    run_until_done(out, device, [b])
+    got = device.output()
+    assert count(got, 1000) < 20000
+    assert count(got, 2000) == 5000
+    # Nothing of a comes after b has started
+    assert not (got[int(np.flatnonzero(got == 2000)[0]):] == 1000).any()
+
+
+def test_cancelling_a_finished_message_does_nothing(live):
+    out, device = live
+    a = out.play(tone(1000, 3000))
+    run_until_done(out, device, [a])
+    b = out.play(tone(2000, 3000))
+    settle(lambda: out.ring.fill() > 0)
+    a.cancel()
+    run_until_done(out, device, [b])
+    assert count(device.output(), 2000) == 3000
+
+
+def test_backend_interrupt_keeps_the_next_message():
+    # start_pcm stops the previous handle first, which has already ended
+    device = FakeDevice(record=True, speed=20.0)
+    audio_backend.set_backend("live", device=device)
+    try:
+        audio_backend.start_pcm(tone(1000, 8000)).wait()
+        audio_backend.start_pcm(tone(2000, 8000)).wait()
+    finally:
+        audio_backend.close_backend()
+    got = device.output()
+    assert (count(got, 1000), count(got, 2000)) == (8000, 8000)
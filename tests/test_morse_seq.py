@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from morse_render import morse_timing
+from morse_seq import MorseSeq, MorseSeqList
+from morse_utils import encode_to_morse
+
+
+def timing_units(morse):
+    return int(morse_timing(str(morse))[2])
+
+
+def random_morse(rng, n):
+    return "".join(rng.choice(".- /") for _ in range(n))
+
+
+def test_slices_that_cut_a_word_gap():
+    m = MorseSeq.from_str(".- / -...")
+    assert m[3:].units == timing_units("/ -...") == 16
+    assert m[:4].units == timing_units(".- /") == 12
+
+
+@pytest.mark.parametrize("text", ["PARIS", "CQ CQ DE W1AW", "THE QUICK BROWN FOX"])
+def test_every_slice_of_a_message(text):
+    morse = encode_to_morse(text)
+    m = MorseSeq.from_str(morse)
+    assert m.units == timing_units(morse)
+    for i in range(len(morse) + 1):
+        for j in range(i, len(morse) + 1):
+            assert m[i:j].units == timing_units(morse[i:j]), (i, j)
+
+
+def test_random_slices_and_concatenations():
+    rng = random.Random(1)
+    for _ in range(2000):
+        morse = random_morse(rng, rng.randint(0, 24))
+        m = MorseSeq.from_str(morse)
+        assert m.units == timing_units(morse)
+        i, j = sorted(rng.randint(0, len(morse)) for _ in range(2))
+        part = m[i:j]
+        assert part.units == timing_units(morse[i:j])
+        a, b = sorted(rng.randint(0, j - i) for _ in range(2))
+        assert part[a:b].units == timing_units(morse[i:j][a:b])
+        other = random_morse(rng, 6)
+        assert (m + MorseSeq.from_str(other)).units == timing_units(morse + other)
+        assert (part + m).units == timing_units(morse[i:j] + morse)
+
+
+def test_runs_merge_at_a_join():
+    a, b = MorseSeq.from_str(".- "), MorseSeq.from_str(" / -")
+    assert (a + b).units == timing_units(".-  / -") == 16
+    assert a.units + b.units == 18                  # the gap counted twice
+
+
+def test_list_entries_and_their_slices():
+    rng = random.Random(2)
+    morse = [random_morse(rng, rng.randint(0, 12)) for _ in range(500)]
+    morse += [encode_to_morse(w) for w in ("PARIS", "CQ DE K1ABC", "E")]
+    packed = MorseSeqList.from_strings(morse)
+    for k, m in enumerate(morse):
+        assert packed[k].units == timing_units(m), m
+        assert packed[k][1:-1].units == timing_units(m[1:-1]), m
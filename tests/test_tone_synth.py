@@ -0,0 +1,45 @@
+import numpy as np
+
+from morse_render import SAMPLE_RATE, morse_timing, seconds_per_unit
+from morse_stream import pcm_stage, timing_stage
+from tone_synth import ToneSynth
+
+FREQ = 700.0
+VOLUME = 0.5
+
+
+def oscillator(k):
+    """One keyed oscillator running since sample 0, at samples k."""
+    return 32767 * VOLUME * np.sin(2 * np.pi * FREQ * np.asarray(k, dtype=np.float64) / SAMPLE_RATE)
+
+
+def test_phase_carries_across_tone_and_skip():
+    synth = ToneSynth(SAMPLE_RATE, rise_s=0.0)
+    pieces = [synth.tone(1000, FREQ, VOLUME), synth.tone(777, FREQ, VOLUME)]
+    synth.skip(12345, FREQ)
+    pieces.append(synth.tone(2000, FREQ, VOLUME))
+    got = np.concatenate(pieces).astype(np.float64)
+    at = np.r_[np.arange(1777), 1777 + 12345 + np.arange(2000)]
+    # Including the samples either side of the tone/tone and skip boundaries
+    assert np.abs(got - oscillator(at)).max() <= 4
+
+
+def test_stream_tones_follow_one_oscillator(monkeypatch):
+    monkeypatch.setenv("MORSE_RISE_MS", "0")
+    unit_s = seconds_per_unit(30)
+    pieces = [".-. ..-", " / --.- ...", " / -"]
+    events = list(timing_stage(pieces, unit_s))
+    audio = np.concatenate(list(pcm_stage(events, unit_s, FREQ, VOLUME, block_samples=1000)))
+
+    unit_samples = unit_s * SAMPLE_RATE
+    expected = np.zeros(audio.size)
+    offset = 0.0
+    for morse in pieces:
+        starts, is_dash, total = morse_timing(morse)
+        for start, dash in zip(starts, is_dash):
+            at = int(np.rint((offset + start) * unit_samples))
+            n = int(unit_s * (3 if dash else 1) * SAMPLE_RATE)
+            expected[at:at + n] = oscillator(np.arange(at, at + n))
+        offset += total
+    assert audio.size == int(np.rint(offset * unit_samples))
+    assert np.abs(audio - expected).max() <= 4
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from practice_words.compiled import CompiledWords, StoreWords, compile_csv, open_compiled, open_word_list
+from practice_words.store import WordStore
+
+CSV = '''word,definition
+cat,a small animal
+"ice-cream","cold, sweet
+and soft"
+
+café,coffee
+naïve,innocent
+"say ""hi""",greeting
+R2D2,robot
+'''
+
+
+def write_csv(tmp_path, text=CSV):
+    path = str(tmp_path / "words.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return path
+
+
+def test_store_rows_match_the_compiled_list(tmp_path):
+    path = write_csv(tmp_path)
+    with open_compiled(compile_csv(path)) as compiled, StoreWords(WordStore(path)) as lazy:
+        assert len(lazy) == len(compiled) == 6
+        assert list(lazy) == list(compiled)
+        assert lazy[1].definition == "cold, sweet\nand soft"
+        assert lazy[-1] == compiled[5]
+
+
+def test_index_is_cached_until_the_csv_changes(tmp_path):
+    path = write_csv(tmp_path)
+    with WordStore(path) as store:
+        rows = list(store)
+    assert os.path.exists(path + ".idx")
+    with WordStore(path) as store:
+        assert list(store) == rows
+    write_csv(tmp_path, CSV + "dog,another animal\n")
+    with WordStore(path) as store:
+        assert store[len(store) - 1] == ("dog", "another animal")
+
+
+def test_open_word_list_uses_the_store_until_compiled(tmp_path):
+    path = write_csv(tmp_path)
+    words = open_word_list(path)
+    assert isinstance(words, StoreWords)
+    words.close()
+    compile_csv(path)
+    words = open_word_list(path)
+    assert isinstance(words, CompiledWords)
+    words.close()
+    write_csv(tmp_path, CSV + "dog,another animal\n")
+    with open_word_list(path) as words:
+        assert isinstance(words, StoreWords) and words[6].word == "dog"
+
+
+def test_failed_compile_leaves_no_partial_file(tmp_path, monkeypatch):
+    import practice_words.compiled as compiled
+
+    def fail(rows, out, *args):
+        out.write(b"partial")
+        raise RuntimeError("disk full")
+
+    path = write_csv(tmp_path)
+    monkeypatch.setattr(compiled, "write_compiled", fail)
+    with pytest.raises(RuntimeError):
+        compile_csv(path)
+    assert sorted(os.listdir(tmp_path)) == ["words.csv"]
@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+
+from morse_profile import span
+
+DEFAULT_MAXSIZE = 32
+
+
+def tone_key(freq_hz, duration_sec, volume, sample_rate, backend):
+    # Durations come from unit_s * multiplier, so round away float noise
+    return (float(freq_hz), round(float(duration_sec), 9), float(volume), int(sample_rate), backend)
+
+
+class ToneCache:
+    """
+    Bounded LRU cache of synthesized tones, keyed by
+    (freq, duration, volume, sample_rate, backend).
+
+    Values are whatever the backend plays (pygame Sound, simpleaudio
+    WaveObject, int16 array), so they must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = max(1, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, factory):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                pass
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            with span("synth"):
+                value = factory()
+            self._entries[key] = value
+            self._trim()
+            return value
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = max(1, int(maxsize))
+            self._trim()
+
+    def evict(self, predicate):
+        """Drop every entry whose key matches predicate; returns the count."""
+        with self._lock:
+            stale = [k for k in self._entries if predicate(k)]
+            for k in stale:
+                del self._entries[k]
+            self.evictions += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _trim(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+TONE_CACHE = ToneCache(int(os.environ.get("MORSE_TONE_CACHE_SIZE", DEFAULT_MAXSIZE)))
+
+
+def cached_tone(backend, freq_hz, duration_sec, volume, sample_rate, synth):
+    """Return synth(freq_hz, duration_sec, volume, sample_rate), built at most once."""
+    key = tone_key(freq_hz, duration_sec, volume, sample_rate, backend)
+    return TONE_CACHE.get(key, lambda: synth(freq_hz, duration_sec, volume, sample_rate))
+
+
+def keep_durations(durations):
+    """Evict every tone whose duration is not in durations (e.g. after a speed change)."""
+    keep = {round(float(d), 9) for d in durations}
+    return TONE_CACHE.evict(lambda key: key[1] not in keep)
@@ -0,0 +1,123 @@
+"""
+Float32 sine-tone kernel with raised-cosine keying ramps.
+
+ToneSynth works in preallocated float32 scratch space with in-place
+ufuncs (phase, sin, ramps, gain) and casts the result straight into an
+int16 output array, so a tone allocates nothing but that output (or
+nothing at all when the caller passes one in). The int16 array is handed
+on as is: pygame's Sound and simpleaudio take it through the buffer
+protocol, without a .tobytes() copy.
+
+The rise and fall are raised-cosine ramps, rise_s long (MORSE_RISE_MS,
+default 5 ms), taken from precomputed tables. Tones shorter than two
+ramps get ramps of half their length.
+
+The oscillator phase carries on from one tone() to the next, and skip()
+advances it over silence, so successive tones sound like one keyed
+oscillator; morse_stream keys its whole stream from one ToneSynth this
+way. synth_tone(), which the tone caches use, starts every tone at
+phase 0 since a cached tone is pasted in at many different positions.
+"""
+import math
+import os
+import threading
+
+import numpy as np
+
+RISE_ENV = "MORSE_RISE_MS"
+DEFAULT_RISE_S = 0.005
+
+
+def rise_seconds():
+    """Keying ramp length from MORSE_RISE_MS, or the 5 ms default."""
+    value = os.environ.get(RISE_ENV)
+    return DEFAULT_RISE_S if not value else max(0.0, float(value) / 1000.0)
+
+
+def raised_cosine(n):
+    """Rising half-cosine from just above 0 to just below 1, n samples, float32."""
+    k = np.arange(n, dtype=np.float64) + 0.5
+    return (0.5 - 0.5 * np.cos(np.pi * k / n)).astype(np.float32)
+
+
+class ToneSynth:
+    """Not thread-safe: the scratch buffers and phase belong to one caller."""
+
+    def __init__(self, sample_rate, rise_s=None):
+        self.sample_rate = int(sample_rate)
+        self.rise_s = rise_seconds() if rise_s is None else max(0.0, float(rise_s))
+        self.rise_samples = int(self.rise_s * self.sample_rate)
+        self.phase = 0.0
+        self.grows = 0            # scratch reallocations, for the benchmark
+        self._ramps = {}
+        self._index = np.zeros(0, dtype=np.float32)
+        self._scratch = np.zeros(0, dtype=np.float32)
+
+    def ramp(self, n):
+        table = self._ramps.get(n)
+        if table is None:
+            table = self._ramps[n] = raised_cosine(n)
+        return table
+
+    def _reserve(self, n):
+        if n > self._scratch.size:
+            size = max(n, 2 * self._scratch.size)
+            self._index = np.arange(size, dtype=np.float32)
+            self._scratch = np.empty(size, dtype=np.float32)
+            self.grows += 1
+
+    def tone(self, n_samples, freq_hz, volume, out=None):
+        """
+        n_samples of tone as int16, written into out when given (it must
+        hold n_samples) and returned. volume is clamped to [0, 1].
+        """
+        n = int(n_samples)
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        self._reserve(n)
+        step = 2.0 * math.pi * float(freq_hz) / self.sample_rate
+        buf = self._scratch[:n]
+        np.multiply(self._index[:n], np.float32(step), out=buf)
+        np.add(buf, np.float32(self.phase), out=buf)
+        np.sin(buf, out=buf)
+
+        r = min(self.rise_samples, n // 2)
+        if r:
+            ramp = self.ramp(r)
+            np.multiply(buf[:r], ramp, out=buf[:r])
+            np.multiply(buf[n - r:], ramp[::-1], out=buf[n - r:])
+
+        np.multiply(buf, np.float32(32767 * max(0.0, min(1.0, float(volume)))), out=buf)
+        np.copyto(out[:n], buf, casting="unsafe")
+        self.skip(n, freq_hz)
+        return out
+
+    def skip(self, n_samples, freq_hz):
+        """Advance the oscillator over n_samples of silence (or of a tone)."""
+        self.phase = (self.phase + 2.0 * math.pi * float(freq_hz) * n_samples / self.sample_rate) \
+            % (2.0 * math.pi)
+
+
+_local = threading.local()
+
+
+def _synth_for(sample_rate):
+    synths = getattr(_local, "synths", None)
+    if synths is None:
+        synths = _local.synths = {}
+    rise_s = rise_seconds()
+    synth = synths.get(sample_rate)
+    if synth is None or synth.rise_s != rise_s:
+        synth = synths[sample_rate] = ToneSynth(sample_rate, rise_s)
+    return synth
+
+
+def synth_tone(freq_hz, duration_sec, volume, sample_rate, out=None):
+    """
+    One tone from phase 0 as a mono int16 array, using this thread's
+    ToneSynth for sample_rate. This is what every backend caches.
+    """
+    n_samples = max(1, int(max(0.0, float(duration_sec)) * sample_rate))
+    synth = _synth_for(sample_rate)
+    synth.phase = 0.0
+    return synth.tone(n_samples, freq_hz, volume, out)